@@ -1,31 +1,206 @@
 # File: app/routes.py
 
-from flask import request, jsonify, current_app, url_for
+from flask import request, jsonify, current_app, url_for, Response, stream_with_context
 import os
 import uuid
 import json
+import threading
+from contextlib import contextmanager
 from pathlib import Path
 from werkzeug.utils import secure_filename
 
-from app.utils.process_pdfs import process_headings_1a
+from app.utils.process_pdfs import process_headings_1a, iter_outline_events
 from app.utils.analyze_collections import analyze_collection_1b
 from app.utils.recommendation_engine import RecommendationEngine
+from app.utils.parsed_document import ParsedDocument
+from app.utils.job_queue import job_queue_from_env
+from app.utils.index_store import index_store_from_env
+from app.utils.result_cache import result_cache_from_env
+from app.utils.semantic_index import semantic_index_from_env
+from app.utils.outline_cache import get_outline_cache
 from app.utils.helpers import allowed_file, save_uploaded_file, cleanup_temp_files
 
-# Initialize recommendation engine (in-memory storage)
-recommendation_engine = RecommendationEngine()
+# Initialize recommendation engine (in-memory storage, cached /api/analyze results).
+# TECHVERSE_SECTION_PAGE_CHARS: page text indexed with each heading (default 0 = headings only)
+# TECHVERSE_SEMANTIC_MODEL: local embedding model for section search (see semantic_index_from_env)
+# TECHVERSE_QUERY_BATCH: concurrent recommendation queries scored together (default 0 = off).
+#   Opt-in for high-QPS deployments: every query then waits for its batch, which
+#   only pays off under heavy concurrency (e.g. 32).
+# TECHVERSE_QUERY_BATCH_WAIT_MS: how long the first query waits for others (default 2)
+recommendation_engine = RecommendationEngine(
+    result_cache=result_cache_from_env(),
+    section_page_chars=int(os.getenv("TECHVERSE_SECTION_PAGE_CHARS", "0")),
+    semantic=semantic_index_from_env(),
+    query_batch_size=int(os.getenv("TECHVERSE_QUERY_BATCH", "0")),
+    query_batch_wait=float(os.getenv("TECHVERSE_QUERY_BATCH_WAIT_MS", "2")) / 1000
+)
+engine_lock = threading.Lock()  # background jobs and requests mutate the engine
+
+# On-disk snapshot + change log for the engine (None when TECHVERSE_PERSIST=0)
+index_store = index_store_from_env()
+shared_index = index_store is not None and index_store.shared
+
+# Background worker pool for multi-PDF uploads (job state shared across
+# worker processes when they share the index)
+job_queue = job_queue_from_env(state_dir=index_store.root / "jobs" if shared_index else None)
 
 # Output folder for JSON results
 OUTPUT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "output"))
 os.makedirs(OUTPUT_DIR, exist_ok=True)
 
+# Documents / sections returned by /api/analyze unless the request asks for top_k / sections_top_k
+DEFAULT_TOP_K = 10
+DEFAULT_SECTIONS_TOP_K = 5
+
+
+def _sse(event, data):
+    """Format one Server-Sent Events message."""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+@contextmanager
+def engine_writer():
+    """
+    Guard an engine mutation. With a shared index this also takes the
+    cross-process writer lock and publishes the change for other workers.
+    """
+    with engine_lock:
+        if shared_index:
+            with index_store.exclusive(recommendation_engine):
+                yield
+        else:
+            yield
+
+
+def parse_upload(filepath):
+    """
+    ParsedDocument for an uploaded file, or None when PyMuPDF cannot open it;
+    1A then falls back to its own error outline as before.
+    """
+    try:
+        return ParsedDocument.from_pdf(filepath)
+    except Exception as e:
+        current_app.logger.warning(f"Could not parse {filepath}: {e}")
+        return None
+
+
+def sync_engine():
+    """
+    Apply changes published by other worker processes (no-op unless the
+    index is shared). The check runs without engine_lock; the lock is only
+    taken when there are new log entries to apply.
+    """
+    if shared_index and index_store.has_updates():
+        with engine_lock:
+            index_store.refresh(recommendation_engine)
+
+
+def _process_library_upload(upload_job, app, session_id, uploads, persona, job):
+    """
+    Job body for /api/upload-pdfs: 1A per file, engine indexing, then 1B over
+    the session. Returns the payload the synchronous route used to return.
+    """
+    with app.app_context():
+        processed_docs = []
+        parsed_docs = {}  # filepath -> ParsedDocument, parsed once per upload
+        engine_items = []  # (filepath, headings_result, persona, job, session_id)
+
+        for filename, filepath, pdf_url in uploads:
+            upload_job.file_started(filename)
+            try:
+                parsed = parse_upload(filepath)
+                if parsed is not None:
+                    parsed_docs[filepath] = parsed
+
+                # Step 1A - extract headings
+                headings_list = process_headings_1a(filepath, parsed=parsed)
+                headings_result = headings_list[0] if headings_list else {}
+            except Exception as e:
+                current_app.logger.error(f"[upload_library_pdfs] Failed to process {filepath}: {e}")
+                upload_job.file_failed(filename, str(e))
+                continue
+
+            engine_items.append((filepath, headings_result, persona, job, session_id))
+            processed_docs.append({
+                "filename": filename,
+                "title": headings_result.get("title", ""),
+                "sections_count": len(headings_result.get("outline", [])),
+                "outline": headings_result.get("outline", []),
+                "pdf_url": pdf_url
+            })
+            upload_job.file_done(filename)
+
+        # Store in recommendation engine (one index update for the batch)
+        with engine_writer():
+            recommendation_engine.add_documents(engine_items, parsed_docs=parsed_docs)
+
+        # Save 1A output JSON
+        headings_output_path = os.path.join(OUTPUT_DIR, f"{session_id}_1a.json")
+        with open(headings_output_path, "w", encoding="utf-8") as f:
+            json.dump(processed_docs, f, indent=2, ensure_ascii=False)
+
+        # Step 1B - analyze across uploaded PDFs (on a copy of the session's
+        # documents, so other jobs and requests don't wait behind 1B)
+        with engine_lock:
+            session_docs = [dict(doc) for doc in recommendation_engine.get_documents_for_session(session_id)]
+            library_size = recommendation_engine.get_library_size()
+        insights = analyze_collection_1b(
+            session_id=session_id,
+            persona=persona,
+            job=job,
+            parsed_docs=parsed_docs,
+            documents=session_docs
+        )
+
+        # Save 1B output JSON
+        insights_output_path = os.path.join(OUTPUT_DIR, f"{session_id}_1b.json")
+        with open(insights_output_path, "w", encoding="utf-8") as f:
+            json.dump(insights, f, indent=2, ensure_ascii=False)
+
+        return {
+            "status": "success",
+            "session_id": session_id,
+            "message": f"Processed {len(processed_docs)} documents",
+            "processed_docs": processed_docs,
+            "uploaded_files": [doc["filename"] for doc in processed_docs],
+            "total_library_size": library_size,
+            "insights": insights
+        }
+
 def register_routes(app):
 
+    # Restore the library persisted by a previous run
+    if index_store is not None and recommendation_engine.store is None:
+        with engine_lock:
+            try:
+                restored = index_store.attach(recommendation_engine)
+                if restored:
+                    app.logger.info(f"Restored {restored} documents from {index_store.root}")
+            except Exception as e:
+                app.logger.exception(f"Failed to restore recommendation index: {e}")
+
     # ------------------ Health Check ------------------ #
     @app.route("/api/health", methods=["GET"])
     def health_check():
         return jsonify({"status": "healthy", "message": "Backend is running"})
 
+    # ------------------ Cache Stats ------------------ #
+    @app.route("/api/cache/stats", methods=["GET"])
+    def cache_stats():
+        result_cache = recommendation_engine.result_cache
+        outline_cache = get_outline_cache()
+        return jsonify({
+            "status": "success",
+            "index_version": recommendation_engine.index_version,
+            "recommendations": result_cache.stats() if result_cache else None,
+            "outlines": outline_cache.stats() if outline_cache else None,
+            "index_store": index_store.stats() if index_store else None,
+            "semantic": recommendation_engine.semantic.stats() if recommendation_engine.semantic is not None else None,
+            "query_batching": (
+                recommendation_engine.query_batcher.stats() if recommendation_engine.query_batcher else None
+            )
+        })
+
     # ------------------ Single PDF Upload ------------------ #
     @app.route("/api/upload", methods=["POST"])
     def upload_pdf():
@@ -48,7 +223,7 @@ def register_routes(app):
             )
 
             # Step 1A: Extract headings
-            headings_list = process_headings_1a(filepath)
+            headings_list = process_headings_1a(filepath, parsed=parse_upload(filepath))
             headings_result = headings_list[0] if headings_list else {}
 
             # Save 1A output JSON for single file
@@ -68,6 +243,66 @@ def register_routes(app):
             current_app.logger.exception("Error uploading single PDF")
             return jsonify({"status": "error", "message": str(e)}), 500
 
+    # ------------------ Single PDF Upload (streamed outline) ------------------ #
+    @app.route("/api/upload-stream", methods=["POST"])
+    def upload_pdf_stream():
+        """
+        Single-PDF upload that streams the 1A outline extractor
+        (extract_outline) over Server-Sent Events: emits "session", then the
+        "title", then "headings" page by page while the PDF is parsed, and
+        finally the authoritative "outline" followed by "done" (or "error").
+
+        This is not the same extractor as /api/upload (process_headings_1a),
+        so the schema differs: headings here are {"level", "text", "page",
+        ...} dicts and the title comes from the PDF, where /api/upload
+        returns plain heading strings titled with the filename. The saved
+        <session_id>_1a.json holds this endpoint's schema.
+        """
+        if "file" not in request.files:
+            return jsonify({"status": "error", "message": "No PDF file provided"}), 400
+
+        file = request.files["file"]
+        if file.filename.strip() == "" or not allowed_file(file.filename):
+            return jsonify({"status": "error", "message": "Invalid file"}), 400
+
+        session_id = str(uuid.uuid4())
+        filename = secure_filename(file.filename)
+        filepath = os.path.abspath(save_uploaded_file(file, session_id))
+        pdf_url = url_for(
+            "serve_static",
+            filename=f"uploads/{session_id}/{filename}",
+            _external=True
+        )
+
+        def generate():
+            yield _sse("session", {"session_id": session_id, "pdf_url": pdf_url, "filename": filename})
+            try:
+                for event, payload in iter_outline_events(filepath):
+                    if event != "outline":
+                        yield _sse(event, payload)
+                        continue
+
+                    spec_result = payload["spec"]
+                    output_path = os.path.join(OUTPUT_DIR, f"{session_id}_1a.json")
+                    with open(output_path, "w", encoding="utf-8") as f:
+                        json.dump(spec_result, f, indent=2, ensure_ascii=False)
+
+                    yield _sse("outline", {
+                        "title": spec_result.get("title", ""),
+                        "headings": spec_result.get("outline", [])
+                    })
+            except Exception as e:
+                current_app.logger.exception("Error streaming PDF outline")
+                yield _sse("error", {"status": "error", "message": str(e)})
+                return
+            yield _sse("done", {"status": "success", "session_id": session_id})
+
+        return Response(
+            stream_with_context(generate()),
+            mimetype="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+        )
+
     # ------------------ Multiple PDF Upload ------------------ #
     @app.route("/api/upload-pdfs", methods=["POST"])
     def upload_library_pdfs():
@@ -80,80 +315,86 @@ def register_routes(app):
                 return jsonify({"status": "error", "message": "No files provided"}), 400
 
             session_id = str(uuid.uuid4())
-            processed_docs = []
+            uploads = []  # (original filename, saved filepath, pdf_url)
 
             for file in files:
                 if file.filename.strip() == "" or not allowed_file(file.filename):
                     continue
 
                 filepath = os.path.abspath(save_uploaded_file(file, session_id))
-
-                try:
-                    # Step 1A - extract headings
-                    headings_list = process_headings_1a(filepath)
-                    headings_result = headings_list[0] if headings_list else {}
-                except Exception as e:
-                    current_app.logger.error(f"[upload_library_pdfs] Failed to process {filepath}: {e}")
-                    continue
-
-                # Store in recommendation engine
-                recommendation_engine.add_document(
+                uploads.append((
+                    file.filename,
                     filepath,
-                    headings_result,
-                    persona,
-                    job,
-                    session_id=session_id
-                )
-
-                processed_docs.append({
-                    "filename": file.filename,
-                    "title": headings_result.get("title", ""),
-                    "sections_count": len(headings_result.get("outline", [])),
-                    "outline": headings_result.get("outline", []),
-                    "pdf_url": url_for(
+                    url_for(
                         "serve_static",
                         filename=f"uploads/{session_id}/{secure_filename(file.filename)}",
                         _external=True
                     )
-                })
-
-            # Save 1A output JSON
-            headings_output_path = os.path.join(OUTPUT_DIR, f"{session_id}_1a.json")
-            with open(headings_output_path, "w", encoding="utf-8") as f:
-                json.dump(processed_docs, f, indent=2, ensure_ascii=False)
-
-            # Step 1B - analyze across uploaded PDFs
-            insights = analyze_collection_1b(
+                ))
+
+            # Heavy work (1A, indexing, 1B) runs on the job queue
+            upload_job = job_queue.submit(
+                _process_library_upload,
+                [name for name, _, _ in uploads],
+                meta={"session_id": session_id},
+                app=current_app._get_current_object(),
                 session_id=session_id,
+                uploads=uploads,
                 persona=persona,
-                job=job,
-                recommendation_engine=recommendation_engine
+                job=job
             )
 
-            # Save 1B output JSON
-            insights_output_path = os.path.join(OUTPUT_DIR, f"{session_id}_1b.json")
-            with open(insights_output_path, "w", encoding="utf-8") as f:
-                json.dump(insights, f, indent=2, ensure_ascii=False)
-
-            return jsonify({
-                "status": "success",
+            response = jsonify({
+                "status": "accepted",
                 "session_id": session_id,
-                "message": f"Processed {len(processed_docs)} documents",
-                "processed_docs": processed_docs,
-                "uploaded_files": [doc["filename"] for doc in processed_docs],
-                "total_library_size": recommendation_engine.get_library_size(),
-                "insights": insights
+                "job_id": upload_job.id,
+                "status_url": url_for("get_job_status", job_id=upload_job.id),
+                "results_url": url_for("get_job_results", job_id=upload_job.id)
             })
+            response.headers["Location"] = url_for("get_job_status", job_id=upload_job.id)
+            return response, 202
 
         except Exception as e:
             current_app.logger.exception("Error uploading multiple PDFs")
             return jsonify({"status": "error", "message": str(e)}), 500
 
+    # ------------------ Job Status & Results ------------------ #
+    @app.route("/api/jobs/<job_id>", methods=["GET"])
+    def get_job_status(job_id):
+        upload_job = job_queue.get(job_id)
+        if not upload_job:
+            return jsonify({"status": "error", "message": "Job not found"}), 404
+        return jsonify({"status": "success", "job": upload_job.to_dict()})
+
+    @app.route("/api/jobs/<job_id>/results", methods=["GET"])
+    def get_job_results(job_id):
+        upload_job = job_queue.get(job_id)
+        if not upload_job:
+            return jsonify({"status": "error", "message": "Job not found"}), 404
+
+        if upload_job.status == "failed":
+            return jsonify({"status": "error", "message": upload_job.error, "job": upload_job.to_dict()}), 500
+        if upload_job.status != "done":
+            # Not ready yet: same shape as the status endpoint, poll again
+            return jsonify({"status": "pending", "job": upload_job.to_dict()}), 202
+
+        return jsonify(upload_job.result)
+
     # ------------------ List Uploaded Documents ------------------ #
     @app.route("/api/documents", methods=["GET"])
     def list_documents():
+        sync_engine()
+        session_id = request.args.get("session_id")
+        if session_id:
+            doc_ids = list(recommendation_engine.session_index.get(session_id, ()))
+        else:
+            doc_ids = list(recommendation_engine.documents)
+
         docs = []
-        for doc_id, doc in recommendation_engine.documents.items():
+        for doc_id in doc_ids:
+            doc = recommendation_engine.documents.get(doc_id)
+            if doc is None:
+                continue
             file_path = doc.get("filepath")  # fixed key name
             if not file_path or not os.path.isfile(file_path):
                 current_app.logger.warning(f"[list_documents] Missing file for doc_id={doc_id}, skipping")
@@ -183,10 +424,25 @@ def register_routes(app):
             current_section = data.get("selection", "")
             persona = data.get("persona", "General Analyst")
             job = data.get("job", "Analyze document")
+            try:
+                top_k = int(data.get("top_k", DEFAULT_TOP_K))
+                sections_top_k = int(data.get("sections_top_k", DEFAULT_SECTIONS_TOP_K))
+                page_number = data.get("page_number")
+                page_number = int(page_number) if page_number is not None else None
+            except (TypeError, ValueError):
+                return jsonify({
+                    "status": "error",
+                    "message": "top_k, sections_top_k and page_number must be integers"
+                }), 400
 
             if not document_id:
                 return jsonify({"status": "error", "message": "Missing document_id"}), 400
+            if top_k < 1:
+                return jsonify({"status": "error", "message": "top_k must be positive"}), 400
+            if sections_top_k < 0:
+                return jsonify({"status": "error", "message": "sections_top_k must not be negative"}), 400
 
+            sync_engine()
             doc = recommendation_engine.documents.get(document_id)
             if not doc:
                 return jsonify({"status": "error", "message": "Document not found"}), 404
@@ -195,10 +451,36 @@ def register_routes(app):
                 current_section=current_section,
                 persona=persona,
                 job=job,
-                document_id=document_id
+                document_id=document_id,
+                top_k=top_k
             )
 
-            return jsonify({"status": "success", "recommendations": recommendations})
+            # Best matching sections library-wide, each with the PDF to jump to
+            related_sections = []
+            if sections_top_k:
+                for section in recommendation_engine.get_related_sections(
+                    current_section=current_section,
+                    persona=persona,
+                    job=job,
+                    document_id=document_id,
+                    page_number=page_number,
+                    top_k=sections_top_k
+                ):
+                    section_doc = recommendation_engine.documents.get(section["document_id"]) or {}
+                    related_sections.append({
+                        **section,
+                        "pdf_url": url_for(
+                            "serve_static",
+                            filename=f"uploads/{section_doc.get('session_id')}/{section['document']}",
+                            _external=True
+                        )
+                    })
+
+            return jsonify({
+                "status": "success",
+                "recommendations": recommendations,
+                "related_sections": related_sections
+            })
 
         except Exception as e:
             current_app.logger.exception("Error analyzing section")
@@ -216,11 +498,14 @@ def register_routes(app):
             if not session_id:
                 return jsonify({"status": "error", "message": "Missing session_id"}), 400
 
+            sync_engine()
+            with engine_lock:
+                session_docs = [dict(doc) for doc in recommendation_engine.get_documents_for_session(session_id)]
             insights = analyze_collection_1b(
                 session_id=session_id,
                 persona=persona,
                 job=job,
-                recommendation_engine=recommendation_engine
+                documents=session_docs
             )
 
             # Save insights JSON
@@ -261,12 +546,8 @@ def register_routes(app):
 
             cleanup_temp_files(session_id)
 
-            recommendation_engine.documents = {
-                doc_id: doc
-                for doc_id, doc in recommendation_engine.documents.items()
-                if doc.get("session_id") != session_id
-            }
-            recommendation_engine._refit_vectorizer()
+            with engine_writer():
+                recommendation_engine.remove_session(session_id)
 
             return jsonify({"status": "success", "message": f"Session {session_id} cleaned up"})
 
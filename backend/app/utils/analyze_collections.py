@@ -9,21 +9,17 @@ import re
 import sys
 import time
 import argparse
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from datetime import datetime
 from pathlib import Path
-from typing import List, Dict, Any, Optional, Tuple
-from sklearn.feature_extraction.text import TfidfVectorizer
-import numpy as np
-import PyPDF2
+from functools import lru_cache
+from typing import List, Dict, Any, Optional, Tuple, TYPE_CHECKING
 
-# Lightweight NLP
-import nltk
-from nltk.corpus import stopwords  # may not be present in container; guarded
-from nltk.tokenize import sent_tokenize, word_tokenize  # guarded
-
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
+# sklearn, nltk and PyPDF2 are imported where they are used so that importing
+# this module (e.g. from the Flask app) stays cheap.
+if TYPE_CHECKING:
+    import numpy as np
+    from sklearn.feature_extraction.text import TfidfVectorizer
 
 
 # Debug prints
@@ -108,11 +104,14 @@ _FALLBACK_STOPWORDS = {
 }
 
 
+@lru_cache(maxsize=None)
 def _ensure_nltk_data():
     """
-    Try to verify NLTK tokenizers/stopwords are present.
+    Try to verify NLTK tokenizers/stopwords are present (checked once, on first use).
     We NEVER download at runtime (offline rule).
     """
+    import nltk
+
     have_punkt = True
     have_sw = True
     try:
@@ -126,12 +125,12 @@ def _ensure_nltk_data():
     return have_punkt, have_sw
 
 
-_HAVE_PUNKT, _HAVE_STOPWORDS = _ensure_nltk_data()
-
-
 def tokenize_sentences(text: str) -> List[str]:
-    if _HAVE_PUNKT:
+    have_punkt, _ = _ensure_nltk_data()
+    if have_punkt:
         try:
+            from nltk.tokenize import sent_tokenize
+
             return sent_tokenize(text)
         except Exception:
             pass
@@ -140,8 +139,11 @@ def tokenize_sentences(text: str) -> List[str]:
 
 
 def tokenize_words(text: str) -> List[str]:
-    if _HAVE_PUNKT:
+    have_punkt, _ = _ensure_nltk_data()
+    if have_punkt:
         try:
+            from nltk.tokenize import word_tokenize
+
             return word_tokenize(text)
         except Exception:
             pass
@@ -150,8 +152,11 @@ def tokenize_words(text: str) -> List[str]:
 
 
 def get_stopwords() -> set:
-    if _HAVE_STOPWORDS:
+    _, have_stopwords = _ensure_nltk_data()
+    if have_stopwords:
         try:
+            from nltk.corpus import stopwords
+
             return set(stopwords.words("english"))
         except Exception:
             pass
@@ -209,6 +214,8 @@ def extract_pages_pdf(pdf_path: Path) -> List[str]:
     Extract text per page. Returns list index=page-1 -> text (str).
     Uses PyPDF2; safe for offline; some PDFs may yield empty strings.
     """
+    import PyPDF2
+
     pages = []
     try:
         with pdf_path.open("rb") as fh:
@@ -446,14 +453,18 @@ def persona_job_keywords(persona: str, job: str) -> List[str]:
 # Text preprocessing
 
 
-STOPWORDS = get_stopwords()
+@lru_cache(maxsize=1)
+def _stopwords() -> frozenset:
+    return frozenset(get_stopwords())
+
 
 _WORD_RE = re.compile(r"[A-Za-z]{2,}")
 
 
 def preprocess(text: str) -> str:
+    stop = _stopwords()
     toks = [t.lower() for t in _WORD_RE.findall(text)]
-    toks = [t for t in toks if t not in STOPWORDS]
+    toks = [t for t in toks if t not in stop]
     return " ".join(toks)
 
 
@@ -465,7 +476,7 @@ def score_section(
     persona: str,
     job: str,
     kw_cache: Optional[List[str]] = None,
-    tfidf_vectorizer: Optional[TfidfVectorizer] = None,
+    tfidf_vectorizer: Optional["TfidfVectorizer"] = None,
     query_vec=None,
 ) -> float:
     """
@@ -474,31 +485,82 @@ def score_section(
       * Keyword coverage
       * Length min
     Expect pre-fit tfidf_vectorizer & query_vec for efficiency.
+    Single-section form of score_sections (prefer that for many sections).
     """
+    return float(
+        score_sections([sec_text], persona, job, kw_cache, tfidf_vectorizer, query_vec)[0]
+    )
+
+
+def keyword_hits(texts: List[str], keywords) -> "np.ndarray":
+    """
+    Number of keywords occurring as substrings of each lowercased text.
+    All texts are searched as one joined string: each keyword is located
+    with str.find, and after a hit the search resumes at the next text, so
+    the cost is one C-level scan per keyword.
+    """
+    import numpy as np
+
+    hits = np.zeros(len(texts), dtype=np.int64)
+    if not texts:
+        return hits
+    lowers = [t.lower() for t in texts]
+    # "\x00" never occurs in a keyword, so no match spans two texts
+    starts = np.cumsum([0] + [len(t) + 1 for t in lowers[:-1]])
+    joined = "\x00".join(lowers)
+    for k in keywords:
+        pos = joined.find(k)
+        while pos != -1:
+            i = int(np.searchsorted(starts, pos, side="right")) - 1
+            hits[i] += 1
+            if i + 1 >= len(starts):
+                break
+            pos = joined.find(k, int(starts[i + 1]))
+    return hits
+
+
+def score_sections(
+    texts: List[str],
+    persona: str,
+    job: str,
+    kw_cache: Optional[List[str]] = None,
+    tfidf_vectorizer: Optional["TfidfVectorizer"] = None,
+    query_vec=None,
+    section_vecs=None,
+) -> "np.ndarray":
+    """
+    score_section for many sections at once: one preprocess pass, one
+    transform and one sparse product against query_vec, with keyword
+    coverage and length scores computed as arrays. Scores are identical to
+    calling score_section per text.
+    section_vecs: TF-IDF rows of texts, if already computed (no transform).
+    """
+    import numpy as np
+
     if not kw_cache:
         kw_cache = persona_job_keywords(persona, job)
     kw_set = set(kw_cache)
 
     # TF-IDF sim
-    if tfidf_vectorizer is not None and query_vec is not None:
+    sims = np.zeros(len(texts))
+    if (tfidf_vectorizer is not None or section_vecs is not None) and query_vec is not None and texts:
         try:
-            sec_vec = tfidf_vectorizer.transform([preprocess(sec_text)])
-            sim = float(cosine_similarity(sec_vec, query_vec)[0][0])
+            from sklearn.metrics.pairwise import cosine_similarity
+
+            if section_vecs is None:
+                section_vecs = tfidf_vectorizer.transform([preprocess(t) for t in texts])
+            sims = cosine_similarity(section_vecs, query_vec)[:, 0]
         except Exception:
-            sim = 0.0
-    else:
-        sim = 0.0
+            sims = np.zeros(len(texts))
 
     # keyword coverage (raw)
-    lower = sec_text.lower()
-    hits = sum(1 for k in kw_set if k in lower)
-    kw_score = hits / max(len(kw_set), 1)
+    kw_scores = keyword_hits(texts, kw_set) / max(len(kw_set), 1)
 
     # length bonus
-    length_score = min(len(sec_text) / 1500.0, 1.0)
+    length_scores = np.minimum(np.array([len(t) for t in texts], dtype=np.float64) / 1500.0, 1.0)
 
     # Weighted sum (tune as needed)
-    return 0.6 * sim + 0.3 * kw_score + 0.1 * length_score
+    return 0.6 * sims + 0.3 * kw_scores + 0.1 * length_scores
 
 
 # Subsection extraction (top sentences)
@@ -531,19 +593,143 @@ def pick_top_sentences(text: str, max_n: int = 3) -> List[str]:
 
 # Collection Processing
 
+# Collection TF-IDF model: fitted on the page texts plus the persona/job query
+TFIDF_MAX_FEATURES = 2000
+TFIDF_NGRAM_RANGE = (1, 2)
 
-def process_collection(
-    collection_dir: Path,
-    persona: str,
-    job: str,
-    pdf_filenames: Optional[List[str]] = None,
-    max_sections: int = 10,
-    max_subsects: int = 3,
-) -> Dict[str, Any]:
+
+def _term_counts(texts: List[str]):
     """
-    Process all PDFs in a single collection directory.
+    (sorted vocabulary, CSR term counts with sorted indices) of texts under
+    the collection TF-IDF analyzer. No terms -> empty vocabulary, 0 columns.
+    """
+    import numpy as np
+    from scipy import sparse
+    from sklearn.feature_extraction.text import CountVectorizer
+
+    vectorizer = CountVectorizer(ngram_range=TFIDF_NGRAM_RANGE)
+    try:
+        counts = sparse.csr_matrix(vectorizer.fit_transform(texts))
+    except ValueError:  # empty vocabulary
+        return np.array([], dtype=object), sparse.csr_matrix((len(texts), 0), dtype=np.int64)
+    counts.sort_indices()
+    return vectorizer.get_feature_names_out().astype(object), counts
+
+
+def _remap_columns(counts, col_map, n_cols: int):
+    """
+    counts with column j moved to col_map[j] (dropped where -1). col_map is
+    increasing on kept columns, so rows keep sorted indices.
+    """
+    import numpy as np
+    from scipy import sparse
+
+    cols = col_map[counts.indices]
+    keep = cols >= 0
+    kept_before = np.concatenate([[0], np.cumsum(keep)])
+    return sparse.csr_matrix(
+        (counts.data[keep], cols[keep], kept_before[counts.indptr]), shape=(counts.shape[0], n_cols)
+    )
+
+
+def _document_sections(p: Path, pages: List[str], collection_dir: Path) -> List[Section]:
+    """
+    Sections of one PDF: from its 1A outline when there is one, otherwise
+    heuristic segmentation of each page, otherwise the whole document.
+    """
+    # Try 1A outline
+    outline_path = locate_1a_outline(p.stem, collection_dir)
+    if outline_path:
+        outline_obj = load_1a_outline(outline_path)
+    else:
+        outline_obj = None
+
+    secs = []
+    if outline_obj:
+        secs = build_sections_from_outline(p.stem, pages, outline_obj)
+        if secs:
+            dprint(f"{p.name}: using {len(secs)} sections from 1A output.")
+        else:
+            dprint(
+                f"{p.name}: 1A outline exists but returned no sections, falling back to internal logic."
+            )
+
+    if not secs:
+        dprint(f"{p.name}: using internal segmentation logic.")
+        for i, txt in enumerate(pages, 1):
+            segs = segment_text_fallback(txt)
+            for title, body in segs:
+                secs.append(
+                    Section(
+                        document=p.name,
+                        section_title=title,
+                        start_page=i - 1,
+                        end_page=i - 1,
+                        content=body,
+                    )
+                )
+        if not secs:
+            # last fallback: whole doc
+            secs = [
+                Section(
+                    document=p.name,
+                    section_title="Full Document",
+                    start_page=0,
+                    end_page=len(pages) - 1,
+                    content="\n".join(pages),
+                )
+            ]
+
+    return secs
+
+
+@dataclass
+class PreparedCollection:
+    """
+    Query-independent part of a 1B run, built once by prepare_collection
+    and scored per persona/job by score_collection: the sections and the
+    term counts of the pages (the corpus the TF-IDF model is fitted on) and
+    of the preprocessed section texts.
+    """
+    documents: List[Path]
+    sections: List[Section]
+    page_terms: Any  # sorted vocabulary of the page corpus
+    page_counts: Any  # CSR, pages x page_terms
+    section_terms: Any  # sorted vocabulary of the preprocessed sections
+    section_counts: Any  # CSR, sections x section_terms
+    page_index: Dict[str, int] = field(default_factory=dict)  # term -> page_terms position
+    section_index: Dict[str, int] = field(default_factory=dict)
+    section_in_pages: Any = None  # page_terms position of each section term, -1 if absent
+    page_tfs: Any = None  # corpus-wide count of each page term
+    top_sentences: Dict[Tuple[int, int], List[str]] = field(default_factory=dict)
+
+    def __post_init__(self):
+        import numpy as np
+
+        self.page_index = {term: i for i, term in enumerate(self.page_terms)}
+        self.section_index = {term: i for i, term in enumerate(self.section_terms)}
+        self.section_in_pages = np.array(
+            [self.page_index.get(term, -1) for term in self.section_terms], dtype=np.int64
+        )
+        self.page_tfs = np.asarray(self.page_counts.sum(axis=0)).ravel().astype(np.int64)
+
+    def sentences(self, i: int, max_n: int) -> List[str]:
+        """
+        pick_top_sentences for section i, computed once per collection.
+        """
+        key = (i, max_n)
+        if key not in self.top_sentences:
+            self.top_sentences[key] = pick_top_sentences(self.sections[i].content, max_n=max_n)
+        return self.top_sentences[key]
+
+
+def prepare_collection(
+    collection_dir: Path, pdf_filenames: Optional[List[str]] = None
+) -> PreparedCollection:
+    """
+    Extract and segment every PDF of a collection and count the terms of
+    its pages and sections (everything that does not depend on the query).
     pdf_filenames: list from input JSON (recommended). If None, scan PDFs/.
-    Returns Challenge 1B output structure (dict).
     """
     pdf_dir = collection_dir / "PDFs"
     if pdf_filenames:
@@ -555,125 +741,131 @@ def process_collection(
     if not existing:
         raise FileNotFoundError(f"No PDFs found in {pdf_dir}")
 
-    # Pre-build TF-IDF corpus from all doc text to produce consistent feature space.
+    # TF-IDF corpus from all doc text, for a consistent feature space
     corpus_texts = []
-    doc_texts_by_stem: Dict[str, List[str]] = {}
-
+    sections: List[Section] = []
     for p in existing:
         pages = extract_pages_pdf(p)
-        doc_texts_by_stem[p.stem] = pages
         corpus_texts.extend(pages if pages else [""])
+        sections.extend(_document_sections(p, pages, collection_dir))
+
+    page_terms, page_counts = _term_counts(corpus_texts)
+    section_terms, section_counts = _term_counts([preprocess(s.content) for s in sections])
+    return PreparedCollection(
+        documents=existing,
+        sections=sections,
+        page_terms=page_terms,
+        page_counts=page_counts,
+        section_terms=section_terms,
+        section_counts=section_counts,
+    )
+
+
+def _query_model(prepared: PreparedCollection, persona: str, job: str):
+    """
+    (section TF-IDF rows, query row) of the model
+    TfidfVectorizer(max_features, ngram_range).fit(pages + [query]), built
+    from the prepared counts: only the query's own terms are analyzed here.
+    Returns (None, None) when the corpus and query have no terms.
+    """
+    import numpy as np
+    from collections import Counter
+    from scipy import sparse
+    from sklearn.feature_extraction.text import CountVectorizer, TfidfTransformer
+
+    analyzer = CountVectorizer(ngram_range=TFIDF_NGRAM_RANGE).build_analyzer()
+    query_counts = Counter(analyzer(preprocess(f"{persona} {job}")))
+
+    # Vocabulary of pages + query, sorted as CountVectorizer sorts it
+    new_terms = sorted(t for t in query_counts if t not in prepared.page_index)
+    insert_at = np.searchsorted(prepared.page_terms, np.array(new_terms, dtype=object)).astype(np.int64)
+    terms = np.insert(prepared.page_terms, insert_at, np.array(new_terms, dtype=object))
+    if not len(terms):
+        return None, None
+    new_cols = insert_at + np.arange(len(new_terms))
+    page_cols = np.delete(np.arange(len(terms)), new_cols)
+    new_index = dict(zip(new_terms, new_cols.tolist()))
+
+    query_cols = np.array(
+        sorted(
+            int(page_cols[prepared.page_index[t]]) if t in prepared.page_index else new_index[t]
+            for t in query_counts
+        ),
+        dtype=np.int64,
+    )
+    query_values = np.array([query_counts[t] for t in terms[query_cols]], dtype=np.int64)
+
+    # Feature cut as in CountVectorizer._limit_features: the max_features
+    # terms with the highest corpus count (same argsort, so same ties)
+    tfs = np.zeros(len(terms), dtype=np.int64)
+    tfs[page_cols] = prepared.page_tfs
+    tfs[query_cols] += query_values
+    if len(terms) > TFIDF_MAX_FEATURES:
+        kept = np.sort((-tfs).argsort()[:TFIDF_MAX_FEATURES])
+    else:
+        kept = np.arange(len(terms))
+    select = np.full(len(terms), -1, dtype=np.int64)
+    select[kept] = np.arange(len(kept))
+
+    n = len(kept)
+    query_row = _remap_columns(
+        sparse.csr_matrix((query_values, query_cols, [0, len(query_cols)]), shape=(1, len(terms))), select, n
+    )
+    page_rows = _remap_columns(prepared.page_counts, select[page_cols], n)
+    transformer = TfidfTransformer().fit(sparse.vstack([page_rows, query_row], format="csr"))
+
+    # Section terms -> model columns (terms outside pages + query have none)
+    section_cols = np.full(len(prepared.section_terms), -1, dtype=np.int64)
+    in_pages = prepared.section_in_pages >= 0
+    section_cols[in_pages] = select[page_cols[prepared.section_in_pages[in_pages]]]
+    for t in new_terms:
+        if t in prepared.section_index:
+            section_cols[prepared.section_index[t]] = select[new_index[t]]
+    section_rows = _remap_columns(prepared.section_counts, section_cols, n)
+
+    return transformer.transform(section_rows), transformer.transform(query_row)
 
-    # Fit vectorizer
-    persona_job_txt = preprocess(f"{persona} {job}")
-    corpus_for_fit = corpus_texts + [persona_job_txt]
-    tfidf = TfidfVectorizer(max_features=2000, ngram_range=(1, 2))
+
+def score_collection(
+    prepared: PreparedCollection,
+    persona: str,
+    job: str,
+    max_sections: int = 10,
+    max_subsects: int = 3,
+) -> Dict[str, Any]:
+    """
+    Rank the sections of a prepared collection for one persona/job.
+    Returns Challenge 1B output structure (dict).
+    """
     try:
-        matrix = tfidf.fit_transform(corpus_for_fit)
-        query_vec = matrix[-1:]  # last row
+        section_vecs, query_vec = _query_model(prepared, persona, job)
     except Exception as e:
         dprint(f"TF-IDF fit failed: {e}")
-        tfidf = None
-        query_vec = None
+        section_vecs, query_vec = None, None
 
     kw_cache = persona_job_keywords(persona, job)
 
-    # Build sections from each doc
-    all_sections: List[Section] = []
-    for p in existing:
-        pages = doc_texts_by_stem[p.stem]
-        # Try 1A outline
-        outline_path = locate_1a_outline(p.stem, collection_dir)
-        if outline_path:
-            outline_obj = load_1a_outline(outline_path)
-        else:
-            outline_obj = None
-
-        secs = []
-        if outline_obj:
-            secs = build_sections_from_outline(p.stem, pages, outline_obj)
-            if secs:
-                dprint(f"{p.name}: using {len(secs)} sections from 1A output.")
-            else:
-                dprint(
-                    f"{p.name}: 1A outline exists but returned no sections, falling back to internal logic."
-                )
-
-        if not secs:
-            dprint(f"{p.name}: using internal segmentation logic.")
-            for i, txt in enumerate(pages, 1):
-                segs = segment_text_fallback(txt)
-                for title, body in segs:
-                    secs.append(
-                        Section(
-                            document=p.name,
-                            section_title=title,
-                            start_page=i - 1,
-                            end_page=i - 1,
-                            content=body,
-                        )
-                    )
-            if not secs:
-                # last fallback: whole doc
-                secs = [
-                    Section(
-                        document=p.name,
-                        section_title="Full Document",
-                        start_page=0,
-                        end_page=len(pages) - 1,
-                        content="\n".join(pages),
-                    )
-                ]
-
-        if not secs:
-            # fallback: run segmentation over concatenated page text or page by page?
-            # We'll segment each page, prefix doc stem
-            secs = []
-            for i, txt in enumerate(pages, 1):
-                segs = segment_text_fallback(txt)
-                for title, body in segs:
-                    secs.append(
-                        Section(
-                            document=p.name,
-                            section_title=title,
-                            start_page=i - 1,
-                            end_page=i - 1,
-                            content=body,
-                        )
-                    )
-            if not secs:
-                # last fallback: treat whole doc as single section
-                secs = [
-                    Section(
-                        document=p.name,
-                        section_title="Full Document",
-                        start_page=0,
-                        end_page=len(pages) - 1,
-                        content="\n".join(pages),
-                    )
-                ]
-
-        # Score
-        for s in secs:
-            s.relevance = score_section(
-                sec_text=s.content,
-                persona=persona,
-                job=job,
-                kw_cache=kw_cache,
-                tfidf_vectorizer=tfidf,
-                query_vec=query_vec,
-            )
-        all_sections.extend(secs)
+    # Score every section of the collection in one batch
+    scores = score_sections(
+        [s.content for s in prepared.sections],
+        persona=persona,
+        job=job,
+        kw_cache=kw_cache,
+        query_vec=query_vec,
+        section_vecs=section_vecs,
+    )
+    relevance = [float(score) for score in scores]
 
-    # Rank across entire collection
-    all_sections.sort(key=lambda s: s.relevance, reverse=True)
+    # Rank across entire collection (stable: ties keep document order)
+    ranked = sorted(range(len(relevance)), key=lambda i: relevance[i], reverse=True)
 
     # Take top-N
-    top = all_sections[:max_sections]
+    top = ranked[:max_sections]
 
     # Build extracted_sections list
     extracted_sections = []
-    for rank, sec in enumerate(top, 1):
+    for rank, i in enumerate(top, 1):
+        sec = prepared.sections[i]
         # pick representative page to report: start_page (consistent)
         extracted_sections.append(
             {
@@ -686,8 +878,9 @@ def process_collection(
 
     # Subsection extraction
     subsection_analysis = []
-    for rank, sec in enumerate(top, 1):
-        subs = pick_top_sentences(sec.content, max_n=max_subsects)
+    for rank, i in enumerate(top, 1):
+        sec = prepared.sections[i]
+        subs = prepared.sentences(i, max_subsects)
         for j, sent in enumerate(subs, 1):
             subsection_analysis.append(
                 {
@@ -700,7 +893,7 @@ def process_collection(
 
     # Assemble metadata
     metadata = {
-        "input_documents": [p.name for p in existing],
+        "input_documents": [p.name for p in prepared.documents],
         "persona": persona,
         "job_to_be_done": job,
         "processing_timestamp": datetime.utcnow().isoformat() + "Z",
@@ -714,6 +907,23 @@ def process_collection(
     }
 
 
+def process_collection(
+    collection_dir: Path,
+    persona: str,
+    job: str,
+    pdf_filenames: Optional[List[str]] = None,
+    max_sections: int = 10,
+    max_subsects: int = 3,
+) -> Dict[str, Any]:
+    """
+    Process all PDFs in a single collection directory.
+    pdf_filenames: list from input JSON (recommended). If None, scan PDFs/.
+    Returns Challenge 1B output structure (dict).
+    """
+    prepared = prepare_collection(collection_dir, pdf_filenames)
+    return score_collection(prepared, persona, job, max_sections, max_subsects)
+
+
 # Load collection input JSON
 
 
@@ -751,9 +961,68 @@ def load_collection_config(
     return challenge_info, pdf_filenames, persona_role, job_task
 
 
+# Load persona/job query list (multi-query mode)
+
+
+def load_queries(path: Path) -> List[Dict[str, str]]:
+    """
+    Reads a JSON list of queries, each {"persona": ..., "job": ...} or in
+    the challenge1b_input.json form ({"persona": {"role"}, "job_to_be_done":
+    {"task"}}), with an optional "name" used as the output subdirectory.
+    Returns [{"name", "persona", "job"}] (missing fields -> safe defaults).
+    """
+    with Path(path).open("r", encoding="utf-8") as f:
+        items = json.load(f)
+    if not isinstance(items, list):
+        raise ValueError(f"{path}: expected a JSON list of persona/job queries")
+
+    queries = []
+    for i, item in enumerate(items, 1):
+        persona = item.get("persona", "General Analyst")
+        if isinstance(persona, dict):
+            persona = persona.get("role", "General Analyst")
+        job = item.get("job", item.get("job_to_be_done", "Analyze the provided documents"))
+        if isinstance(job, dict):
+            job = job.get("task", "Analyze the provided documents")
+        name = re.sub(r"[^\w.-]+", "_", str(item.get("name") or f"query_{i:02d}")).strip("._")
+        queries.append({"name": name or f"query_{i:02d}", "persona": persona, "job": job})
+    return queries
+
+
 # Driver
 
 
+def _error_result(
+    challenge_info: Dict[str, Any], persona: str, job: str, error: Exception
+) -> Dict[str, Any]:
+    return {
+        "metadata": {
+            "challenge_id": challenge_info.get("challenge_id", "unknown"),
+            "test_case_name": challenge_info.get("test_case_name", "unknown"),
+            "persona": persona,
+            "job_to_be_done": job,
+            "processing_timestamp": datetime.utcnow().isoformat() + "Z",
+            "error": str(error),
+        },
+        "extracted_sections": [],
+        "subsection_analysis": [],
+    }
+
+
+def _write_result(result: Dict[str, Any], out_path: Path, label: str) -> Optional[Path]:
+    try:
+        with out_path.open("w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2, ensure_ascii=False)
+        print(
+            f"[Collection] {label} -> {out_path.name} ({len(result['extracted_sections'])} sections)."
+        )
+    except Exception as e:
+        print(f"[Collection] Failed to write {out_path}: {e}")
+        return None
+
+    return out_path
+
+
 def run_for_collection(
     collection_dir: Path, max_sections: int, max_subsects: int
 ) -> Optional[Path]:
@@ -786,33 +1055,60 @@ def run_for_collection(
 
     except Exception as e:
         dprint(f"Collection processing failed: {e}")
-        result = {
-            "metadata": {
-                "challenge_id": challenge_info.get("challenge_id", "unknown"),
-                "test_case_name": challenge_info.get("test_case_name", "unknown"),
-                "persona": persona_role,
-                "job_to_be_done": job_task,
-                "processing_timestamp": datetime.utcnow().isoformat() + "Z",
-                "error": str(e),
-            },
-            "extracted_sections": [],
-            "subsection_analysis": [],
-        }
+        result = _error_result(challenge_info, persona_role, job_task, e)
 
     OUTPUT_DIR = Path(os.getenv("OUTPUT_DIR", collection_dir))
-    out_path = OUTPUT_DIR / "challenge1b_output.json"
+    return _write_result(result, OUTPUT_DIR / "challenge1b_output.json", collection_dir.name)
+
+
+def run_queries_for_collection(
+    collection_dir: Path,
+    queries: List[Dict[str, str]],
+    max_sections: int,
+    max_subsects: int,
+) -> List[Optional[Path]]:
+    """
+    Run pipeline for many persona/job queries over one collection: PDFs are
+    extracted and segmented once, then each query is scored and written to
+    <output dir>/<query name>/challenge1b_output.json.
+    processing_time_seconds is the query's own scoring time; the one-off
+    extraction time is reported as shared_preparation_seconds.
+    Returns output paths (None on write failure), in query order.
+    """
+    challenge_info, pdf_list, _, _ = load_collection_config(collection_dir)
 
+    t0 = time.time()
+    prepared, prepare_error = None, None
     try:
-        with out_path.open("w", encoding="utf-8") as f:
-            json.dump(result, f, indent=2, ensure_ascii=False)
-        print(
-            f"[Collection] {collection_dir.name} -> {out_path.name} ({len(result['extracted_sections'])} sections)."
-        )
+        prepared = prepare_collection(collection_dir, pdf_list)
     except Exception as e:
-        print(f"[Collection] Failed to write {out_path}: {e}")
-        return None
+        dprint(f"Collection processing failed: {e}")
+        prepare_error = e
+    shared = round(time.time() - t0, 2)
 
-    return out_path
+    OUTPUT_DIR = Path(os.getenv("OUTPUT_DIR", collection_dir))
+    out_paths = []
+    for q in queries:
+        t1 = time.time()
+        try:
+            if prepared is None:
+                raise prepare_error
+            result = score_collection(prepared, q["persona"], q["job"], max_sections, max_subsects)
+            result["metadata"]["processing_time_seconds"] = round(time.time() - t1, 2)
+            result["metadata"]["shared_preparation_seconds"] = shared
+            result["metadata"]["challenge_id"] = challenge_info.get("challenge_id", "unknown")
+            result["metadata"]["test_case_name"] = challenge_info.get("test_case_name", "unknown")
+        except Exception as e:
+            dprint(f"Query {q['name']} failed: {e}")
+            result = _error_result(challenge_info, q["persona"], q["job"], e)
+
+        out_dir = OUTPUT_DIR / q["name"]
+        out_dir.mkdir(parents=True, exist_ok=True)
+        out_paths.append(
+            _write_result(result, out_dir / "challenge1b_output.json", f"{collection_dir.name}/{q['name']}")
+        )
+
+    return out_paths
 
 
 # ... (all your original imports and previous code remain the same)
@@ -862,6 +1158,12 @@ def main():
         default=int(os.getenv("TECHVERSE_MAX_SUBSECTS", "3")),
         help="Max sentences per section in subsection_analysis.",
     )
+    parser.add_argument(
+        "--queries",
+        type=str,
+        help="JSON list of persona/job queries: extract each collection once and write "
+        "<name>/challenge1b_output.json per query (default: the query in challenge1b_input.json).",
+    )
     args = parser.parse_args()
 
     root = Path(args.root).resolve()
@@ -877,8 +1179,24 @@ def main():
             print(f"No valid collection directories found under {root}")
             sys.exit(1)
 
+    queries = None
+    if args.queries:
+        try:
+            queries = load_queries(Path(args.queries))
+        except Exception as e:
+            print(f"Failed to load queries from {args.queries}: {e}")
+            sys.exit(1)
+
     print(f"Processing {len(cols)} collection(s)...")
     for c in cols:
+        if queries:
+            run_queries_for_collection(
+                collection_dir=c,
+                queries=queries,
+                max_sections=args.max_sections,
+                max_subsects=args.max_subsects,
+            )
+            continue
         run_for_collection(
             collection_dir=c,
             max_sections=args.max_sections,
@@ -899,11 +1217,20 @@ def create_1b_input_json(collection_path, persona, job, pdf_filenames):
         json.dump(input_data, f, indent=2)
     return input_path
 
-def analyze_collection_1b(session_id, persona, job, recommendation_engine):
+def analyze_collection_1b(session_id, persona, job, recommendation_engine=None, parsed_docs=None, documents=None):
     """
     Analyze a collection of PDFs in the current session.
     Always saves output_1b.json, even if docs are empty.
+    parsed_docs: optional {filepath: ParsedDocument} already built for this
+    request; files not in it are parsed here.
+    documents: optional copy of the session's document records, so callers
+    can read them under their engine lock and run 1B without holding it;
+    defaults to recommendation_engine.get_documents_for_session(session_id).
     """
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    from app.utils.parsed_document import ParsedDocument
+
+    parsed_docs = parsed_docs or {}
     output_dir = Path(__file__).resolve().parent.parent / "static" / "outputs" / session_id
     output_dir.mkdir(parents=True, exist_ok=True)
     output_file = output_dir / "output_1b.json"
@@ -911,18 +1238,19 @@ def analyze_collection_1b(session_id, persona, job, recommendation_engine):
     docs_text = []
     doc_titles = []
 
-    for doc_id, doc in recommendation_engine.documents.items():
-        if doc.get("session_id") != session_id:
-            continue
-        file_path = doc.get("file")
+    if documents is None:
+        documents = recommendation_engine.get_documents_for_session(session_id)
+
+    for doc in documents:
+        file_path = doc.get("filepath")
         if not file_path or not os.path.isfile(file_path):
             continue
         try:
-            with open(file_path, "rb") as f:
-                content = f.read().decode("utf-8", errors="ignore")
-                if content.strip():
-                    docs_text.append(content)
-                    doc_titles.append(doc.get("title", "Untitled"))
+            parsed = parsed_docs.get(file_path) or ParsedDocument.from_pdf(file_path)
+            content = parsed.text
+            if content.strip():
+                docs_text.append(content)
+                doc_titles.append(doc.get("title", "Untitled"))
         except Exception as e:
             print(f"[1B ERROR] Failed to read {file_path}: {e}")
 
@@ -0,0 +1,422 @@
+# File: app/utils/index_store.py
+
+import os
+import json
+import time
+import shutil
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process writer lock
+    fcntl = None
+
+DEFAULT_INDEX_DIR = Path(__file__).resolve().parent.parent / "cache" / "index"
+FORMAT_VERSION = 1
+
+
+def _fsync_dir(path: Path) -> None:
+    try:
+        fd = os.open(str(path), os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def _write_json(path: Path, value) -> None:
+    # json.dumps uses the C encoder; json.dump would stream through the pure-Python one
+    data = json.dumps(value, ensure_ascii=False)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+
+
+class IndexStore:
+    def __init__(self, root, snapshot_every: int = 500, snapshot_interval: float = 300.0,
+                 keep: Optional[int] = None,
+                 shared: bool = False):
+        """
+        On-disk persistence for a RecommendationEngine.
+
+        Layout under root:
+          v00000003/          one snapshot: *.npy arrays (memory-mappable),
+                              meta.json (doc order, vocabulary) and
+                              documents.json (document records)
+          CURRENT             name of the latest complete snapshot
+          changes-v00000003.log
+                              append-only JSON lines of changes made after
+                              that snapshot; replayed on load
+          v00000004/PARENT    present when v00000004 is exactly v00000003
+                              plus its whole change log
+
+        A new snapshot is written every snapshot_every logged changes or, when
+        changes are pending, once snapshot_interval seconds have passed. The
+        last `keep` snapshots (and their logs) are retained: 2 by default, 8 in
+        shared mode, where a reader that is a few versions behind catches up
+        from the logs.
+
+        With shared=True several server processes use the same root and the
+        change log is what they publish through: a mutation runs inside
+        exclusive(), which holds WRITER.lock, catches up to the latest change,
+        and logs its own entries (publishing costs one fsynced append;
+        snapshots follow the policy above). Every other process calls
+        refresh() before reading: it applies only the log entries written
+        since its last refresh, following the logs across snapshots, and
+        reloads a snapshot only when it fell behind the retained logs.
+        """
+        self.root = Path(root)
+        self.snapshot_every = snapshot_every
+        self.snapshot_interval = snapshot_interval
+        self.keep = max(1, keep if keep is not None else (8 if shared else 2))
+        self.shared = shared
+        self.version = 0
+        self.pending = 0  # log entries of the current version applied to the engine
+        self.offset = 0  # bytes of the current version's log applied to the engine
+        self.last_snapshot_at = time.time()
+        self.engine = None
+        self._log = None
+        self._lock = threading.RLock()
+
+    # ---------------------- PATHS ----------------------
+
+    @staticmethod
+    def _name(version: int) -> str:
+        return f"v{version:08d}"
+
+    def _snapshot_dir(self, version: int) -> Path:
+        return self.root / self._name(version)
+
+    def _log_path(self, version: int) -> Path:
+        return self.root / f"changes-{self._name(version)}.log"
+
+    def current_version(self) -> int:
+        """
+        Version named by CURRENT (0 when no snapshot was written yet).
+        """
+        try:
+            name = (self.root / "CURRENT").read_text(encoding="utf-8").strip()
+            return int(name.lstrip("v"))
+        except (OSError, ValueError):
+            return 0
+
+    # ---------------------- SNAPSHOTS ----------------------
+
+    def save(self, engine, version: Optional[int] = None, from_log: bool = False) -> int:
+        """
+        Write a snapshot of engine as a new version and point CURRENT at it.
+        Returns the version number.
+
+        from_log=True states that engine is exactly the current version plus
+        its whole change log, so readers may cross to the new version by
+        replaying that log instead of loading the snapshot.
+        """
+        with self._lock:
+            self.root.mkdir(parents=True, exist_ok=True)
+            version = version if version is not None else max(self.version, self.current_version()) + 1
+            final_dir = self._snapshot_dir(version)
+            tmp_dir = self.root / f".tmp-{self._name(version)}-{os.getpid()}"
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            tmp_dir.mkdir()
+
+            arrays, meta = engine.export_state()
+            for name, array in arrays.items():
+                with open(tmp_dir / f"{name}.npy", "wb") as f:
+                    np.save(f, np.ascontiguousarray(array))
+                    f.flush()
+                    os.fsync(f.fileno())
+            meta["format"] = FORMAT_VERSION
+            meta["version"] = version
+            meta["created_at"] = time.time()
+            _write_json(tmp_dir / "documents.json", engine.documents)
+            _write_json(tmp_dir / "meta.json", meta)
+            if from_log and version == self.version + 1:
+                _write_json(tmp_dir / "PARENT", self.version)
+            _fsync_dir(tmp_dir)
+
+            shutil.rmtree(final_dir, ignore_errors=True)
+            os.replace(tmp_dir, final_dir)
+            current_tmp = self.root / f".CURRENT.{os.getpid()}.tmp"
+            current_tmp.write_text(self._name(version), encoding="utf-8")
+            os.replace(current_tmp, self.root / "CURRENT")
+            _fsync_dir(self.root)
+
+            # Later changes go to the log that belongs to the new snapshot
+            self._close_log()
+            self.version = version
+            self.pending = 0
+            self.offset = 0
+            self.last_snapshot_at = time.time()
+            self._prune()
+            return version
+
+    def _prune(self) -> None:
+        # Retained versions keep their snapshot and log; a version's log also
+        # takes it to the next one, which lets refresh() advance readers cheaply
+        oldest = max(0, self.version - self.keep + 1)
+        keep = {self._name(v) for v in range(oldest, self.version + 1)}
+        for path in self.root.glob("v*"):
+            if path.is_dir() and path.name not in keep:
+                shutil.rmtree(path, ignore_errors=True)
+        for path in self.root.glob("changes-v*.log"):
+            try:
+                if int(path.stem[len("changes-v"):]) < oldest:
+                    path.unlink()
+            except (OSError, ValueError):
+                pass
+
+    def load(self, engine, mmap: bool = True) -> int:
+        """
+        Restore engine from CURRENT plus its change log. With mmap the
+        snapshot arrays are mapped read-only instead of read into memory.
+        Returns the number of log entries replayed.
+        """
+        with self._lock:
+            version = self.current_version()
+            meta = None
+            if version:
+                arrays, meta = self._read_arrays(version, mmap)
+                engine.restore(self._read_documents(version), arrays, meta)
+            return self._enter_version(engine, version, meta)
+
+    def _read_meta(self, version: int) -> Dict:
+        with open(self._snapshot_dir(version) / "meta.json", "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def _read_arrays(self, version: int, mmap: bool = True):
+        snap_dir = self._snapshot_dir(version)
+        meta = self._read_meta(version)
+        arrays = {
+            path.stem: np.load(path, mmap_mode="r" if mmap else None)
+            for path in snap_dir.glob("*.npy")
+        }
+        return arrays, meta
+
+    def _read_documents(self, version: int) -> Dict[str, Dict]:
+        with open(self._snapshot_dir(version) / "documents.json", "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def _enter_version(self, engine, version: int, meta: Optional[Dict]) -> int:
+        """
+        Make version current after engine was restored from its snapshot,
+        replaying the log entries already written after it.
+        """
+        self._close_log()
+        self.version = version
+        entries, self.offset = self._read_entries(version)
+        for entry in entries:
+            engine.apply_change(entry)
+        self.pending = len(entries)
+        self.last_snapshot_at = time.time()
+        return len(entries)
+
+    # ---------------------- SHARED MODE ----------------------
+
+    def has_updates(self) -> bool:
+        """
+        True when another process published changes this one has not
+        applied (a file read and a stat; safe to call without any lock).
+        """
+        if self.current_version() != self.version:
+            return True
+        try:
+            return os.path.getsize(self._log_path(self.version)) > self.offset
+        except OSError:
+            return False
+
+    def refresh(self, engine) -> bool:
+        """
+        Apply the changes other processes published since the last refresh.
+        Entries are read from the logs from where this process stopped, also
+        across snapshots written in between (whose PARENT says they continue
+        the log); only a process that fell behind the retained logs reloads
+        the newest snapshot. Cheap when nothing changed (one small file read).
+        Returns True when the engine changed.
+        """
+        with self._lock:
+            latest = self.current_version()
+            try:
+                applied = self._catch_up(engine, latest)
+            except (OSError, ValueError) as e:
+                print(f"[Index Store] Replaying changes up to {self._name(latest)} failed: {e}")
+                applied = None
+            if applied is None:
+                self.load(engine)
+                return True
+            return applied > 0
+
+    def _catch_up(self, engine, latest: int) -> Optional[int]:
+        """
+        Replay log entries up to the end of version latest's log. Returns the
+        number applied, or None when the logs cannot take the engine there.
+        """
+        if latest < self.version:
+            return None
+        applied = 0
+        while True:
+            # Only the newest version may have no log yet; an older one without
+            # its log was pruned and cannot be replayed
+            entries, self.offset = self._read_entries(self.version, self.offset, missing_ok=self.version == latest)
+            for entry in entries:
+                engine.apply_change(entry)
+            self.pending += len(entries)
+            applied += len(entries)
+            if self.version == latest:
+                return applied
+            # CURRENT moved past this version, so its log is complete
+            step = self.version + 1
+            if not (self._snapshot_dir(step) / "PARENT").exists():
+                return None
+            self._close_log()
+            self.version = step
+            self.pending = 0
+            self.offset = 0
+            self.last_snapshot_at = time.time()
+
+    @contextmanager
+    def exclusive(self, engine):
+        """
+        Hold the cross-process writer lock, with engine caught up to the
+        newest version, for the duration of a mutation.
+        """
+        self.root.mkdir(parents=True, exist_ok=True)
+        with open(self.root / "WRITER.lock", "a+") as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            try:
+                self.refresh(engine)
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+    # ---------------------- CHANGE LOG ----------------------
+
+    def _read_log(self, version: int) -> Iterator[Dict]:
+        yield from self._read_entries(version)[0]
+
+    def _read_entries(self, version: int, offset: int = 0, missing_ok: bool = True) -> Tuple[List[Dict], int]:
+        """
+        Complete entries of version's log from byte offset on, and the offset
+        just past the last one. A line still being appended (no newline yet)
+        is left for the next read.
+        """
+        path = self._log_path(version)
+        try:
+            with open(path, "rb") as f:
+                f.seek(offset)
+                data = f.read()
+        except FileNotFoundError:
+            if not missing_ok:
+                raise
+            return [], offset
+        entries = []
+        for line in data[:data.rfind(b"\n") + 1].split(b"\n")[:-1]:
+            try:
+                entries.append(json.loads(line))
+            except ValueError:
+                # A torn line from a crash mid-append; stop there
+                print(f"[Index Store] Ignoring truncated change log entry in {path.name}")
+                break
+            offset += len(line) + 1
+        return entries, offset
+
+    def _close_log(self) -> None:
+        if self._log is not None:
+            self._log.close()
+            self._log = None
+
+    def append(self, entries: List[Dict]) -> None:
+        """
+        Durably append change entries, then snapshot if one is due.
+        """
+        if not entries:
+            return
+        with self._lock:
+            if self._log is None:
+                self.root.mkdir(parents=True, exist_ok=True)
+                self._log = open(self._log_path(self.version), "ab")
+            if self._log.seek(0, os.SEEK_END) > self.offset:
+                # A writer that crashed mid-append left a partial entry past
+                # what this process applied; cut it off so the next entry is
+                # not glued to it
+                self._log.truncate(self.offset)
+            self._log.write("".join(json.dumps(e, ensure_ascii=False) + "\n" for e in entries).encode("utf-8"))
+            self._log.flush()
+            os.fsync(self._log.fileno())
+            self.pending += len(entries)
+            # In shared mode exclusive() caught this process up to the end of
+            # the log first, so its own entries are the only new bytes
+            self.offset = self._log.tell()
+
+            if self.engine is None:
+                return
+            try:
+                if self.pending >= self.snapshot_every or (
+                    time.time() - self.last_snapshot_at >= self.snapshot_interval
+                ):
+                    self.save(self.engine, from_log=True)
+            except (OSError, ValueError) as e:
+                print(f"[Index Store] Snapshot failed, keeping change log: {e}")
+
+    # ---------------------- ENGINE WIRING ----------------------
+
+    def attach(self, engine) -> int:
+        """
+        Load persisted state into engine and log its future changes here.
+        Returns the number of documents restored.
+        """
+        with self._lock:
+            self.load(engine)
+            self.engine = engine
+            engine.store = self
+            return len(engine.documents)
+
+    def close(self) -> None:
+        with self._lock:
+            self._close_log()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "version": self.version,
+                "pending_changes": self.pending,
+                "log_offset": self.offset,
+                "last_snapshot_at": self.last_snapshot_at,
+                "shared": self.shared,
+                "root": str(self.root),
+            }
+
+
+def index_store_from_env() -> Optional[IndexStore]:
+    """
+    IndexStore configured from the environment, or None when disabled:
+      TECHVERSE_PERSIST=0            keep the library in memory only
+      TECHVERSE_INDEX_DIR            storage directory (default app/cache/index)
+      TECHVERSE_SNAPSHOT_EVERY       changes between snapshots (default 500)
+      TECHVERSE_SNAPSHOT_INTERVAL    max seconds between snapshots (default 300)
+      TECHVERSE_SHARED_INDEX=1       several worker processes share the directory
+      TECHVERSE_SNAPSHOT_KEEP        snapshots retained (default 2, shared 8)
+    """
+    shared = os.getenv("TECHVERSE_SHARED_INDEX", "0") == "1"
+    if os.getenv("TECHVERSE_PERSIST", "1") == "0":
+        if shared:
+            print("[Index Store] TECHVERSE_SHARED_INDEX needs persistence; workers will not share an index")
+        return None
+    return IndexStore(
+        os.getenv("TECHVERSE_INDEX_DIR") or DEFAULT_INDEX_DIR,
+        snapshot_every=max(1, int(os.getenv("TECHVERSE_SNAPSHOT_EVERY", "500"))),
+        snapshot_interval=float(os.getenv("TECHVERSE_SNAPSHOT_INTERVAL", "300")),
+        keep=int(os.environ["TECHVERSE_SNAPSHOT_KEEP"]) if os.getenv("TECHVERSE_SNAPSHOT_KEEP") else None,
+        shared=shared,
+    )
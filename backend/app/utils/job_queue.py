@@ -0,0 +1,243 @@
+# File: app/utils/job_queue.py
+
+import os
+import json
+import time
+import uuid
+import threading
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+
+class Job:
+    def __init__(self, job_id: str, filenames: List[str], meta: Optional[Dict] = None):
+        """
+        State of one background job: overall status, per-file progress and the
+        final result payload. Updated by the worker thread, read by pollers.
+        """
+        self.id = job_id
+        self.meta = dict(meta or {})
+        self.status = QUEUED
+        self.error = None
+        self.result = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.files = {name: {"status": QUEUED, "error": None, "elapsed_seconds": None} for name in filenames}
+        self.state_path: Optional[Path] = None  # set when other processes poll this job
+        self._file_started = {}
+        self._lock = threading.Lock()
+
+    # ---------------------- PROGRESS (worker side) ----------------------
+
+    def file_started(self, name: str) -> None:
+        with self._lock:
+            self.files.setdefault(name, {"status": QUEUED, "error": None, "elapsed_seconds": None})
+            self.files[name]["status"] = RUNNING
+            self._file_started[name] = time.time()
+        self.persist()
+
+    def file_done(self, name: str) -> None:
+        self._file_finished(name, DONE, None)
+
+    def file_failed(self, name: str, error: str) -> None:
+        self._file_finished(name, FAILED, error)
+
+    def _file_finished(self, name: str, status: str, error: Optional[str]) -> None:
+        with self._lock:
+            entry = self.files.setdefault(name, {"status": QUEUED, "error": None, "elapsed_seconds": None})
+            entry["status"] = status
+            entry["error"] = error
+            started = self._file_started.pop(name, None)
+            if started is not None:
+                entry["elapsed_seconds"] = round(time.time() - started, 3)
+        self.persist()
+
+    # ---------------------- SHARED STATE ----------------------
+
+    def persist(self) -> None:
+        """
+        Write status and result to state_path (atomically) so a server
+        process other than the one running the job can answer polls.
+        """
+        if self.state_path is None:
+            return
+        state = {
+            "job": self.to_dict(),
+            "meta": self.meta,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "result": self.result,
+        }
+        tmp = self.state_path.with_name(f".{self.state_path.name}.{os.getpid()}.{threading.get_ident()}")
+        try:
+            tmp.write_text(json.dumps(state, ensure_ascii=False), encoding="utf-8")
+            os.replace(tmp, self.state_path)
+        except (OSError, TypeError, ValueError) as e:
+            print(f"[Job Queue] Could not persist job {self.id}: {e}")
+
+    @classmethod
+    def from_state(cls, state: Dict) -> "Job":
+        """
+        Read-only Job rebuilt from a persisted state file.
+        """
+        data = state["job"]
+        job = cls(data["job_id"], [], state.get("meta"))
+        job.status = data["status"]
+        job.error = data["error"]
+        job.result = state.get("result")
+        job.created_at = data["created_at"]
+        job.started_at = state.get("started_at")
+        job.finished_at = state.get("finished_at")
+        job.files = {
+            entry["filename"]: {k: v for k, v in entry.items() if k != "filename"}
+            for entry in data["files"]
+        }
+        return job
+
+    # ---------------------- STATUS (poller side) ----------------------
+
+    @property
+    def finished(self) -> bool:
+        return self.status in (DONE, FAILED)
+
+    def elapsed_seconds(self) -> float:
+        if self.started_at is None:
+            return 0.0
+        end = self.finished_at or time.time()
+        return round(end - self.started_at, 3)
+
+    def to_dict(self) -> Dict:
+        with self._lock:
+            files = [{"filename": name, **entry} for name, entry in self.files.items()]
+        counts = {status: 0 for status in (QUEUED, RUNNING, DONE, FAILED)}
+        for entry in files:
+            counts[entry["status"]] += 1
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "error": self.error,
+            **self.meta,
+            "progress": {
+                "total": len(files),
+                "done": counts[DONE],
+                "failed": counts[FAILED],
+                "pending": counts[QUEUED] + counts[RUNNING],
+            },
+            "files": files,
+            "created_at": self.created_at,
+            "elapsed_seconds": self.elapsed_seconds(),
+        }
+
+
+class JobQueue:
+    def __init__(self, max_workers: int = 2, ttl_seconds: float = 3600, state_dir=None):
+        """
+        Local worker pool for long-running request work. Jobs run on threads so
+        they share the process's in-memory state (e.g. the recommendation
+        engine); finished jobs are kept for ttl_seconds so clients can fetch
+        their results, then dropped.
+
+        With state_dir, job state is also written there so that any server
+        process sharing the directory can answer status and result polls.
+        """
+        self.max_workers = max_workers
+        self.ttl_seconds = ttl_seconds
+        self.state_dir = Path(state_dir) if state_dir else None
+        if self.state_dir is not None:
+            self.state_dir.mkdir(parents=True, exist_ok=True)
+        self._jobs: Dict[str, Job] = {}
+        self._lock = threading.Lock()
+        self._executor = None
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.max_workers, thread_name_prefix="techverse-job"
+                    )
+        return self._executor
+
+    def submit(self, fn: Callable, filenames: List[str], meta: Optional[Dict] = None, **kwargs) -> Job:
+        """
+        Queue fn(job, **kwargs) and return its Job immediately. fn reports
+        per-file progress through the job and returns the result payload.
+        """
+        self._prune()
+        job = Job(str(uuid.uuid4()), filenames, meta)
+        if self.state_dir is not None:
+            job.state_path = self.state_dir / f"{job.id}.json"
+            job.persist()
+        with self._lock:
+            self._jobs[job.id] = job
+        self._get_executor().submit(self._run, job, fn, kwargs)
+        return job
+
+    def _run(self, job: Job, fn: Callable, kwargs: Dict) -> None:
+        job.status = RUNNING
+        job.started_at = time.time()
+        job.persist()
+        try:
+            job.result = fn(job, **kwargs)
+            job.status = DONE
+        except Exception as e:
+            job.error = str(e)
+            job.status = FAILED
+            print(f"[Job Queue] Job {job.id} failed: {e}")
+        finally:
+            job.finished_at = time.time()
+            job.persist()
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is None and self.state_dir is not None:
+            job = self._load(job_id)
+        return job
+
+    def _load(self, job_id: str) -> Optional[Job]:
+        try:
+            uuid.UUID(job_id)  # never build paths from arbitrary input
+            with open(self.state_dir / f"{job_id}.json", "r", encoding="utf-8") as f:
+                return Job.from_state(json.load(f))
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def _prune(self) -> None:
+        cutoff = time.time() - self.ttl_seconds
+        with self._lock:
+            expired = [
+                job_id for job_id, job in self._jobs.items()
+                if job.finished and job.finished_at < cutoff
+            ]
+            for job_id in expired:
+                del self._jobs[job_id]
+        if self.state_dir is not None:
+            for path in self.state_dir.glob("*.json"):
+                try:
+                    if path.stat().st_mtime < cutoff:
+                        path.unlink()
+                except OSError:
+                    pass
+
+
+def job_queue_from_env(state_dir=None) -> JobQueue:
+    """
+    Build a JobQueue configured from the environment:
+      TECHVERSE_JOB_WORKERS     concurrent jobs (default 2)
+      TECHVERSE_JOB_TTL         seconds finished jobs stay queryable (default 3600)
+      TECHVERSE_JOB_DIR         shared job state directory (default state_dir;
+                                needed when several worker processes serve the API)
+    """
+    return JobQueue(
+        max_workers=max(1, int(os.getenv("TECHVERSE_JOB_WORKERS", "2"))),
+        ttl_seconds=float(os.getenv("TECHVERSE_JOB_TTL", "3600")),
+        state_dir=os.getenv("TECHVERSE_JOB_DIR") or state_dir,
+    )
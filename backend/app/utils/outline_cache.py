@@ -0,0 +1,172 @@
+# File: app/utils/outline_cache.py
+
+import os
+import json
+import hashlib
+import threading
+from pathlib import Path
+from typing import Dict, Optional
+
+DEFAULT_CACHE_DIR = Path(__file__).resolve().parent.parent / "cache" / "outlines"
+
+
+def file_sha256(path, chunk_size: int = 1 << 20) -> str:
+    """
+    SHA-256 of a file's bytes, read in chunks.
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def make_cache_key(content_hash: str, config: Dict) -> str:
+    """
+    Combine the document hash with the extractor configuration so a change in
+    flags, thresholds or code produces a different key.
+    """
+    blob = json.dumps(config, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(f"{content_hash}:{blob}".encode("utf-8")).hexdigest()
+
+
+class OutlineCache:
+    def __init__(self, root, max_bytes: int = 256 * 1024 * 1024):
+        """
+        Content-addressed on-disk store for extraction results (one JSON file
+        per key). Reads touch the file's mtime, and once the store grows past
+        max_bytes the least recently used entries are deleted.
+        """
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.evictions = 0
+        self._size = None  # bytes on disk, computed lazily
+        self._lock = threading.Lock()
+
+    def _path(self, key: str) -> Path:
+        return self.root / key[:2] / f"{key}.json"
+
+    def _entries(self):
+        for path in self.root.glob("*/*.json"):
+            try:
+                st = path.stat()
+            except OSError:
+                continue
+            yield st.st_mtime, st.st_size, path
+
+    def get(self, key: str) -> Optional[Dict]:
+        """
+        Return the cached value for key, or None on a miss.
+        """
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                value = json.load(f)
+        except (OSError, ValueError):
+            with self._lock:
+                self.misses += 1
+            return None
+
+        try:
+            os.utime(path, None)  # mark as recently used
+        except OSError:
+            pass
+        with self._lock:
+            self.hits += 1
+        return value
+
+    def put(self, key: str, value: Dict) -> None:
+        """
+        Store value under key (atomic replace), evicting old entries if needed.
+        """
+        path = self._path(key)
+        data = json.dumps(value, ensure_ascii=False).encode("utf-8")
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+            with open(tmp, "wb") as f:
+                f.write(data)
+            try:
+                old_size = path.stat().st_size  # overwritten entry no longer counts
+            except OSError:
+                old_size = 0
+            os.replace(tmp, path)
+        except OSError as e:
+            print(f"[Outline Cache] Failed to write {path}: {e}")
+            return
+
+        with self._lock:
+            self.writes += 1
+            if self._size is None:
+                self._size = sum(size for _, size, _ in self._entries())
+            else:
+                self._size += len(data) - old_size
+            if self._size > self.max_bytes:
+                self._evict()
+
+    def _evict(self) -> None:
+        # Rescan the store (other processes may share it) and drop oldest
+        # entries until we are back under 90% of the limit.
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        target = int(self.max_bytes * 0.9)
+        for _, size, path in entries:
+            if total <= target:
+                break
+            try:
+                path.unlink()
+            except OSError:
+                continue
+            total -= size
+            self.evictions += 1
+        self._size = total
+
+    def clear(self) -> None:
+        with self._lock:
+            for _, _, path in list(self._entries()):
+                try:
+                    path.unlink()
+                except OSError:
+                    pass
+            self._size = 0
+
+    def stats(self) -> Dict:
+        with self._lock:
+            if self._size is None:
+                self._size = sum(size for _, size, _ in self._entries())
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+                "writes": self.writes,
+                "evictions": self.evictions,
+                "bytes": self._size,
+                "max_bytes": self.max_bytes,
+            }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_outline_cache() -> Optional[OutlineCache]:
+    """
+    Process-wide cache configured from the environment on first use:
+      TECHVERSE_CACHE=0          disable caching
+      TECHVERSE_CACHE_DIR        storage directory (default app/cache/outlines)
+      TECHVERSE_CACHE_MAX_MB     size bound before LRU eviction (default 256)
+    """
+    global _cache
+    if os.getenv("TECHVERSE_CACHE", "1") == "0":
+        return None
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                root = os.getenv("TECHVERSE_CACHE_DIR") or DEFAULT_CACHE_DIR
+                max_mb = float(os.getenv("TECHVERSE_CACHE_MAX_MB", "256"))
+                _cache = OutlineCache(root, max_bytes=int(max_mb * 1024 * 1024))
+    return _cache
@@ -0,0 +1,99 @@
+# File: app/utils/parsed_document.py
+
+import hashlib
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import fitz  # PyMuPDF
+
+from app.utils.process_pdfs import plain_page_text
+
+
+class ParsedDocument:
+    def __init__(
+        self,
+        filepath: str,
+        content_hash: str,
+        data: Optional[bytes] = None,
+        metadata: Optional[Dict] = None,
+        page_texts: Optional[List[str]] = None,
+    ):
+        """
+        Everything the upload pipeline needs from one PDF, produced from a
+        single read: the SHA-256 of the file bytes, metadata and page count
+        up front, per-page text extracted on first use, so consumers that
+        only need the hash (e.g. an outline cache hit) never parse the pages.
+
+        Line/span features are deliberately not part of the artifact: the
+        web 1A (process_headings_1a), 1B and the section index consume only
+        page text, and the layout-based extractor reads the PDF in its own
+        bounded-memory pass (iter_outline_events), so holding every line's
+        features here would only add memory to the upload path.
+        """
+        self.filepath = filepath
+        self.filename = Path(filepath).name
+        self.content_hash = content_hash
+        self._data = data
+        self._metadata = metadata
+        self._page_count = len(page_texts) if page_texts is not None else None
+        self._page_texts = page_texts
+
+    @classmethod
+    def from_pdf(cls, filepath: str) -> "ParsedDocument":
+        """
+        Read and hash the file once and open it (so unreadable PDFs fail
+        here); page text extraction is deferred.
+        """
+        with open(filepath, "rb") as f:
+            data = f.read()
+        parsed = cls(filepath, hashlib.sha256(data).hexdigest(), data=data)
+        parsed._load_info()
+        return parsed
+
+    def _open(self):
+        if self._data is not None:
+            return fitz.open(stream=self._data, filetype="pdf")
+        return fitz.open(self.filepath)
+
+    def _load_info(self) -> None:
+        with self._open() as doc:
+            self._metadata = dict(doc.metadata or {})
+            self._page_count = doc.page_count
+
+    @property
+    def metadata(self) -> Dict:
+        if self._metadata is None:
+            self._load_info()
+        return self._metadata
+
+    @property
+    def page_count(self) -> int:
+        if self._page_count is None:
+            self._load_info()
+        return self._page_count
+
+    @property
+    def page_texts(self) -> List[str]:
+        """
+        Plain text of every page (text extraction only, no layout features),
+        extracted with plain_page_text.
+        """
+        if self._page_texts is None:
+            with self._open() as doc:
+                if self._metadata is None:
+                    self._metadata = dict(doc.metadata or {})
+                self._page_texts = [plain_page_text(page) for page in doc]
+            self._page_count = len(self._page_texts)
+            self._data = None  # everything derived from the bytes is now held
+        return self._page_texts
+
+    @property
+    def text(self) -> str:
+        """
+        Whole-document text, pages separated by newlines.
+        """
+        return "\n".join(self.page_texts)
+
+    @property
+    def title(self) -> str:
+        return (self.metadata.get("title") or "").strip()
@@ -8,13 +8,21 @@ import re
 import json
 import time
 import string
+from bisect import bisect_right
+from functools import lru_cache
 from pathlib import Path
 import argparse
-from PyPDF2 import PdfReader
+from concurrent.futures import ProcessPoolExecutor, as_completed
 
 from collections import Counter, defaultdict
 
 import fitz  # PyMuPDF
+import numpy as np
+
+try:
+    from app.utils.outline_cache import file_sha256, get_outline_cache, make_cache_key
+except ImportError:  # run as a standalone script from app/utils
+    from outline_cache import file_sha256, get_outline_cache, make_cache_key
 
 # Optional jsonschema validation (small dep; safe to import)
 try:
@@ -38,20 +46,23 @@ def get_args():
     parser.add_argument(
         "--output-dir", type=str, default="output", help="Path to output folder"
     )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Worker processes for batch extraction (1 = sequential, 0 = all cores; default: TECHVERSE_WORKERS or 1)",
+    )
     return parser.parse_args()
 
 
-args = get_args()
-INPUT_DIR = args.input_dir
-OUTPUT_DIR = args.output_dir
-
-
 DEV = os.getenv("TECHVERSE_DEV_SECRET", "").lower() == "coffee"
 EXTENDED = os.getenv("TECHVERSE_EXTENDED", "") == "1"
 USE_FONT = os.getenv("TECHVERSE_USE_FONT", "1") == "1"
 # VALIDATE flag retained for backward compatibility but ignored; validation always attempted.
 _ = os.getenv("TECHVERSE_VALIDATE", "")
 HIERARCHY = os.getenv("TECHVERSE_HIERARCHY", "") == "1"
+RULE_STATS = os.getenv("TECHVERSE_RULE_STATS", "") == "1"  # time each heading rule
+STREAM = os.getenv("TECHVERSE_STREAM", "") == "1"
 SCHEMA_PATH = os.getenv("TECHVERSE_SCHEMA", "Challenge_1A/schema/output_schema.json")
 
 
@@ -78,6 +89,7 @@ CONF_MAX = 10.0  # scoring ceiling
 TOC_PAT = re.compile(
     r"(table\s+of\s+contents|^contents$|^toc$|目录|目次|الفهرس)", re.IGNORECASE
 )
+TOC_LINE_PAT = re.compile(r"^(\d+|[0-9.]+|[ivxlcdm]+)\b|^\.{2,}")
 
 
 def is_toc_page(page_text: str) -> bool:
@@ -86,8 +98,7 @@ def is_toc_page(page_text: str) -> bool:
     lines = [l.strip() for l in page_text.splitlines() if l.strip()]
     if not lines:
         return False
-    num_pat = re.compile(r"^(\d+|[0-9.]+|[ivxlcdm]+)\b|^\.{2,}")
-    numeric_like = sum(1 for l in lines if num_pat.search(l.lower()))
+    numeric_like = sum(1 for l in lines if TOC_LINE_PAT.search(l.lower()))
     return (numeric_like / len(lines)) >= 0.6
 
 
@@ -95,6 +106,17 @@ def is_toc_page(page_text: str) -> bool:
 # UTILS: TEXT CLEAN / CHECKS
 # ------------------------------------------------------------------
 _ws_re = re.compile(r"\s+")
+_URL_RE = re.compile(r"(https?://|www\.)")
+_NUMBERED_RE = re.compile(
+    r"""^(
+        (\d+(\.\d+){0,3})[.)\s-]* |
+        ([IVXLCDM]+\.?)\s+ |
+        (Chapter|Section)\s+\d+(\.\d+)* 
+    )""",
+    re.IGNORECASE | re.VERBOSE,
+)
+_NUMBERING_DEPTH_RE = re.compile(r"^\s*(\d+(?:\.\d+){0,5})\b")
+_PUNCT_CHARS = frozenset(string.punctuation)
 
 
 def clean_text(text: str) -> str:
@@ -102,7 +124,7 @@ def clean_text(text: str) -> str:
 
 
 def looks_like_url(text: str) -> bool:
-    return bool(re.search(r"(https?://|www\.)", text.lower()))
+    return bool(_URL_RE.search(text.lower()))
 
 
 def mostly_nonletters(text: str, threshold=0.6) -> bool:
@@ -114,20 +136,15 @@ def mostly_nonletters(text: str, threshold=0.6) -> bool:
 
 
 def count_punctuation(text: str) -> int:
-    return sum(1 for c in text if c in string.punctuation)
+    return sum(1 for c in text if c in _PUNCT_CHARS)
 
 
 def is_numbered_heading(text: str) -> bool:
-    pat_nums = r"""^(
-        (\d+(\.\d+){0,3})[.)\s-]* |
-        ([IVXLCDM]+\.?)\s+ |
-        (Chapter|Section)\s+\d+(\.\d+)* 
-    )"""
-    return bool(re.match(pat_nums, text.strip(), re.IGNORECASE | re.VERBOSE))
+    return bool(_NUMBERED_RE.match(text.strip()))
 
 
 def numbering_depth(text: str) -> int:
-    m = re.match(r"^\s*(\d+(?:\.\d+){0,5})\b", text)
+    m = _NUMBERING_DEPTH_RE.match(text)
     return m.group(1).count(".") + 1 if m else 0
 
 
@@ -147,69 +164,97 @@ _CJK_CHAR_RE = re.compile(
 # ------------------------------------------------------------------
 # SCRIPT DETECTION (hi/zh/ru/ja/ar/en)
 # ------------------------------------------------------------------
-def detect_script(text: str) -> str:
-    # Define Unicode ranges for additional languages
-    script_ranges = {
-        "hi": [(0x0900, 0x097F)],  # Hindi (Devanagari)
-        "bn": [(0x0980, 0x09FF)],  # Bengali
-        "ta": [(0x0B80, 0x0BFF)],  # Tamil
-        "te": [(0x0C00, 0x0C7F)],  # Telugu
-        "kn": [(0x0C80, 0x0CFF)],  # Kannada
-        "ml": [(0x0D00, 0x0D7F)],  # Malayalam
-        "gu": [(0x0A80, 0x0AFF)],  # Gujarati
-        "pa": [(0x0A00, 0x0A7F)],  # Punjabi (Gurmukhi)
-        "mr": [(0x0900, 0x097F)],  # Marathi (same as Hindi)
-        "ur": [(0x0600, 0x06FF)],  # Urdu (same as Arabic)
-        "ar": [(0x0600, 0x06FF)],  # Arabic
-        "zh": [(0x4E00, 0x9FFF)],  # Chinese
-        "ja": [(0x3040, 0x30FF), (0x31F0, 0x31FF)],  # Japanese
-        "ko": [(0xAC00, 0xD7AF)],  # Korean (Hangul)
-        "ru": [(0x0400, 0x04FF)],  # Russian (Cyrillic)
-        "th": [(0x0E00, 0x0E7F)],  # Thai
-        "vi": [(0x0100, 0x017F)],  # Vietnamese (Latin Extended)
-        "fr": [(0x00C0, 0x00FF)],  # French (Latin + accents)
-        "de": [(0x00C0, 0x00FF)],  # German (shared)
-        "es": [(0x00C0, 0x00FF)],  # Spanish (shared)
-        "en": [(0x0000, 0x007F)],  # English (Basic Latin)
-    }
+# Unicode ranges per language
+_SCRIPT_RANGES = {
+    "hi": [(0x0900, 0x097F)],  # Hindi (Devanagari)
+    "bn": [(0x0980, 0x09FF)],  # Bengali
+    "ta": [(0x0B80, 0x0BFF)],  # Tamil
+    "te": [(0x0C00, 0x0C7F)],  # Telugu
+    "kn": [(0x0C80, 0x0CFF)],  # Kannada
+    "ml": [(0x0D00, 0x0D7F)],  # Malayalam
+    "gu": [(0x0A80, 0x0AFF)],  # Gujarati
+    "pa": [(0x0A00, 0x0A7F)],  # Punjabi (Gurmukhi)
+    "mr": [(0x0900, 0x097F)],  # Marathi (same as Hindi)
+    "ur": [(0x0600, 0x06FF)],  # Urdu (same as Arabic)
+    "ar": [(0x0600, 0x06FF)],  # Arabic
+    "zh": [(0x4E00, 0x9FFF)],  # Chinese
+    "ja": [(0x3040, 0x30FF), (0x31F0, 0x31FF)],  # Japanese
+    "ko": [(0xAC00, 0xD7AF)],  # Korean (Hangul)
+    "ru": [(0x0400, 0x04FF)],  # Russian (Cyrillic)
+    "th": [(0x0E00, 0x0E7F)],  # Thai
+    "vi": [(0x0100, 0x017F)],  # Vietnamese (Latin Extended)
+    "fr": [(0x00C0, 0x00FF)],  # French (Latin + accents)
+    "de": [(0x00C0, 0x00FF)],  # German (shared)
+    "es": [(0x00C0, 0x00FF)],  # Spanish (shared)
+    "en": [(0x0000, 0x007F)],  # English (Basic Latin)
+}
+
+# Preference order: if multiple scripts, pick one
+_SCRIPT_PRIORITY = [
+    "hi",
+    "bn",
+    "ta",
+    "te",
+    "kn",
+    "ml",
+    "gu",
+    "pa",
+    "mr",
+    "ur",
+    "ar",
+    "zh",
+    "ja",
+    "ko",
+    "ru",
+    "th",
+    "vi",
+    "fr",
+    "de",
+    "es",
+    "en",
+]
+
+
+def _build_script_table():
+    """
+    Flatten the (partly shared) language ranges into sorted disjoint
+    codepoint intervals, each labelled with the priority rank of the
+    highest-priority language covering it.
+    """
+    rank = {lang: i for i, lang in enumerate(_SCRIPT_PRIORITY)}
+    bounds = sorted(
+        {b for ranges in _SCRIPT_RANGES.values() for s, e in ranges for b in (s, e + 1)}
+    )
+    starts, ends, ranks = [], [], []
+    for lo, hi in zip(bounds, bounds[1:]):
+        covering = [
+            rank[lang]
+            for lang, ranges in _SCRIPT_RANGES.items()
+            if any(s <= lo and hi - 1 <= e for s, e in ranges)
+        ]
+        if covering:
+            starts.append(lo)
+            ends.append(hi - 1)
+            ranks.append(min(covering))
+    return starts, ends, ranks
+
+
+_SCRIPT_STARTS, _SCRIPT_ENDS, _SCRIPT_RANKS = _build_script_table()
 
-    seen_langs = set()
-    for ch in text:
+
+@lru_cache(maxsize=4096)
+def detect_script(text: str) -> str:
+    if text.isascii():
+        return "en"  # only Basic Latin can match
+    best = len(_SCRIPT_PRIORITY)
+    for ch in set(text):
         code = ord(ch)
-        for lang, ranges in script_ranges.items():
-            for r_start, r_end in ranges:
-                if r_start <= code <= r_end:
-                    seen_langs.add(lang)
-                    break
-
-    # Preference order: if multiple scripts, pick one
-    priority = [
-        "hi",
-        "bn",
-        "ta",
-        "te",
-        "kn",
-        "ml",
-        "gu",
-        "pa",
-        "mr",
-        "ur",
-        "ar",
-        "zh",
-        "ja",
-        "ko",
-        "ru",
-        "th",
-        "vi",
-        "fr",
-        "de",
-        "es",
-        "en",
-    ]
-    for lang in priority:
-        if lang in seen_langs:
-            return lang
-    return "en"
+        i = bisect_right(_SCRIPT_STARTS, code) - 1
+        if i >= 0 and code <= _SCRIPT_ENDS[i] and _SCRIPT_RANKS[i] < best:
+            best = _SCRIPT_RANKS[i]
+            if best == 0:
+                break
+    return _SCRIPT_PRIORITY[best] if best < len(_SCRIPT_PRIORITY) else "en"
 
 
 # ------------------------------------------------------------------
@@ -350,9 +395,160 @@ class LineInfo:
         self.size_norm = 0.0
 
 
+class LineTable:
+    """
+    Column store over a document's lines: one NumPy array per numeric feature
+    plus an interned text id. Font statistics, repeat counting and ordering
+    run on the arrays; LineInfo objects remain the row view used by the
+    text-level heuristics.
+    """
+
+    def __init__(self, lines):
+        n = len(lines)
+        text_ids = {}
+        self.lines = lines
+        self.text_id = np.fromiter(
+            (text_ids.setdefault(ln.text, len(text_ids)) for ln in lines), np.int64, n
+        )
+        self.texts = list(text_ids)  # text id -> text
+        self.page = np.fromiter((ln.page for ln in lines), np.int64, n)
+        self.font_size = np.fromiter((ln.font_size for ln in lines), np.float64, n)
+        self.bold = np.fromiter((ln.bold for ln in lines), bool, n)
+        self.centered = np.fromiter((ln.centered for ln in lines), bool, n)
+        self.rel_y = np.fromiter((ln.rel_y for ln in lines), np.float64, n)
+        self.size_norm = np.zeros(n)
+
+    def __len__(self):
+        return len(self.lines)
+
+    def row(self, i) -> LineInfo:
+        ln = self.lines[i]
+        ln.size_norm = float(self.size_norm[i])
+        return ln
+
+    def doc_order(self):
+        """Row indices sorted by (page, -font_size); ties keep line order."""
+        return np.lexsort((-self.font_size, self.page))
+
+
 # ------------------------------------------------------------------
 # EXTRACT LINES FROM PDF (skip TOC pages)
 # ------------------------------------------------------------------
+# One TextPage per page feeds TOC detection, line assembly and title lookup.
+# Images are not needed by any heuristic; ligatures are expanded to plain
+# letters so headings compare and dedupe cleanly.
+PAGE_TEXT_FLAGS = fitz.TEXTFLAGS_TEXT & ~fitz.TEXT_PRESERVE_LIGATURES
+
+
+def page_text_from_blocks(blocks) -> str:
+    """Plain page text (one line per text line) rebuilt from a "dict" extraction."""
+    out = []
+    for block in blocks:
+        for line in block.get("lines", ()):
+            out.append("".join(span.get("text", "") for span in line.get("spans", ())))
+    return "\n".join(out)
+
+
+def plain_page_text(page) -> str:
+    """
+    Page text as the web 1A path has always read it (flags=0); a page that
+    fails to extract contributes no text instead of failing the document.
+    """
+    try:
+        return page.get_text("text", flags=0)
+    except Exception:
+        return ""
+
+
+def page_has_images(page) -> bool:
+    """Cheap scanned-page signal: image references on the page (no decoding)."""
+    try:
+        return bool(page.get_images(full=False))
+    except Exception:
+        return False
+
+
+def page_blocks(page):
+    textpage = page.get_textpage(flags=PAGE_TEXT_FLAGS)
+    return page.get_text("dict", textpage=textpage).get("blocks", [])
+
+
+def parse_page(page, page_num):
+    """
+    One structured extraction of a page.
+    Returns (page_text, is_toc, page_lines); page_lines is empty for TOC pages.
+    """
+    blocks = page_blocks(page)
+    page_text = page_text_from_blocks(blocks)
+    if is_toc_page(page_text):
+        return page_text, True, []
+
+    page_w, page_h = page.rect.width, page.rect.height
+    page_lines = []
+
+    for block in blocks:
+        if "lines" not in block:
+            continue
+        for line in block["lines"]:
+            spans = line.get("spans", [])
+            if not spans:
+                continue
+
+            parts = []
+            max_size = 0.0
+            any_bold = False
+            x0_vals, x1_vals, y0_vals = [], [], []
+
+            for span in spans:
+                txt = clean_text(span.get("text", ""))
+                if not txt:
+                    continue
+                parts.append(txt)
+                size = float(span.get("size", 0))
+                max_size = max(max_size, size)
+                any_bold = any_bold or is_bold(span)
+                bbox = span.get("bbox", [0, 0, 0, 0])
+                x0_vals.append(bbox[0])
+                x1_vals.append(bbox[2])
+                y0_vals.append(bbox[1])
+
+            if not parts:
+                continue
+
+            text_line = clean_text(" ".join(parts))
+            if len(text_line) < 2:
+                continue
+
+            center_x = (
+                (sum(x0_vals) / len(x0_vals) + sum(x1_vals) / len(x1_vals)) / 2
+                if x0_vals
+                else 0
+            )
+            centered = abs(center_x - (page_w / 2)) < CENTER_TOL
+            rel_y = (min(y0_vals) / page_h) if y0_vals else 0
+
+            ln = LineInfo(text_line, page_num, max_size, any_bold, centered, rel_y)
+            page_lines.append(ln)
+
+
+    return page_text, False, page_lines
+
+
+def iter_page_lines(doc):
+    """
+    Yield (page_num, page_lines) for every non-TOC page, one page at a time.
+    Pages without usable text are still yielded (with an empty list) so
+    callers can count included pages.
+    """
+    for page_num in range(doc.page_count):
+        _text, is_toc, page_lines = parse_page(doc[page_num], page_num)
+        if is_toc:
+            if DEV:
+                print(f"[Dev] Skipping TOC page {page_num}")
+            continue
+        yield page_num, page_lines
+
+
 def extract_lines_from_pdf(pdf_path: str):
     if isinstance(pdf_path, list):
         if len(pdf_path) == 1:
@@ -364,68 +560,11 @@ def extract_lines_from_pdf(pdf_path: str):
     included_pages = []
     first_included_page_lines = []
 
-    for page_index in range(doc.page_count):
-        page = doc[page_index]
-        page_num = page_index
-        raw_text = page.get_text("text")
-
-        if is_toc_page(raw_text):
-            if DEV:
-                print(f"[Dev] Skipping TOC page {page_num}")
-            continue
-
+    for page_num, page_lines in iter_page_lines(doc):
         included_pages.append(page_num)
-        page_w, page_h = page.rect.width, page.rect.height
-        blocks = page.get_text("dict").get("blocks", [])
-        page_lines_for_title = []
-
-        for block in blocks:
-            if "lines" not in block:
-                continue
-            for line in block["lines"]:
-                spans = line.get("spans", [])
-                if not spans:
-                    continue
-
-                parts = []
-                max_size = 0.0
-                any_bold = False
-                x0_vals, x1_vals, y0_vals = [], [], []
-
-                for span in spans:
-                    txt = clean_text(span.get("text", ""))
-                    if not txt:
-                        continue
-                    parts.append(txt)
-                    size = float(span.get("size", 0))
-                    max_size = max(max_size, size)
-                    any_bold = any_bold or is_bold(span)
-                    bbox = span.get("bbox", [0, 0, 0, 0])
-                    x0_vals.append(bbox[0])
-                    x1_vals.append(bbox[2])
-                    y0_vals.append(bbox[1])
-
-                if not parts:
-                    continue
-
-                text_line = clean_text(" ".join(parts))
-                if len(text_line) < 2:
-                    continue
-
-                center_x = (
-                    (sum(x0_vals) / len(x0_vals) + sum(x1_vals) / len(x1_vals)) / 2
-                    if x0_vals
-                    else 0
-                )
-                centered = abs(center_x - (page_w / 2)) < CENTER_TOL
-                rel_y = (min(y0_vals) / page_h) if y0_vals else 0
-
-                ln = LineInfo(text_line, page_num, max_size, any_bold, centered, rel_y)
-                lines.append(ln)
-                page_lines_for_title.append(ln)
-
+        lines.extend(page_lines)
         if not first_included_page_lines:
-            first_included_page_lines = page_lines_for_title
+            first_included_page_lines = page_lines
 
     return doc, lines, included_pages, first_included_page_lines
 
@@ -433,20 +572,36 @@ def extract_lines_from_pdf(pdf_path: str):
 # ------------------------------------------------------------------
 # NORMALIZATION & LEVEL MAPPING
 # ------------------------------------------------------------------
-def normalize_sizes(lines):
-    max_size = max((ln.font_size for ln in lines), default=1.0) or 1.0
-    for ln in lines:
-        ln.size_norm = ln.font_size / max_size
+def normalize_sizes(table: LineTable):
+    max_size = float(table.font_size.max()) if len(table) else 1.0
+    max_size = max_size or 1.0
+    table.size_norm = table.font_size / max_size
     return max_size
 
 
-def build_font_level_map(lines):
-    heading_like_sizes = [
-        round(ln.font_size, 1) for ln in lines if is_heading_candidate(ln.text)
-    ]
-    if not heading_like_sizes:
+def font_size_counts(table: LineTable) -> Counter:
+    """Lines per rounded font size (0.1 pt) among heading-like lines."""
+    heading_like = np.fromiter(
+        (is_heading_candidate(t) for t in table.texts), bool, len(table.texts)
+    )
+    values, counts = np.unique(table.font_size[heading_like[table.text_id]], return_counts=True)
+    # Histogram the exact sizes, then round each distinct size with Python's
+    # round, as the streaming path does per line. np.round scales by 10
+    # first, so e.g. 16.05 would land in 16.0 there but in 16.1 here.
+    size_counts = Counter()
+    for value, count in zip(values.tolist(), counts.tolist()):
+        size_counts[round(value, 1)] += count
+    return size_counts
+
+
+def build_font_level_map(table: LineTable):
+    return font_level_map_from_counts(font_size_counts(table))
+
+
+def font_level_map_from_counts(size_counts):
+    """Map the largest distinct (collapsed) heading font sizes to H1..H3."""
+    if not size_counts:
         return {}
-    size_counts = Counter(heading_like_sizes)
     filtered = [s for s, c in size_counts.items() if c >= 2] or list(size_counts.keys())
     filtered.sort(reverse=True)
     collapsed = []
@@ -457,12 +612,17 @@ def build_font_level_map(lines):
     return {s: level_names[idx] for idx, s in enumerate(collapsed[:NUM_LEVELS])}
 
 
-def build_repeat_map(lines, num_included_pages):
-    txt_pages = defaultdict(set)
-    for ln in lines:
-        txt_pages[ln.text].add(ln.page)
-    repeat_thresh = max(2, int(HEADER_REPEAT_RATIO * max(1, num_included_pages)))
-    return txt_pages, repeat_thresh
+def build_repeat_map(table: LineTable, num_included_pages):
+    """Distinct page count per text id, plus the running-header threshold."""
+    stride = int(table.page.max()) + 1 if len(table) else 1
+    pairs = np.unique(table.text_id * stride + table.page)
+    page_counts = np.bincount(pairs // stride, minlength=len(table.texts))
+    return page_counts, repeat_threshold(num_included_pages)
+
+
+def repeat_threshold(num_included_pages):
+    """Texts on at least this many pages are treated as running headers/footers."""
+    return max(2, int(HEADER_REPEAT_RATIO * max(1, num_included_pages)))
 
 
 def score_heading(ln: LineInfo):
@@ -581,93 +741,236 @@ def is_boilerplate_heading(text: str) -> bool:
 
 
 # ------------------------------------------------------------------
-# MAIN EXTRACTION (returns BOTH flat spec + extended flat)
+# HEADING FILTERS (text-only; shared by both extraction modes)
 # ------------------------------------------------------------------
-def extract_outline(pdf_path: str):
-    if not os.path.isfile(pdf_path):
-        raise FileNotFoundError(f"PDF file does not exist: {pdf_path}")
+class LineFeatures:
+    """Values shared by several heading rules, computed once per line."""
 
-    doc, lines, included_pages, first_page_lines = extract_lines_from_pdf(pdf_path)
+    __slots__ = ("text", "lower", "words", "n_words", "_numbered")
 
-    if not lines and "image" in str(doc[0].get_text("dict")).lower():
-        print(f"[Techverse] Likely image-based scan: {pdf_path}")
-        return {"title": "", "outline": []}, {"title": "", "outline": []}
+    def __init__(self, text: str):
+        self.text = text.strip()
+        self.lower = self.text.lower()
+        self.words = self.text.split()
+        self.n_words = len(self.words)
+        self._numbered = None
 
-    if not lines:
-        return {"title": "", "outline": []}, {"title": "", "outline": []}
+    @property
+    def numbered(self) -> bool:
+        if self._numbered is None:
+            self._numbered = bool(_NUMBERED_RE.match(self.text))
+        return self._numbered
 
-    normalize_sizes(lines)
-    meta_title = doc.metadata.get("title") if doc.metadata else None
-    title = extract_title_candidate(first_page_lines or lines, meta_title)
-    size_to_level = build_font_level_map(lines) if USE_FONT else {}
-    txt_pages, repeat_thresh = build_repeat_map(lines, len(included_pages))
 
-    flat_extended = []
-    seen = set()
-    candidates = [ln for ln in lines if ln.text != title]
-    candidates.sort(key=lambda ln: (ln.page, -ln.font_size))
+def _looks_like_paragraph(f: LineFeatures) -> bool:
+    if f.numbered:
+        return False
+    if f.n_words > PARA_WORD_MAX:
+        return True
+    return " " not in f.text and len(f.text) > PARA_CJK_MAX and bool(_CJK_CHAR_RE.search(f.text))
+
+
+def _bad_punctuation(f: LineFeatures) -> bool:
+    t = f.text
+    return t.endswith(".") or t.count(".") > 1 or count_punctuation(t) > MAX_PUNCT
+
+
+# (name, reject predicate), cheapest first. A line is a heading candidate only
+# if no rule rejects it, so the order changes cost, not results.
+HEADING_RULES = [
+    ("too_long", lambda f: len(f.text) > MAX_HEADING_CHARS),
+    ("too_many_words", lambda f: f.n_words > MAX_HEADING_WORDS),
+    ("digits_only", lambda f: f.text.isdigit()),
+    ("url", lambda f: "www." in f.lower or "http://" in f.lower or "https://" in f.lower),
+    ("punctuation", _bad_punctuation),
+    ("bullet", lambda f: BULLET_PAT.match(f.text) is not None),
+    ("page_number", lambda f: PAGE_NUM_PAT.match(f.text) is not None),
+    ("code", lambda f: looks_like_code(f.text)),
+    ("single_word", lambda f: f.n_words < 2 and not f.numbered),
+    ("paragraph", _looks_like_paragraph),
+    ("nonletters", lambda f: mostly_nonletters(f.text)),
+    (
+        "lowercase_body",
+        lambda f: f.n_words > LOWERCASE_BODY_WORDS and is_mostly_lower(f.text),
+    ),
+    ("boilerplate", lambda f: is_boilerplate_heading(f.text)),
+]
+
+
+class HeadingRulePipeline:
+    """
+    Runs the heading rules in order with shared per-line features and keeps
+    per-rule reject counts (always) and time spent (when profile=True).
+    Counters are not locked: use one pipeline per extraction run (or per
+    thread) and merge() the stats of finished runs into a total.
+    """
 
-    for ln in candidates:
-        txt = ln.text.strip()
-        if len(txt_pages.get(txt, ())) >= repeat_thresh:
-            continue
-        if looks_like_url(txt):
-            continue
-        if looks_like_page_number(txt):
-            continue
-        if looks_like_code(txt):
-            continue
-        if looks_like_bullet(txt):
-            continue
-        if mostly_nonletters(txt):
-            continue
-        if looks_like_paragraph(txt):
-            continue
-        if not is_heading_candidate(txt):
-            continue
-        if is_mostly_lower(txt) and len(txt.split()) > LOWERCASE_BODY_WORDS:
-            continue
-        if is_boilerplate_heading(txt):
-            continue
-        if txt in seen:
-            continue
-        seen.add(txt)
-        conf, _parts = score_heading(ln)
-        level = map_level(ln, size_to_level)
-        flat_extended.append(
-            {
-                "level": level,
-                "text": txt,
-                "page": ln.page,
-                "confidence": round(conf, 2),
-                "lang": detect_script(txt),
-                "font_size": round(ln.font_size, 2),
-                "bold": ln.bold,
-                "centered": ln.centered,
-            }
-        )
+    def __init__(self, rules, profile=False):
+        self.rules = list(rules)
+        self.profile = profile
+        self.reset()
+
+    def reset(self):
+        self.evaluated = 0
+        self.passed = 0
+        self.rejects = Counter()
+        self.seconds = Counter()
+
+    def accepts(self, text: str) -> bool:
+        f = LineFeatures(text)
+        self.evaluated += 1
+        if self.profile:
+            return self._accepts_timed(f)
+        for name, rule in self.rules:
+            if rule(f):
+                self.rejects[name] += 1
+                return False
+        self.passed += 1
+        return True
+
+    def _accepts_timed(self, f: LineFeatures) -> bool:
+        for name, rule in self.rules:
+            start = time.perf_counter()
+            rejected = rule(f)
+            self.seconds[name] += time.perf_counter() - start
+            if rejected:
+                self.rejects[name] += 1
+                return False
+        self.passed += 1
+        return True
+
+    def merge(self, stats):
+        """Add the counters of another run's stats() to this pipeline."""
+        self.evaluated += stats["evaluated"]
+        self.passed += stats["passed"]
+        for r in stats["rules"]:
+            self.rejects[r["rule"]] += r["rejected"]
+            self.seconds[r["rule"]] += r["ms"] / 1000
+
+    def stats(self):
+        return {
+            "evaluated": self.evaluated,
+            "passed": self.passed,
+            "rules": [
+                {
+                    "rule": name,
+                    "rejected": self.rejects[name],
+                    "ms": round(self.seconds[name] * 1000, 3),
+                }
+                for name, _ in self.rules
+            ],
+        }
+
+    def report(self) -> str:
+        st = self.stats()
+        out = [f"[Techverse] Heading rules: {st['passed']}/{st['evaluated']} passed"]
+        for r in st["rules"]:
+            timing = f" {r['ms']:.1f}ms" if self.profile else ""
+            out.append(f"    {r['rule']:<16} rejected={r['rejected']}{timing}")
+        return "\n".join(out)
 
-    def are_similar(a, b):
-        a, b = a.lower(), b.lower()
-        if a in b or b in a:
-            return True
-        common = set(a.split()) & set(b.split())
-        return len(common) / max(1, min(len(a.split()), len(b.split()))) > 0.7
 
+def passes_heading_filters(txt: str, rules=None) -> bool:
+    """
+    True if no heading rule rejects txt. rules: the run's HeadingRulePipeline
+    to count the verdict in; without one the rules are only evaluated.
+    """
+    if rules is not None:
+        return rules.accepts(txt)
+    f = LineFeatures(txt)
+    return not any(rule(f) for _, rule in HEADING_RULES)
+
+
+def make_heading_record(ln: LineInfo, size_to_level):
+    txt = ln.text.strip()
+    conf, _parts = score_heading(ln)
+    return {
+        "level": map_level(ln, size_to_level),
+        "text": txt,
+        "page": ln.page,
+        "confidence": round(conf, 2),
+        "lang": detect_script(txt),
+        "font_size": round(ln.font_size, 2),
+        "bold": ln.bold,
+        "centered": ln.centered,
+    }
+
+
+def are_near_duplicates(a: str, b: str) -> bool:
+    """Diversity-filter similarity on lowercased texts: substring or >70% shared words."""
+    if a in b or b in a:
+        return True
+    common = set(a.split()) & set(b.split())
+    return len(common) / max(1, min(len(a.split()), len(b.split()))) > 0.7
+
+
+def _trigrams(text: str):
+    return {text[i : i + 3] for i in range(len(text) - 2)}
+
+
+class HeadingDiversityIndex:
+    """
+    Index over headings kept by the diversity filter, so a candidate is only
+    checked against kept headings that could possibly match:
+      * share a word (needed for the word-overlap rule),
+      * contain the candidate's rarest trigram (candidate is a substring),
+      * have their first trigram inside the candidate (kept is a substring).
+    Texts shorter than 3 characters have no trigrams and are always checked.
+    """
+
+    def __init__(self):
+        self.kept = []  # lowercased kept texts
+        self.by_token = defaultdict(list)
+        self.by_gram = defaultdict(list)
+        self.by_anchor = defaultdict(list)
+        self.short = []
+
+    def __len__(self):
+        return len(self.kept)
+
+    def _candidates(self, a):
+        if len(a) < 3:
+            return range(len(self.kept))
+        ids = set(self.short)
+        for tok in set(a.split()):
+            ids.update(self.by_token.get(tok, ()))
+        grams = _trigrams(a)
+        rarest = min(grams, key=lambda g: len(self.by_gram.get(g, ())))
+        ids.update(self.by_gram.get(rarest, ()))
+        for g in grams:
+            ids.update(self.by_anchor.get(g, ()))
+        return ids
+
+    def matches_kept(self, text: str) -> bool:
+        a = text.lower()
+        return any(are_near_duplicates(a, self.kept[i]) for i in self._candidates(a))
+
+    def add(self, text: str):
+        a = text.lower()
+        idx = len(self.kept)
+        self.kept.append(a)
+        for tok in set(a.split()):
+            self.by_token[tok].append(idx)
+        if len(a) < 3:
+            self.short.append(idx)
+            return
+        for g in _trigrams(a):
+            self.by_gram[g].append(idx)
+        self.by_anchor[a[:3]].append(idx)
+
+
+def finalize_outline(flat_extended, title):
+    """Diversity/redundancy passes, then build (spec_result, ext_result)."""
+    index = HeadingDiversityIndex()
     diverse_headings = []
     for cand in flat_extended:
-        if all(not are_similar(cand["text"], sel["text"]) for sel in diverse_headings):
+        if not index.matches_kept(cand["text"]):
+            index.add(cand["text"])
             diverse_headings.append(cand)
         if len(diverse_headings) >= 100:
             break
     flat_extended = diverse_headings
 
-    if DEV:
-        print(
-            f"[Dev] {Path(pdf_path).name}: kept_pages={len(included_pages)}/{doc.page_count} "
-            f"lines={len(lines)} headings={len(flat_extended)} title='{title[:40]}'"
-        )
-
     flat_extended = remove_redundant_headings(flat_extended)
     flat_extended = reprocess_headings(flat_extended)
     flat_spec = [_to_schema_item(h) for h in flat_extended]
@@ -680,6 +983,278 @@ def extract_outline(pdf_path: str):
     return spec_result, ext_result
 
 
+# ------------------------------------------------------------------
+# MAIN EXTRACTION (returns BOTH flat spec + extended flat)
+# ------------------------------------------------------------------
+@lru_cache(maxsize=1)
+def _code_version() -> str:
+    """Fingerprint of this module's source; any heuristic change invalidates the cache."""
+    return file_sha256(__file__)[:16]
+
+
+def extractor_config(kind: str = "outline"):
+    """Everything besides the PDF bytes that can change an extraction result."""
+    return {
+        "kind": kind,
+        "code": _code_version(),
+        "use_font": USE_FONT,
+        "hierarchy": HIERARCHY,
+        "text_flags": PAGE_TEXT_FLAGS,
+        "thresholds": [
+            MAX_HEADING_CHARS,
+            MAX_HEADING_WORDS,
+            PARA_WORD_MAX,
+            PARA_CJK_MAX,
+            MAX_PUNCT,
+            LOWERCASE_BODY_WORDS,
+            HEADER_REPEAT_RATIO,
+            FONT_COLLAPSE_PT,
+            TOP_TITLE_FRAC,
+            CENTER_TOL,
+            NUM_LEVELS,
+            CONF_MAX,
+        ],
+    }
+
+
+def extract_outline(pdf_path: str, rules=None):
+    """
+    Return (spec_result, ext_result) for a PDF, served from the outline cache
+    when the same bytes were already extracted with the same configuration.
+    rules: optional HeadingRulePipeline counting this run's filter verdicts
+    (one per distinct line text, in both extraction paths).
+    """
+    if not os.path.isfile(pdf_path):
+        raise FileNotFoundError(f"PDF file does not exist: {pdf_path}")
+
+    cache = get_outline_cache()
+    if cache is not None:
+        key = make_cache_key(file_sha256(pdf_path), extractor_config())
+        cached = cache.get(key)
+        if cached is not None:
+            return cached["spec"], cached["extended"]
+
+    if STREAM:
+        spec_result, ext_result = extract_outline_streaming(pdf_path, rules)
+    else:
+        spec_result, ext_result = extract_outline_materialized(pdf_path, rules)
+
+    if cache is not None:
+        cache.put(key, {"spec": spec_result, "extended": ext_result})
+    return spec_result, ext_result
+
+
+def extract_outline_materialized(pdf_path: str, rules=None):
+    if not os.path.isfile(pdf_path):
+        raise FileNotFoundError(f"PDF file does not exist: {pdf_path}")
+
+    doc, lines, included_pages, first_page_lines = extract_lines_from_pdf(pdf_path)
+
+    if not lines and doc.page_count and page_has_images(doc[0]):
+        print(f"[Techverse] Likely image-based scan: {pdf_path}")
+        return {"title": "", "outline": []}, {"title": "", "outline": []}
+
+    if not lines:
+        return {"title": "", "outline": []}, {"title": "", "outline": []}
+
+    table = LineTable(lines)
+    max_size = normalize_sizes(table)
+    for ln in first_page_lines:
+        ln.size_norm = ln.font_size / max_size
+    meta_title = doc.metadata.get("title") if doc.metadata else None
+    title = extract_title_candidate(first_page_lines, meta_title)
+    size_to_level = build_font_level_map(table) if USE_FONT else {}
+    page_counts, repeat_thresh = build_repeat_map(table, len(included_pages))
+
+    # Filters are text-only, so evaluate them once per distinct text.
+    keep_text = np.fromiter(
+        (passes_heading_filters(txt, rules) and txt != title for txt in table.texts),
+        bool,
+        len(table.texts),
+    )
+    keep_text &= page_counts < repeat_thresh
+
+    # First occurrence of each kept text in (page, -font_size) order.
+    order = table.doc_order()
+    ordered_ids = table.text_id[order]
+    _, first_pos = np.unique(ordered_ids, return_index=True)
+    first_pos = np.sort(first_pos[keep_text[ordered_ids[first_pos]]])
+
+    flat_extended = [
+        make_heading_record(table.row(i), size_to_level) for i in order[first_pos]
+    ]
+
+    if DEV:
+        print(
+            f"[Dev] {Path(pdf_path).name}: kept_pages={len(included_pages)}/{doc.page_count} "
+            f"lines={len(lines)} headings={len(flat_extended)} title='{title[:40]}'"
+        )
+
+    return finalize_outline(flat_extended, title)
+
+
+def extract_outline_streaming(pdf_path: str, rules=None):
+    """
+    Streaming variant of extract_outline_materialized with identical output.
+
+    Lines are consumed page by page from iter_page_lines and filtered as they
+    arrive. Only the first included page (for title detection), one
+    representative line per surviving heading text, and small font-size /
+    repeat counters stay resident, so peak memory follows the number of
+    heading candidates instead of the number of lines in the document.
+    """
+    for _event, payload in stream_outline_events(pdf_path, progressive=False, rules=rules):
+        pass
+    return payload["spec"], payload["extended"]
+
+
+def stream_outline_events(pdf_path: str, progressive: bool = True, rules=None):
+    """
+    Generator behind extract_outline_streaming.
+
+    With progressive=True it also yields provisional results while pages are
+    parsed: ("title", {...}) as soon as the first page with text is read, then
+    ("headings", {"page", "headings"}) for every included page. Provisional
+    headings use only what has been seen so far (running max font size, font
+    levels, first occurrence, diversity filter), so running headers and the
+    title may still change. The last event is always ("outline", {"spec",
+    "extended"}) with exactly the result of extract_outline_materialized.
+    """
+    if not os.path.isfile(pdf_path):
+        raise FileNotFoundError(f"PDF file does not exist: {pdf_path}")
+
+    doc = fitz.open(pdf_path)
+    meta_title = doc.metadata.get("title") if doc.metadata else None
+    first_page_lines = []
+    num_pages = 0
+    num_lines = 0
+    max_size = 0.0
+    size_counts = Counter()  # rounded font sizes of heading-like lines
+    # text -> [representative line, seq, last page seen, distinct page count]
+    # The representative is the first line in (page, -font_size, seq) order,
+    # i.e. the one the materialized path would keep after sorting.
+    # A text in reps already passed the heading filters; rejected texts are
+    # not remembered (that would hold every body line), so they are evaluated
+    # again on each occurrence and the run's rule counters count lines.
+    reps = {}
+    seq = 0
+
+    # Provisional state (progressive mode only)
+    provisional_title = None
+    provisional_index = HeadingDiversityIndex()
+
+    for page_num, page_lines in iter_page_lines(doc):
+        num_pages += 1
+        if not first_page_lines:
+            first_page_lines = page_lines
+        page_candidates = []
+        for ln in page_lines:
+            num_lines += 1
+            if ln.font_size > max_size:
+                max_size = ln.font_size
+            if is_heading_candidate(ln.text):
+                size_counts[round(ln.font_size, 1)] += 1
+            entry = reps.get(ln.text)
+            if entry is None:
+                if not passes_heading_filters(ln.text, rules):
+                    continue
+                reps[ln.text] = [ln, seq, page_num, 1]
+                page_candidates.append((ln, seq))
+            else:
+                if entry[2] != page_num:
+                    entry[2] = page_num
+                    entry[3] += 1
+                elif ln.page == entry[0].page and ln.font_size > entry[0].font_size:
+                    entry[0], entry[1] = ln, seq
+            seq += 1
+
+        if not progressive:
+            continue
+
+        if provisional_title is None and first_page_lines:
+            for ln in first_page_lines:
+                ln.size_norm = ln.font_size / (max_size or 1.0)
+            provisional_title = extract_title_candidate(first_page_lines, meta_title)
+            yield "title", {"title": provisional_title}
+
+        size_to_level = font_level_map_from_counts(size_counts) if USE_FONT else {}
+        page_headings = []
+        page_candidates.sort(key=lambda e: (-e[0].font_size, e[1]))
+        for ln, _ in page_candidates:
+            if ln.text == provisional_title or len(provisional_index) >= 100:
+                continue
+            if provisional_index.matches_kept(ln.text):
+                continue
+            provisional_index.add(ln.text)
+            ln.size_norm = ln.font_size / (max_size or 1.0)
+            page_headings.append(make_heading_record(ln, size_to_level))
+        yield "headings", {"page": page_num, "headings": page_headings}
+
+    if not num_lines:
+        if doc.page_count and page_has_images(doc[0]):
+            print(f"[Techverse] Likely image-based scan: {pdf_path}")
+        yield "outline", {"spec": {"title": "", "outline": []}, "extended": {"title": "", "outline": []}}
+        return
+
+    max_size = max_size or 1.0
+    for ln in first_page_lines:
+        ln.size_norm = ln.font_size / max_size
+    title = extract_title_candidate(first_page_lines, meta_title)
+    size_to_level = font_level_map_from_counts(size_counts) if USE_FONT else {}
+    repeat_thresh = repeat_threshold(num_pages)
+
+    kept = [
+        (ln, rep_seq)
+        for txt, (ln, rep_seq, _last, n_pages) in reps.items()
+        if txt != title and n_pages < repeat_thresh
+    ]
+    kept.sort(key=lambda e: (e[0].page, -e[0].font_size, e[1]))
+
+    flat_extended = []
+    for ln, _ in kept:
+        ln.size_norm = ln.font_size / max_size
+        flat_extended.append(make_heading_record(ln, size_to_level))
+
+    if DEV:
+        print(
+            f"[Dev] {Path(pdf_path).name} (stream): kept_pages={num_pages}/{doc.page_count} "
+            f"lines={num_lines} headings={len(flat_extended)} title='{title[:40]}'"
+        )
+
+    spec_result, ext_result = finalize_outline(flat_extended, title)
+    yield "outline", {"spec": spec_result, "extended": ext_result}
+
+
+def iter_outline_events(pdf_path: str):
+    """
+    Progressive outline extraction for streaming endpoints: title first,
+    then headings page by page, then the final ("outline", {...}) event.
+    A cached outline is replayed in the same event order.
+    """
+    if not os.path.isfile(pdf_path):
+        raise FileNotFoundError(f"PDF file does not exist: {pdf_path}")
+
+    cache = get_outline_cache()
+    if cache is not None:
+        key = make_cache_key(file_sha256(pdf_path), extractor_config())
+        cached = cache.get(key)
+        if cached is not None:
+            ext_result = cached["extended"]
+            yield "title", {"title": ext_result["title"]}
+            by_page = defaultdict(list)
+            for h in ext_result["outline"]:
+                by_page[h["page"]].append(h)
+            for page_num in sorted(by_page):
+                yield "headings", {"page": page_num, "headings": by_page[page_num]}
+            yield "outline", {"spec": cached["spec"], "extended": ext_result}
+            return
+
+    for event, payload in stream_outline_events(pdf_path, progressive=True):
+        if event == "outline" and cache is not None:
+            cache.put(key, payload)
+        yield event, payload
+
+
 def are_similar(text1, text2):
     return text1.lower().strip() == text2.lower().strip()
 
@@ -712,8 +1287,15 @@ def remove_redundant_headings(headings, threshold=0.85):
     from difflib import SequenceMatcher
     import re
 
-    def is_similar(a, b):
-        return SequenceMatcher(None, a.lower(), b.lower()).ratio() >= threshold
+    def is_similar(a, matcher):
+        # matcher has the kept text as seq2 (its b2j index is built once);
+        # the cheap upper bounds rule most pairs out before ratio().
+        matcher.set_seq1(a)
+        return (
+            matcher.real_quick_ratio() >= threshold
+            and matcher.quick_ratio() >= threshold
+            and matcher.ratio() >= threshold
+        )
 
     def collapse_repeated_words(text):
         words = text.split()
@@ -738,20 +1320,21 @@ def remove_redundant_headings(headings, threshold=0.85):
         return False
 
     filtered = []
-    seen = []
+    seen_by_page = defaultdict(list)  # page -> matchers for kept headings
     for h in headings:
         h["text"] = collapse_repeated_words(h["text"])
 
         if is_noise_heading(h["text"]):
             continue
 
-        if any(
-            is_similar(h["text"], prev["text"]) and h["page"] == prev["page"]
-            for prev in seen
-        ):
+        text = h["text"].lower()
+        same_page = seen_by_page[h["page"]]
+        if any(is_similar(text, matcher) for matcher in same_page):
             continue
 
-        seen.append(h)
+        matcher = SequenceMatcher(None)
+        matcher.set_seq2(text)
+        same_page.append(matcher)
         filtered.append(h)
 
     return filtered
@@ -818,9 +1401,82 @@ def validate_json(data, schema):
 # ------------------------------------------------------------------
 # DRIVER
 # ------------------------------------------------------------------
-def process_pdfs():
-    input_dir = Path(INPUT_DIR)
-    output_dir = Path(OUTPUT_DIR)
+def _extract_job(pdf_path: str):
+    """
+    Run extract_outline for one PDF (in-process or inside a pool worker).
+    Only the compact result dicts are returned so nothing heavy (doc handles,
+    LineInfo lists) has to be pickled across the process boundary.
+    Returns (spec_result, ext_result, error, elapsed, cached, rule_stats);
+    ext_result is None unless EXTENDED, cached is True when served from the
+    outline cache, rule_stats are this file's heading rule counters.
+    """
+    print(f"[Techverse] Processing: {Path(pdf_path).name}")
+    start = time.time()
+    cache = get_outline_cache()
+    hits_before = cache.hits if cache is not None else 0
+    rules = HeadingRulePipeline(HEADING_RULES, profile=RULE_STATS)
+    try:
+        spec_result, ext_result = extract_outline(pdf_path, rules)
+    except Exception as e:
+        if DEV:
+            import traceback
+
+            traceback.print_exc()
+        return None, None, str(e), time.time() - start, False, rules.stats()
+    cached = cache is not None and cache.hits > hits_before
+    ext_result = ext_result if EXTENDED else None
+    return spec_result, ext_result, None, time.time() - start, cached, rules.stats()
+
+
+def _extract_parallel(pdf_files, workers):
+    """
+    Fan extraction out over a process pool. Files are submitted largest first
+    so the slowest documents start early instead of becoming stragglers.
+    Returns {pdf_path: job result}.
+    """
+    by_size = sorted(pdf_files, key=lambda p: p.stat().st_size, reverse=True)
+    results = {}
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(_extract_job, str(p)): str(p) for p in by_size}
+        for fut in as_completed(futures):
+            try:
+                results[futures[fut]] = fut.result()
+            except Exception as e:  # worker died (e.g. segfault in a bad PDF)
+                results[futures[fut]] = (None, None, str(e), 0.0, False, None)
+    return results
+
+
+def _write_outputs(pdf_file: Path, output_dir: Path, schema_obj, spec_result, ext_result):
+    # --- Write spec-compliant main file ---
+    out_path = make_output_path(output_dir, pdf_file.stem, ".json")
+    # overwrite safety
+    if out_path.exists():
+        out_path.unlink()
+    with open(out_path, "w", encoding="utf-8") as f:
+        json.dump(spec_result, f, indent=2, ensure_ascii=False)
+
+    # --- Validate (always attempted when jsonschema is available) ---
+    ok, _ = validate_json(spec_result, schema_obj)
+    if ok:
+        if DEV:
+            print(f"[Dev] Schema validation OK for {out_path.name}.")
+
+    # --- Extended debug file (optional) ---
+    if EXTENDED:
+        ext_path = out_path.with_name(out_path.stem + "_extended.json")
+        if ext_path.exists():
+            ext_path.unlink()
+        with open(ext_path, "w", encoding="utf-8") as f:
+            json.dump(ext_result, f, indent=2, ensure_ascii=False)
+        if DEV:
+            print(f"[Dev] Wrote extended debug: {ext_path.name}")
+
+    return out_path
+
+
+def process_pdfs(input_dir="input", output_dir="output", workers=None):
+    input_dir = Path(input_dir)
+    output_dir = Path(output_dir)
     output_dir.mkdir(parents=True, exist_ok=True)
 
     # Load schema once (always attempt; fallback inline)
@@ -831,37 +1487,43 @@ def process_pdfs():
         print("[Techverse] No PDFs found in input directory.")
         return
 
+    if workers is None:
+        env_workers = os.getenv("TECHVERSE_WORKERS", "1")
+        try:
+            workers = int(env_workers)
+        except ValueError:
+            print(f"[Techverse] Ignoring invalid TECHVERSE_WORKERS={env_workers!r}; using 1 worker")
+            workers = 1
+    if workers <= 0:
+        workers = os.cpu_count() or 1
+    workers = min(workers, len(pdf_files))
+
+    if workers > 1:
+        print(f"[Techverse] Extracting {len(pdf_files)} PDF(s) with {workers} workers")
+        parallel_results = _extract_parallel(pdf_files, workers)
+        results = (parallel_results[str(p)] for p in pdf_files)
+    else:
+        results = (_extract_job(str(p)) for p in pdf_files)
+
+    # Outputs are written in sorted filename order regardless of completion
+    # order, so per-file JSON and merged_summary.json are deterministic.
     merged_data = []
     total = 0
-    for pdf_file in pdf_files:
-        print(f"[Techverse] Processing: {pdf_file.name}")
-        start = time.time()
+    cache_hits = 0
+    rule_totals = HeadingRulePipeline(HEADING_RULES, profile=RULE_STATS)
+    for pdf_file, (spec_result, ext_result, error, elapsed, cached, rule_stats) in zip(
+        pdf_files, results
+    ):
+        cache_hits += cached
+        if rule_stats is not None:
+            rule_totals.merge(rule_stats)
+        if error is not None:
+            print(f"[Techverse] Error processing {pdf_file.name}: {error}")
+            continue
         try:
-            spec_result, ext_result = extract_outline(str(pdf_file))
-
-            # --- Write spec-compliant main file ---
-            out_path = make_output_path(output_dir, pdf_file.stem, ".json")
-            # overwrite safety
-            if out_path.exists():
-                out_path.unlink()
-            with open(out_path, "w", encoding="utf-8") as f:
-                json.dump(spec_result, f, indent=2, ensure_ascii=False)
-
-            # --- Validate (always attempted when jsonschema is available) ---
-            ok, _ = validate_json(spec_result, schema_obj)
-            if ok:
-                if DEV:
-                    print(f"[Dev] Schema validation OK for {out_path.name}.")
-
-            # --- Extended debug file (optional) ---
-            if EXTENDED:
-                ext_path = out_path.with_name(out_path.stem + "_extended.json")
-                if ext_path.exists():
-                    ext_path.unlink()
-                with open(ext_path, "w", encoding="utf-8") as f:
-                    json.dump(ext_result, f, indent=2, ensure_ascii=False)
-                if DEV:
-                    print(f"[Dev] Wrote extended debug: {ext_path.name}")
+            out_path = _write_outputs(
+                pdf_file, output_dir, schema_obj, spec_result, ext_result
+            )
 
             # merged summary: use spec (schema) version
             merged_data.append(
@@ -871,7 +1533,8 @@ def process_pdfs():
                     "outline": spec_result["outline"],
                 }
             )
-            print(f"[Techverse] Saved: {out_path.name} ({time.time() - start:.2f}s)")
+            note = ", cached" if cached else ""
+            print(f"[Techverse] Saved: {out_path.name} ({elapsed:.2f}s{note})")
             total += 1
 
         except Exception as e:
@@ -888,12 +1551,17 @@ def process_pdfs():
     with open(merged_path, "w", encoding="utf-8") as f:
         json.dump({"documents": merged_data}, f, indent=2, ensure_ascii=False)
     print(f"[Techverse] Saved merged summary: {merged_path.name}")
+    if get_outline_cache() is not None:
+        print(f"[Techverse] Outline cache: {cache_hits}/{len(pdf_files)} hit(s)")
+    if DEV or RULE_STATS:
+        print(rule_totals.report())
     print(f"\n[Techverse] Completed! Processed {total} PDF(s).")
 
-def process_headings_1a(filepath):
+def process_headings_1a(filepath, parsed=None):
     """
     Extract headings from a PDF.
     Always saves an output_1a.json file even if PDF has encoding issues or no headings.
+    parsed: optional ParsedDocument for this file, so the PDF is not read again.
     """
     session_id = Path(filepath).parent.parent.name
     output_dir = Path(__file__).resolve().parent.parent / "static" / "outputs" / session_id
@@ -905,14 +1573,30 @@ def process_headings_1a(filepath):
         "outline": []
     }
 
+    # Cache only the outline: the title comes from the upload's filename.
+    cache = get_outline_cache()
+    cache_key = None
     try:
-        doc = fitz.open(filepath)
-        text = ""
-        for page in doc:
-            try:
-                text += page.get_text("text", flags=0) + "\n"
-            except Exception:
-                text += page.get_text("text", flags=0, clip=None, morph=None, errors="ignore") + "\n"
+        if cache is not None:
+            content_hash = parsed.content_hash if parsed is not None else file_sha256(filepath)
+            cache_key = make_cache_key(content_hash, extractor_config("headings_1a"))
+            cached = cache.get(cache_key)
+            if cached is not None:
+                result["outline"] = cached["outline"]
+                with open(output_file, "w", encoding="utf-8") as f:
+                    json.dump(result, f, indent=2, ensure_ascii=False)
+                return [result]
+    except OSError as e:
+        print(f"[1A WARNING] Outline cache unavailable for {filepath}: {e}")
+        cache_key = None
+
+    try:
+        if parsed is not None:
+            page_texts = parsed.page_texts
+        else:
+            with fitz.open(filepath) as doc:
+                page_texts = [plain_page_text(page) for page in doc]
+        text = "\n".join(page_texts)
 
         # Simulate heading detection: (replace this with your real NLP logic)
         lines = [line.strip() for line in text.split("\n") if line.strip()]
@@ -922,6 +1606,8 @@ def process_headings_1a(filepath):
             headings = ["Full Document"]
 
         result["outline"] = headings
+        if cache_key is not None:
+            cache.put(cache_key, {"outline": headings})
 
     except Exception as e:
         print(f"[1A ERROR] Failed processing {filepath}: {e}")
@@ -938,9 +1624,11 @@ def process_headings_1a(filepath):
 # ------------------------------------------------------------------
 if __name__ == "__main__":
     print("[Techverse] Running PDF Outline Extraction")
-    print(f"[Techverse] Input directory: {INPUT_DIR}")
-    print(f"[Techverse] Output directory: {OUTPUT_DIR}")
+    args = get_args()
+    print(f"[Techverse] Input directory: {args.input_dir}")
+    print(f"[Techverse] Output directory: {args.output_dir}")
+    print(f"[Techverse] Workers: {args.workers if args.workers is not None else os.getenv('TECHVERSE_WORKERS', '1')}")
     print(
-        f"[Techverse] Extended: {'on' if EXTENDED else 'off'} | Font-based level: {'on' if USE_FONT else 'off'} | Hierarchy: {'on' if HIERARCHY else 'off'}"
+        f"[Techverse] Extended: {'on' if EXTENDED else 'off'} | Font-based level: {'on' if USE_FONT else 'off'} | Hierarchy: {'on' if HIERARCHY else 'off'} | Streaming: {'on' if STREAM else 'off'}"
     )
-    process_pdfs()
+    process_pdfs(args.input_dir, args.output_dir, args.workers)
@@ -0,0 +1,107 @@
+# File: app/utils/query_batcher.py
+
+import threading
+from typing import Callable, Dict, List, Sequence
+
+
+class _Request:
+    __slots__ = ("item", "result", "error", "lead", "ready")
+
+    def __init__(self, item):
+        self.item = item
+        self.result = None
+        self.error = None
+        self.lead = False  # this caller collects and runs the next batch
+        self.ready = threading.Event()  # set when done or promoted to leader
+
+
+class QueryBatcher:
+    def __init__(self, run_batch: Callable[[List], Sequence], max_batch: int = 32, max_wait: float = 0.002):
+        """
+        Coalesces concurrent calls: submit(item) blocks until
+        run_batch(items) has produced the result for its item (results are
+        returned in item order).
+
+        There is no background thread. The first caller to arrive while no
+        batch is being collected becomes the leader: it waits up to max_wait
+        seconds (less once max_batch requests are pending), runs the batch in
+        its own thread and hands leadership to the oldest request still
+        pending. Requests arriving while a batch runs form the next one, so
+        batches grow with load even with max_wait=0. Each waiting caller has
+        its own event, so finishing a batch wakes only its callers.
+        """
+        self.run_batch = run_batch
+        self.max_batch = max(1, max_batch)
+        self.max_wait = max_wait
+        self.requests = 0
+        self.batches = 0
+        self.largest = 0
+        self._pending: List[_Request] = []
+        self._leading = False
+        self._full = threading.Event()  # max_batch requests pending
+        self._lock = threading.Lock()
+
+    def submit(self, item):
+        request = _Request(item)
+        with self._lock:
+            self._pending.append(request)
+            if not self._leading:
+                self._leading = True
+                request.lead = True
+            elif len(self._pending) >= self.max_batch:
+                self._full.set()
+        if not request.lead:
+            request.ready.wait()
+        if request.lead:
+            self._lead()
+        if request.error is not None:
+            raise request.error
+        return request.result
+
+    def _lead(self) -> None:
+        if self.max_wait > 0:
+            self._full.wait(self.max_wait)
+        with self._lock:
+            batch = self._pending[:self.max_batch]
+            del self._pending[:self.max_batch]
+            self._full.clear()
+
+        results, error = None, None
+        try:
+            results = self.run_batch([request.item for request in batch])
+        except Exception as e:
+            error = e
+
+        for i, request in enumerate(batch):
+            if error is None:
+                request.result = results[i]
+            else:
+                request.error = error
+            request.lead = False
+        with self._lock:
+            self.requests += len(batch)
+            self.batches += 1
+            self.largest = max(self.largest, len(batch))
+            if self._pending:
+                successor = self._pending[0]
+                successor.lead = True
+                if len(self._pending) >= self.max_batch:
+                    self._full.set()
+            else:
+                successor = None
+                self._leading = False
+        for request in batch:
+            request.ready.set()
+        if successor is not None:
+            successor.ready.set()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "batches": self.batches,
+                "mean_batch": round(self.requests / self.batches, 2) if self.batches else 0.0,
+                "largest_batch": self.largest,
+                "max_batch": self.max_batch,
+                "max_wait_ms": self.max_wait * 1000,
+            }
@@ -1,23 +1,68 @@
 # File: app/utils/recommendation_engine.py
 
-from typing import Dict, List, Optional, Union
-import numpy as np
+from typing import Dict, FrozenSet, Iterable, List, Optional, Tuple, Union
 import re
+import sys
 import json
 from pathlib import Path
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
+
+from app.utils.tfidf_index import TfidfIndex
+from app.utils.query_batcher import QueryBatcher
+from app.utils.result_cache import normalize_text
+
+WORD_RE = re.compile(r'\b\w+\b')
 
 
 class RecommendationEngine:
-    def __init__(self):
+    def __init__(
+        self,
+        result_cache=None,
+        section_page_chars: int = 0,
+        semantic=None,
+        query_batch_size: int = 0,
+        query_batch_wait: float = 0.002
+    ):
         """
         In-memory recommendation engine using TF-IDF similarity.
+        result_cache: optional ResultCache for get_section_recommendations.
+        section_page_chars: index each outline entry together with up to this
+        many characters of its page's text (0 = heading text only).
+        semantic: optional SemanticIndex; when set, section search ranks
+        outline entries by embedding similarity instead of TF-IDF.
+        query_batch_size: > 1 coalesces concurrent get_recommendations calls
+        (up to this many, gathered for up to query_batch_wait seconds) into
+        one search_many on the document index.
         """
         self.documents: Dict[str, Dict] = {}
-        self.vectorizer = TfidfVectorizer(max_features=1000, stop_words='english')
-        self.document_vectors = None
-        self.is_fitted = False
+        self.index = TfidfIndex(max_features=1000, stop_words='english')
+        # One row per outline entry across the library ("<doc_id>#<position>");
+        # section_location() maps a row back to (doc, page, level)
+        self.section_index = TfidfIndex(max_features=None, stop_words='english')
+        self.section_page_chars = section_page_chars
+        self.semantic = semantic  # same rows as section_index, embedded
+        # Secondary indexes, kept in sync with self.documents
+        self.session_index: Dict[str, Dict[str, None]] = {}  # session_id -> ordered set of doc ids
+        self.path_index: Dict[str, str] = {}  # filepath -> doc_id
+        # doc_id -> {token: bitmask of the outline entries containing it}, built
+        # on add (or lazily after a restore) so queries never re-tokenize headings
+        self.section_terms: Dict[str, Dict[str, int]] = {}
+        self.store = None  # optional IndexStore; receives every change once attached
+        self.result_cache = result_cache
+        self.index_version = 0  # bumped on every change; part of result cache keys
+        self.query_batcher = None
+        if query_batch_size > 1:
+            self.query_batcher = QueryBatcher(self._search_documents, query_batch_size, query_batch_wait)
+
+    @property
+    def is_fitted(self) -> bool:
+        return len(self.index) > 0
+
+    @property
+    def document_vectors(self):
+        """
+        L2-normalized TF-IDF rows, in the same order as self.documents.
+        """
+        return self.index.snapshot().matrix
 
     # ---------------------- DOCUMENT MANAGEMENT ----------------------
 
@@ -27,20 +72,64 @@ class RecommendationEngine:
         headings_result: Union[Dict, str],
         persona: str = "",
         job: str = "",
-        session_id: str = None
+        session_id: str = None,
+        parsed=None
     ):
         """
-        Add a document to the recommendation engine's memory and re-index TF-IDF vectors.
+        Add a document to the recommendation engine's memory and index its TF-IDF terms.
         Supports headings_result as either dict or JSON string.
+        parsed: optional ParsedDocument for the file (page count, hash, metadata title).
+        """
+        doc_id = self._store_document(filepath, headings_result, persona, job, session_id, parsed)
+        self.index.add(doc_id, self.documents[doc_id]["text_content"])
+        self._index_sections([doc_id])
+        self.index_version += 1
+        self._record([{"op": "add", "doc_id": doc_id, "doc": self.documents[doc_id]}])
+
+    def add_documents(
+        self,
+        items: Iterable[Tuple[str, Union[Dict, str], str, str, Optional[str]]],
+        parsed_docs: Optional[Dict] = None
+    ) -> List[str]:
+        """
+        Bulk version of add_document for (filepath, headings_result, persona, job,
+        session_id) tuples: text content is built in one pass and the TF-IDF
+        index is updated once for the whole batch.
+        parsed_docs: optional {filepath: ParsedDocument} for the batch.
+        Returns the doc ids in input order.
+        """
+        parsed_docs = parsed_docs or {}
+        doc_ids = [
+            self._store_document(filepath, headings_result, persona, job, session_id, parsed_docs.get(filepath))
+            for filepath, headings_result, persona, job, session_id in items
+        ]
+        # A doc id repeated in the batch ends up where its last copy was stored
+        stored_order = list(dict.fromkeys(reversed(doc_ids)))[::-1]
+        self.index.add_many(
+            (doc_id, self.documents[doc_id]["text_content"]) for doc_id in stored_order
+        )
+        self._index_sections(stored_order)
+        self.index_version += 1
+        self._record([
+            {"op": "add", "doc_id": doc_id, "doc": self.documents[doc_id]}
+            for doc_id in stored_order
+        ])
+        return doc_ids
+
+    def _store_document(self, filepath, headings_result, persona, job, session_id, parsed) -> str:
+        """
+        Build and store the document record; returns its doc id.
         """
         parsed_headings = self._ensure_dict(headings_result)
         text_content = self._extract_text_content(parsed_headings)
 
         doc_id = Path(filepath).stem
-        self.documents[doc_id] = {
+        record = {
             "filepath": filepath,
             "filename": Path(filepath).name,
-            "title": parsed_headings.get("title", ""),
+            "title": parsed_headings.get("title", "") or (parsed.title if parsed else ""),
+            "page_count": parsed.page_count if parsed else None,
+            "content_hash": parsed.content_hash if parsed else None,
             "outline": parsed_headings.get("outline", []),
             "text_content": text_content,
             "persona": persona,
@@ -48,8 +137,144 @@ class RecommendationEngine:
             "session_id": session_id,
             "raw_headings_result": headings_result  # Keep original for frontend rendering
         }
+        if self.section_page_chars and parsed is not None:
+            record["page_excerpts"] = self._page_excerpts(record["outline"], parsed)
+        self._insert(doc_id, record)
+        return doc_id
 
-        self._refit_vectorizer()
+    def _insert(self, doc_id: str, record: Dict) -> None:
+        """
+        Put a record in the store and secondary indexes (not the TF-IDF index).
+        """
+        if doc_id in self.documents:
+            # Same stem re-uploaded, possibly in another session: it moves to
+            # the end of both the store and the index, keeping rows aligned
+            self._unlink(doc_id)
+            self.index.remove(doc_id)
+        self.documents[doc_id] = record
+        self._link(doc_id)
+        self.section_terms[doc_id] = self._section_term_masks(record["outline"])
+
+    def remove_document(self, doc_id: str) -> bool:
+        """
+        Remove one document; only its own terms are touched in the index.
+        """
+        if doc_id not in self.documents:
+            return False
+        self._unlink(doc_id)
+        self.index.remove(doc_id)
+        self.index_version += 1
+        self._record([{"op": "remove", "doc_ids": [doc_id]}])
+        return True
+
+    def remove_session(self, session_id: str) -> List[str]:
+        """
+        Remove every document of a session, touching only that session's
+        entries in the document store and TF-IDF index. Returns removed ids.
+        """
+        doc_ids = list(self.session_index.get(session_id, ()))
+        for doc_id in doc_ids:
+            self._unlink(doc_id)
+        self.index.remove_many(doc_ids)
+        if doc_ids:
+            self.index_version += 1
+            self._record([{"op": "remove", "doc_ids": doc_ids}])
+        return doc_ids
+
+    def _link(self, doc_id: str) -> None:
+        doc = self.documents[doc_id]
+        self.session_index.setdefault(doc.get("session_id"), {})[doc_id] = None
+        self.path_index[doc["filepath"]] = doc_id
+
+    def _unlink(self, doc_id: str) -> None:
+        """
+        Drop a document from the store, the secondary indexes and the section
+        index (not the document TF-IDF index).
+        """
+        doc = self.documents.pop(doc_id)
+        self.section_terms.pop(doc_id, None)
+        self.section_index.remove_many(self._section_row_ids(doc_id, doc))
+        if self.semantic is not None:
+            self._update_semantic(self._section_row_ids(doc_id, doc), [])
+        session_docs = self.session_index.get(doc.get("session_id"))
+        if session_docs is not None:
+            session_docs.pop(doc_id, None)
+            if not session_docs:
+                del self.session_index[doc.get("session_id")]
+        if self.path_index.get(doc["filepath"]) == doc_id:
+            del self.path_index[doc["filepath"]]
+
+    # ---------------------- PERSISTENCE ----------------------
+
+    def _record(self, entries: List[Dict]) -> None:
+        if self.store is not None:
+            self.store.append(entries)
+
+    def apply_change(self, entry: Dict) -> None:
+        """
+        Replay one change-log entry (without logging it again).
+        """
+        if entry["op"] == "add":
+            self._insert(entry["doc_id"], entry["doc"])
+            self.index.add(entry["doc_id"], entry["doc"]["text_content"])
+            self._index_sections([entry["doc_id"]])
+        elif entry["op"] == "remove":
+            for doc_id in entry["doc_ids"]:
+                if doc_id in self.documents:
+                    self._unlink(doc_id)
+            self.index.remove_many(entry["doc_ids"])
+        self.index_version += 1
+
+    def restore(self, documents: Dict[str, Dict], arrays: Dict, meta: Dict) -> None:
+        """
+        Replace the engine state with a persisted snapshot (see IndexStore).
+        The secondary indexes are built aside and swapped in with the
+        documents, so concurrent readers never see a half-built lookup.
+        """
+        if list(documents) != list(meta["doc_ids"]):
+            raise ValueError("Snapshot documents and index rows are out of sync")
+        session_index: Dict[str, Dict[str, None]] = {}
+        path_index: Dict[str, str] = {}
+        for doc_id, doc in documents.items():
+            session_index.setdefault(doc.get("session_id"), {})[doc_id] = None
+            path_index[doc["filepath"]] = doc_id
+        self.index.load_state(arrays, meta)
+        if "sections" in meta:
+            self.section_index.load_state(
+                {name[len("sections_"):]: array for name, array in arrays.items() if name.startswith("sections_")},
+                meta["sections"]
+            )
+        else:
+            # Snapshot written before the section index existed
+            self.section_index.clear()
+            self.section_index.add_many(
+                row for doc_id, doc in documents.items() for row in self._section_rows(doc_id, doc)
+            )
+        if self.semantic is not None and documents is not self.documents:
+            # Vectors come from the cache; only documents whose record changed
+            # (by identity: replayed logs keep unchanged records) are touched
+            old = self.documents
+            self._update_semantic(
+                [row_id for doc_id, doc in old.items() if documents.get(doc_id) is not doc
+                 for row_id in self._section_row_ids(doc_id, doc)],
+                [row for doc_id, doc in documents.items() if old.get(doc_id) is not doc
+                 for row in self._section_rows(doc_id, doc)]
+            )
+        self.documents = documents
+        self.session_index = session_index
+        self.path_index = path_index
+        self.section_terms = {}  # rebuilt per document on first use
+        self.index_version += 1
+
+    def export_state(self) -> Tuple[Dict, Dict]:
+        """
+        Arrays and metadata of the document and section indexes for a
+        snapshot (section entries are prefixed "sections_" / under "sections").
+        """
+        arrays, meta = self.index.export_state()
+        section_arrays, meta["sections"] = self.section_index.export_state()
+        arrays.update({f"sections_{name}": array for name, array in section_arrays.items()})
+        return arrays, meta
 
     def _ensure_dict(self, data: Union[Dict, str]) -> Dict:
         """
@@ -75,34 +300,47 @@ class RecommendationEngine:
             outline = []
 
         outline_text = " ".join(
-            [item.get("text", "") for item in outline if isinstance(item, dict)]
+            self._section(item)["text"] for item in outline
         )
         return f"{title} {outline_text}".strip()
 
     def _refit_vectorizer(self):
         """
-        Fit TF-IDF vectorizer across all stored documents.
+        Rebuild the TF-IDF and secondary indexes from scratch across all stored
+        documents (only needed after replacing self.documents wholesale).
         """
-        if not self.documents:
-            self.is_fitted = False
-            return
-
+        self.session_index = {}
+        self.path_index = {}
+        self.section_terms = {}
+        for doc_id in self.documents:
+            self._link(doc_id)
         try:
-            texts = [doc["text_content"] for doc in self.documents.values()]
-            self.document_vectors = self.vectorizer.fit_transform(texts)
-            self.is_fitted = True
+            self.index.rebuild(
+                (doc_id, doc["text_content"]) for doc_id, doc in self.documents.items()
+            )
+            self.section_index.clear()
+            if self.semantic is not None:
+                self.semantic.clear()
+            self._index_sections(list(self.documents))
         except Exception as e:
             print(f"[Vectorizer Error] {e}")
-            self.is_fitted = False
+            return
+        self.index_version += 1
+        if self.store is not None:
+            self.store.save(self)  # a wholesale replacement is not expressible in the log
 
     def get_documents_for_session(self, session_id: str) -> List[Dict]:
         """
         Retrieve all documents linked to a given session_id.
         """
-        return [
-            doc for doc in self.documents.values()
-            if doc.get("session_id") == session_id
-        ]
+        documents = self.documents
+        return [documents[doc_id] for doc_id in self.session_index.get(session_id, ()) if doc_id in documents]
+
+    def get_document_id_for_path(self, filepath: str) -> Optional[str]:
+        """
+        Doc id stored for a file path, if any.
+        """
+        return self.path_index.get(filepath)
 
     def get_library_size(self) -> int:
         """
@@ -110,6 +348,130 @@ class RecommendationEngine:
         """
         return len(self.documents)
 
+    # ---------------------- SECTION INDEX ----------------------
+
+    @staticmethod
+    def _section_row_ids(doc_id: str, doc: Dict) -> List[str]:
+        outline = doc.get("outline")
+        return [f"{doc_id}#{i}" for i in range(len(outline) if isinstance(outline, list) else 0)]
+
+    def _section_rows(self, doc_id: str, doc: Dict) -> List[Tuple[str, str]]:
+        """
+        (row id, text) for every outline entry of a stored document.
+        """
+        outline = doc.get("outline")
+        if not isinstance(outline, list):
+            return []
+        excerpts = doc.get("page_excerpts") or {}
+        rows = []
+        for i, item in enumerate(outline):
+            section = self._section(item)
+            excerpt = excerpts.get(str(item.get("page"))) if isinstance(item, dict) else None
+            rows.append((f"{doc_id}#{i}", f"{section['text']} {excerpt}" if excerpt else section["text"]))
+        return rows
+
+    def _index_sections(self, doc_ids: List[str]) -> None:
+        rows = [row for doc_id in doc_ids for row in self._section_rows(doc_id, self.documents[doc_id])]
+        self.section_index.add_many(rows)
+        if self.semantic is not None:
+            self._update_semantic([], rows)
+
+    def _update_semantic(self, removed: List[str], rows: List[Tuple[str, str]]) -> None:
+        """
+        Apply section row changes to the semantic index. A model failure is
+        logged and leaves those rows to TF-IDF only; it never fails the change.
+        """
+        try:
+            self.semantic.remove_many(removed)
+            self.semantic.add_many(rows)
+        except Exception as e:
+            print(f"[Semantic Index] {e}")
+
+    def _page_excerpts(self, outline: List, parsed) -> Dict[str, str]:
+        """
+        Leading text of each page that has an outline entry (1A heading pages
+        index parsed.page_texts), keyed by page as a string for JSON. Plain
+        string entries carry no page and get no excerpt.
+        """
+        if not isinstance(outline, list):
+            return {}
+        pages = {item.get("page") for item in outline if isinstance(item, dict)}
+        return {
+            str(page): parsed.page_texts[page][: self.section_page_chars]
+            for page in sorted(p for p in pages if isinstance(p, int) and 0 <= p < parsed.page_count)
+        }
+
+    def section_location(self, row_id: str) -> Optional[Tuple[str, int, int, str]]:
+        """
+        (doc_id, outline position, page, level) of a section index row, or
+        None when its document is no longer stored.
+        """
+        doc_id, _, position = row_id.rpartition("#")
+        doc = self.documents.get(doc_id)
+        try:
+            section = self._section(doc["outline"][int(position)])
+        except (TypeError, KeyError, ValueError, IndexError):
+            return None
+        return doc_id, int(position), section["page"], section["level"]
+
+    def search_sections(
+        self,
+        query: str,
+        top_k: Optional[int] = 10,
+        min_score: Optional[float] = None,
+        exclude: Optional[Tuple[str, int]] = None,
+        semantic: Optional[bool] = None
+    ) -> List[Dict]:
+        """
+        Best matching outline entries across the whole library, ranked by
+        one sparse product of the query with the section index.
+        min_score: score floor; None uses the default of the backend that
+        actually ranks (the semantic index's min_score, else 0.1 for TF-IDF).
+        exclude: optional (doc_id, page) whose sections are skipped.
+        semantic: rank by the semantic index instead (default: when one is
+        configured). TF-IDF is used if the model fails or the semantic index
+        is missing rows (an earlier embedding failure).
+        """
+        skipped = 0
+        if exclude is not None and exclude[0] in self.documents:
+            skipped = sum(
+                1 for item in self.documents[exclude[0]].get("outline") or []
+                if self._section(item)["page"] == exclude[1]
+            )
+        limit = None if top_k is None else top_k + skipped
+
+        hits = None
+        if self.semantic is not None and semantic is not False and len(self.semantic) == len(self.section_index):
+            try:
+                hits = self.semantic.search(query, top_k=limit, min_score=min_score)
+            except Exception as e:
+                print(f"[Semantic Index] {e}")
+        if hits is None:
+            hits = self.section_index.search(query, top_k=limit, min_score=0.1 if min_score is None else min_score)
+
+        results = []
+        for row_id, score in hits:
+            location = self.section_location(row_id)
+            if location is None:
+                continue  # document removed by a concurrent change
+            doc_id, position, page, level = location
+            doc = self.documents.get(doc_id)
+            if doc is None or (exclude is not None and (doc_id, page) == exclude):
+                continue
+            results.append({
+                "id": row_id,
+                "document_id": doc_id,
+                "document": doc["filename"],
+                "title": doc["title"],
+                "page": page,
+                "level": level,
+                "text": self._section(doc["outline"][position])["text"],
+                "score": score
+            })
+            if top_k is not None and len(results) >= top_k:
+                break
+        return results
+
     # ---------------------- RECOMMENDATION LOGIC ----------------------
 
     def get_recommendations(
@@ -117,10 +479,12 @@ class RecommendationEngine:
         current_doc_path: str,
         persona: str,
         job: str,
-        current_doc_data: Dict
+        current_doc_data: Dict,
+        top_k: Optional[int] = None
     ) -> List[Dict]:
         """
         Return similar documents and their relevant sections for a given persona/job/query.
+        top_k: return at most this many documents (default: all above the threshold).
         """
         if not self.is_fitted or not self.documents:
             return []
@@ -128,49 +492,81 @@ class RecommendationEngine:
         query_text = f"{persona} {job} {current_doc_data.get('title', '')}"
 
         try:
-            query_vector = self.vectorizer.transform([query_text])
-            similarities = cosine_similarity(query_vector, self.document_vectors)[0]
+            if self.query_batcher is not None:
+                hits = self.query_batcher.submit((query_text, top_k))
+            else:
+                hits = self.index.search(query_text, top_k=top_k, min_score=0.1)
 
             recommendations = []
-            doc_ids = list(self.documents.keys())
-            sorted_indices = np.argsort(similarities)[::-1]
-
-            for idx in sorted_indices:
-                if similarities[idx] > 0.1:
-                    doc_id = doc_ids[idx]
-                    doc = self.documents[doc_id]
-
-                    relevant_sections = self._find_relevant_sections(doc["outline"], query_text)
-
-                    recommendations.append({
-                        "document_id": doc_id,
-                        "document": doc["filename"],
-                        "title": doc["title"],
-                        "similarity_score": float(similarities[idx]),
-                        "relevant_sections": relevant_sections[:3],
-                        "snippet": self._generate_snippet(doc["outline"][:2])
-                    })
+            for doc_id, score in hits:
+                doc = self.documents.get(doc_id)
+                if doc is None:
+                    continue  # removed by a concurrent index version switch
+
+                term_masks = self.section_terms.get(doc_id)
+                if term_masks is None:
+                    term_masks = self.section_terms[doc_id] = self._section_term_masks(doc["outline"])
+                relevant_sections = self._find_relevant_sections(doc["outline"], query_text, term_masks)
+
+                recommendations.append({
+                    "document_id": doc_id,
+                    "document": doc["filename"],
+                    "title": doc["title"],
+                    "similarity_score": score,
+                    "relevant_sections": relevant_sections[:3],
+                    "snippet": self._generate_snippet(doc["outline"][:2])
+                })
 
             return recommendations
         except Exception as e:
             print(f"[Recommendation Error] {e}")
             return []
 
+    def _search_documents(self, queries: List[Tuple[str, Optional[int]]]) -> List[List[Tuple[str, float]]]:
+        """
+        One document index search for a batch of (query text, top_k).
+        """
+        return self.index.search_many(
+            [text for text, _ in queries], top_k=[top_k for _, top_k in queries], min_score=0.1
+        )
+
     def get_section_recommendations(
         self,
         current_section: str,
         persona: str,
         job: str,
         document_id: Optional[str] = None,
-        page_number: Optional[int] = None
+        page_number: Optional[int] = None,
+        top_k: Optional[int] = None
     ) -> List[Dict]:
         """
         Recommend documents related to a specific section in context.
+        Served from result_cache when the same normalized request was
+        answered at the current index_version.
         """
+        anchored = bool(document_id) and document_id in self.documents
+        cache_key = None
+        if self.result_cache is not None:
+            # An anchored request queries with the document's title, so the
+            # selection text does not change its result
+            cache_key = (
+                "documents",
+                self.index_version,
+                document_id if anchored else None,
+                None if anchored else normalize_text(current_section),
+                page_number if anchored else None,
+                normalize_text(persona),
+                normalize_text(job),
+                top_k,
+            )
+            cached = self.result_cache.get(cache_key)
+            if cached is not None:
+                return cached
+
         current_doc_data = {"title": current_section}
 
         # Anchor recommendations to the document if provided
-        if document_id and document_id in self.documents:
+        if anchored:
             doc = self.documents[document_id]
             current_doc_data["title"] = doc.get("title", "")
             current_doc_data["outline"] = doc.get("outline", [])
@@ -179,37 +575,138 @@ class RecommendationEngine:
             if page_number is not None:
                 current_doc_data["outline"] = [
                     sec for sec in current_doc_data["outline"]
-                    if sec.get("page") == page_number
+                    if self._section(sec)["page"] == page_number
                 ]
 
-        return self.get_recommendations(
+        recommendations = self.get_recommendations(
             current_doc_path="",
             persona=persona,
             job=job,
-            current_doc_data=current_doc_data
+            current_doc_data=current_doc_data,
+            top_k=top_k
         )
+        if cache_key is not None:
+            self.result_cache.put(cache_key, recommendations)
+        return recommendations
+
+    def get_related_sections(
+        self,
+        current_section: str,
+        persona: str,
+        job: str,
+        document_id: Optional[str] = None,
+        page_number: Optional[int] = None,
+        top_k: int = 5
+    ) -> List[Dict]:
+        """
+        Sections anywhere in the library related to what the reader is
+        looking at: the selection if there is one, otherwise the headings of
+        the current page (or the document title). The current page itself is
+        excluded. Cached like get_section_recommendations.
+        """
+        anchored = bool(document_id) and document_id in self.documents
+        selection = normalize_text(current_section)
+        cache_key = None
+        if self.result_cache is not None:
+            cache_key = (
+                "sections",
+                self.index_version,
+                document_id if anchored else None,
+                page_number if anchored else None,
+                selection,
+                normalize_text(persona),
+                normalize_text(job),
+                top_k,
+            )
+            cached = self.result_cache.get(cache_key)
+            if cached is not None:
+                return cached
+
+        context = selection
+        exclude = None
+        if anchored:
+            doc = self.documents[document_id]
+            if page_number is not None:
+                exclude = (document_id, page_number)
+                if not context:
+                    context = " ".join(
+                        section["text"] for section in map(self._section, doc.get("outline") or [])
+                        if section["page"] == page_number
+                    )
+            context = context or doc.get("title", "")
+
+        sections = self.search_sections(f"{persona} {job} {context}", top_k=top_k, exclude=exclude)
+        if cache_key is not None:
+            self.result_cache.put(cache_key, sections)
+        return sections
 
     # ---------------------- TEXT ANALYSIS HELPERS ----------------------
 
-    def _find_relevant_sections(self, outline: List[Dict], query: str) -> List[Dict]:
+    @staticmethod
+    def _section(item: Union[Dict, str]) -> Dict:
+        """
+        Outline entries are heading dicts (1A extractor) or plain strings
+        (upload pipeline); view both as {"text", "page", "level"}.
+        """
+        if isinstance(item, dict):
+            return {
+                "text": item.get("text", ""),
+                "page": item.get("page", 1),
+                "level": item.get("level", "H1"),
+            }
+        return {"text": str(item), "page": 1, "level": "H1"}
+
+    @staticmethod
+    def _tokenize(text: str) -> FrozenSet[str]:
+        return frozenset(WORD_RE.findall(text.lower()))
+
+    def _section_term_masks(self, outline: List) -> Dict[str, int]:
+        """
+        Map each token of the outline to a bitmask of the entries containing
+        it (bit i = outline[i]); computed once per stored document.
+        """
+        masks: Dict[str, int] = {}
+        if not isinstance(outline, list):
+            return masks
+        for i, item in enumerate(outline):
+            bit = 1 << i
+            for word in self._tokenize(self._section(item)["text"]):
+                word = sys.intern(word)  # one string per word across the library
+                masks[word] = masks.get(word, 0) | bit
+        return masks
+
+    def _find_relevant_sections(
+        self,
+        outline: List[Dict],
+        query: str,
+        term_masks: Optional[Dict[str, int]] = None
+    ) -> List[Dict]:
         """
         Match sections against the query using token overlap.
+        term_masks: precomputed _section_term_masks(outline), if available.
+        Cost depends on the query words and matching sections only, not on
+        heading length.
         """
         relevant = []
-        query_words = set(re.findall(r'\b\w+\b', query.lower()))
-
-        for section in outline:
-            section_text = section.get("text", "").lower()
-            section_words = set(re.findall(r'\b\w+\b', section_text))
-            overlap = len(query_words & section_words)
-
-            if overlap > 0:
-                relevant.append({
-                    "text": section.get("text", ""),
-                    "page": section.get("page", 1),
-                    "level": section.get("level", "H1"),
-                    "relevance_score": overlap / len(query_words) if query_words else 0
-                })
+        query_words = self._tokenize(query)
+        if term_masks is None:
+            term_masks = self._section_term_masks(outline)
+
+        # Sections containing each query word; overlap of a section is the
+        # number of these masks with its bit set
+        hits = [mask for mask in map(term_masks.get, query_words) if mask]
+        matched = 0
+        for mask in hits:
+            matched |= mask
+
+        while matched:
+            bit = matched & -matched  # lowest remaining section, in outline order
+            matched ^= bit
+            overlap = sum(1 for mask in hits if mask & bit)
+            relevant.append({
+                **self._section(outline[bit.bit_length() - 1]),
+                "relevance_score": overlap / len(query_words)
+            })
 
         relevant.sort(key=lambda x: x["relevance_score"], reverse=True)
         return relevant
@@ -220,7 +717,7 @@ class RecommendationEngine:
         """
         snippets = []
         for section in sections:
-            text = section.get("text", "")
+            text = self._section(section)["text"]
             if len(text) > 50:
                 text = text[:50] + "..."
             snippets.append(text)
@@ -0,0 +1,115 @@
+# File: app/utils/result_cache.py
+
+import os
+import json
+import time
+import threading
+from collections import OrderedDict
+from typing import Dict, Hashable, Optional
+
+
+def normalize_text(text) -> str:
+    """
+    Collapse whitespace and lowercase, matching how queries are tokenized
+    (TF-IDF analyzer and section matching both lowercase).
+    """
+    return " ".join(str(text or "").split()).lower()
+
+
+class ResultCache:
+    def __init__(self, max_entries: int = 1024, ttl_seconds: float = 600, max_bytes: int = 32 * 1024 * 1024):
+        """
+        In-memory LRU cache with a time-to-live, bounded by entry count and
+        by the approximate (JSON-encoded) size of the stored values.
+        Cached values are shared between callers; treat them as read-only.
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.expirations = 0
+        self.evictions = 0
+        self._bytes = 0
+        self._entries = OrderedDict()  # key -> (expires_at, size, value)
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable):
+        """
+        Return the cached value for key, or None on a miss.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] < time.monotonic():
+                self._drop(key)
+                self.expirations += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[2]
+
+    def put(self, key: Hashable, value) -> None:
+        """
+        Store value under key, evicting least recently used entries if needed.
+        """
+        try:
+            size = len(json.dumps(value, ensure_ascii=False))
+        except (TypeError, ValueError):
+            return
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, size, value)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._drop(next(iter(self._entries)))
+                self.evictions += 1
+
+    def _drop(self, key: Hashable) -> None:
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+                "expirations": self.expirations,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "ttl_seconds": self.ttl_seconds,
+            }
+
+
+def result_cache_from_env() -> Optional[ResultCache]:
+    """
+    Cache for /api/analyze recommendations configured from the environment,
+    or None when disabled:
+      TECHVERSE_RESULT_CACHE=0           disable
+      TECHVERSE_RESULT_CACHE_SIZE        max entries (default 1024)
+      TECHVERSE_RESULT_CACHE_TTL         seconds an entry stays valid (default 600)
+      TECHVERSE_RESULT_CACHE_MAX_MB      approximate size bound (default 32)
+    """
+    if os.getenv("TECHVERSE_RESULT_CACHE", "1") == "0":
+        return None
+    max_mb = float(os.getenv("TECHVERSE_RESULT_CACHE_MAX_MB", "32"))
+    return ResultCache(
+        max_entries=max(1, int(os.getenv("TECHVERSE_RESULT_CACHE_SIZE", "1024"))),
+        ttl_seconds=float(os.getenv("TECHVERSE_RESULT_CACHE_TTL", "600")),
+        max_bytes=int(max_mb * 1024 * 1024),
+    )
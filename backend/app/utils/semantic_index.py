@@ -0,0 +1,565 @@
+# File: app/utils/semantic_index.py
+
+import os
+import re
+import json
+import hashlib
+import threading
+import importlib.util
+from collections import namedtuple
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows: cache appends are only serialized within a process
+    fcntl = None
+
+DEFAULT_VECTOR_DIR = Path(__file__).resolve().parent.parent / "cache" / "vectors"
+
+# Arrays searched by SemanticIndex, swapped as a whole. Rows [0, bounds[-1])
+# are grouped by ANN list (list l spans bounds[l]:bounds[l + 1]); later rows
+# carry their list in `lists`. centroids/bounds are None until trained.
+IndexState = namedtuple("IndexState", ["matrix", "ids", "lists", "centroids", "bounds"])
+
+
+def content_key(text: str) -> str:
+    """
+    Vector cache key of a text: SHA-256 of its UTF-8 bytes.
+    """
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+# ---------------------- EMBEDDING MODEL ----------------------
+
+class Embedder:
+    def __init__(
+        self,
+        model_path,
+        batch_size: int = 32,
+        max_length: int = 128,
+        max_batch_tokens: int = 4096,
+        quantize: bool = False,
+        threads: int = 0
+    ):
+        """
+        Sentence embeddings from a locally stored transformer model (e.g.
+        all-MiniLM-L6-v2 saved with save_pretrained), mean-pooled and
+        L2-normalized, on CPU. torch/transformers are imported on first use.
+
+        Batches are formed dynamically: texts are sorted by token length and a
+        batch closes at batch_size texts or max_batch_tokens padded tokens, so
+        short headings are not padded to the length of a long excerpt.
+        quantize: int8 dynamic quantization of the model's Linear layers.
+        threads: torch intra-op threads (0 = torch default).
+        """
+        self.model_path = str(model_path)
+        self.batch_size = batch_size
+        self.max_length = max_length
+        self.max_batch_tokens = max_batch_tokens
+        self.quantize = quantize
+        self.threads = threads
+        self._torch = None
+        self._tokenizer = None
+        self._model = None
+        self._lock = threading.Lock()
+
+    @property
+    def model_id(self) -> str:
+        """
+        Name of the vector space. Another model, truncation length or
+        quantization gives different vectors, so they must not share a cache.
+        """
+        config = Path(self.model_path) / "config.json"
+        try:
+            digest = hashlib.sha256(config.read_bytes()).hexdigest()[:12]
+        except OSError:
+            digest = "noconfig"
+        name = re.sub(r"[^\w.-]+", "_", Path(self.model_path).name) or "model"
+        return f"{name}-{digest}-L{self.max_length}{'-int8' if self.quantize else ''}"
+
+    def _load(self):
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    import torch
+                    from transformers import AutoModel, AutoTokenizer
+
+                    if self.threads:
+                        torch.set_num_threads(self.threads)
+                    tokenizer = AutoTokenizer.from_pretrained(self.model_path, local_files_only=True)
+                    model = AutoModel.from_pretrained(self.model_path, local_files_only=True).eval()
+                    if self.quantize:
+                        model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+                    self._torch = torch
+                    self._tokenizer = tokenizer
+                    self._model = model  # set last: other threads check it unlocked
+        return self._model
+
+    @property
+    def dim(self) -> int:
+        return self._load().config.hidden_size
+
+    def _batches(self, lengths: List[int]) -> Iterable[List[int]]:
+        batch = []
+        for i in np.argsort(lengths, kind="stable"):
+            # Ascending lengths: the text being added sets the padded width
+            if batch and (len(batch) >= self.batch_size or lengths[i] * (len(batch) + 1) > self.max_batch_tokens):
+                yield batch
+                batch = []
+            batch.append(int(i))
+        if batch:
+            yield batch
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        """
+        (len(texts), dim) float32 array of unit vectors, in input order.
+        """
+        model = self._load()
+        out = np.zeros((len(texts), model.config.hidden_size), dtype=np.float32)
+        if not texts:
+            return out
+        encoded = self._tokenizer(list(texts), truncation=True, max_length=self.max_length)
+        torch = self._torch
+        with torch.inference_mode():
+            for batch in self._batches([len(ids) for ids in encoded["input_ids"]]):
+                inputs = self._tokenizer.pad(
+                    {name: [values[i] for i in batch] for name, values in encoded.items()},
+                    return_tensors="pt"
+                )
+                hidden = model(**inputs).last_hidden_state
+                mask = inputs["attention_mask"].unsqueeze(-1).to(hidden.dtype)
+                pooled = (hidden * mask).sum(dim=1) / mask.sum(dim=1).clamp(min=1)
+                out[batch] = pooled.numpy()
+        return normalize_rows(out)
+
+
+# ---------------------- VECTOR CACHE ----------------------
+
+class VectorCache:
+    def __init__(self, root, namespace: str):
+        """
+        Append-only on-disk store of embeddings keyed by content hash, one
+        directory per vector space (Embedder.model_id):
+          meta.json     {"dim": d}
+          keys.txt      one key per line, in row order
+          vectors.f32   float32 rows (memory-mapped for reads)
+        Vectors are written before their keys and appends are serialized with
+        an flock, so a torn append is discarded by the next writer. Appends
+        made by other processes are picked up on lookup.
+        """
+        self.root = Path(root) / namespace
+        self.dim: Optional[int] = None
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self._rows: Dict[str, int] = {}  # key -> row
+        self._count = 0  # key lines read so far
+        self._keys_offset = 0  # bytes of keys.txt read so far
+        self._vectors = None  # memmap over the first self._count rows
+        self._lock = threading.Lock()
+
+    def _read_new_keys(self) -> None:
+        # Caller holds self._lock
+        if self.dim is None:
+            try:
+                self.dim = json.loads((self.root / "meta.json").read_text(encoding="utf-8"))["dim"]
+            except (OSError, ValueError, KeyError):
+                return
+        try:
+            with open(self.root / "keys.txt", "rb") as f:
+                f.seek(self._keys_offset)
+                data = f.read()
+        except OSError:
+            return
+        data = data[: data.rfind(b"\n") + 1]  # complete lines only
+        if not data:
+            return
+        for key in data.decode("ascii").splitlines():
+            self._rows.setdefault(key, self._count)
+            self._count += 1
+        self._keys_offset += len(data)
+        self._vectors = np.memmap(self.root / "vectors.f32", dtype=np.float32, mode="r", shape=(self._count, self.dim))
+
+    def get_many(self, keys: List[str]) -> Tuple[List[int], np.ndarray]:
+        """
+        Positions in keys that are cached, and their vectors (same order).
+        """
+        with self._lock:
+            if any(key not in self._rows for key in keys):
+                self._read_new_keys()
+            found = [i for i, key in enumerate(keys) if key in self._rows]
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+            if not found:
+                return [], np.zeros((0, self.dim or 0), dtype=np.float32)
+            return found, np.asarray(self._vectors[[self._rows[keys[i]] for i in found]])
+
+    def put_many(self, keys: List[str], vectors: np.ndarray) -> None:
+        """
+        Append vectors for keys that are not cached yet.
+        """
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        try:
+            self.root.mkdir(parents=True, exist_ok=True)
+            with self._lock, open(self.root / ".lock", "a") as lock:
+                if fcntl is not None:
+                    fcntl.flock(lock, fcntl.LOCK_EX)
+                self._read_new_keys()
+                if self.dim is None:
+                    self.dim = vectors.shape[1]
+                    (self.root / "meta.json").write_text(json.dumps({"dim": self.dim}), encoding="utf-8")
+                elif vectors.shape[1] != self.dim:
+                    raise ValueError(f"vector size {vectors.shape[1]} does not match cache ({self.dim})")
+
+                fresh = {}
+                for key, vector in zip(keys, vectors):
+                    if key not in self._rows:
+                        fresh.setdefault(key, vector)
+                if not fresh:
+                    return
+                with open(self.root / "vectors.f32", "ab") as f:
+                    f.truncate(self._count * self.dim * 4)  # drop rows of a torn append
+                    f.write(np.stack(list(fresh.values())).tobytes())
+                    f.flush()
+                    os.fsync(f.fileno())
+                with open(self.root / "keys.txt", "ab") as f:
+                    f.truncate(self._keys_offset)
+                    f.write("".join(f"{key}\n" for key in fresh).encode("ascii"))
+                    f.flush()
+                    os.fsync(f.fileno())
+                self.writes += len(fresh)
+                self._read_new_keys()
+        except (OSError, ValueError) as e:
+            print(f"[Semantic Index] Failed to cache vectors in {self.root}: {e}")
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "root": str(self.root),
+                "vectors": self._count,
+                "dim": self.dim,
+                "hits": self.hits,
+                "misses": self.misses,
+                "writes": self.writes,
+            }
+
+
+# ---------------------- SEARCH INDEX ----------------------
+
+class SemanticIndex:
+    def __init__(
+        self,
+        embedder,
+        cache: Optional[VectorCache] = None,
+        min_score: float = 0.3,
+        ann_lists: int = 0,
+        ann_probe: int = 8,
+        ann_min_rows: int = 20000
+    ):
+        """
+        Dense counterpart of TfidfIndex for short texts (outline entries):
+        one embedding row per id, scored by cosine similarity with NumPy.
+        embedder: object with embed(texts) -> unit vectors (see Embedder).
+        cache: VectorCache, so each distinct text is embedded only once.
+        min_score: similarity floor callers use by default (embedding scores
+        run higher than TF-IDF ones).
+
+        Rows live in a preallocated matrix. Removing a row zeroes it in place
+        and reorganizations publish a new IndexState, so searches run without
+        the lock and never see rows move under them.
+
+        ann_lists > 0 enables an inverted-file ANN: once the index holds
+        ann_min_rows rows, spherical k-means splits it into ann_lists lists,
+        rows are laid out list by list, and a search scores only the
+        contiguous rows of the ann_probe closest lists (plus rows added since,
+        until the next training).
+        """
+        self.embedder = embedder
+        self.cache = cache
+        self.min_score = min_score
+        self.ann_lists = ann_lists
+        self.ann_probe = ann_probe
+        self.ann_min_rows = ann_min_rows
+        self.embedded = 0  # texts run through the model
+        self._lock = threading.RLock()
+        self.clear()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._rows: Dict[str, int] = {}  # id -> row
+            self._dead = 0  # zeroed rows of removed ids
+            self._trained_rows = 0  # rows laid out by list at the last training
+            self._state = IndexState(np.zeros((0, 0), np.float32), [], np.zeros(0, np.int32), None, None)
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def __contains__(self, row_id) -> bool:
+        return row_id in self._rows
+
+    # ---------------------- VECTORS ----------------------
+
+    def vectors(self, texts: List[str]) -> np.ndarray:
+        """
+        Unit vectors for texts: cached ones are read back, the rest are
+        embedded (each distinct text once) and added to the cache.
+        """
+        keys = [content_key(text) for text in texts]
+        unique = list(dict.fromkeys(keys))
+        by_key: Dict[str, np.ndarray] = {}
+        if self.cache is not None:
+            found, cached = self.cache.get_many(unique)
+            by_key.update(zip((unique[i] for i in found), cached))
+        missing = [key for key in unique if key not in by_key]
+        if missing:
+            text_of = dict(zip(keys, texts))
+            embedded = self.embedder.embed([text_of[key] for key in missing])
+            self.embedded += len(missing)
+            if self.cache is not None:
+                self.cache.put_many(missing, embedded)
+            by_key.update(zip(missing, embedded))
+        if not keys:
+            return np.zeros((0, 0), np.float32)
+        return np.stack([by_key[key] for key in keys]).astype(np.float32, copy=False)
+
+    # ---------------------- MUTATION ----------------------
+
+    def add_many(self, items: Iterable[Tuple[str, str]]) -> None:
+        """
+        Index (or re-index) (row_id, text) pairs; the last text of a
+        repeated id wins. Embedding happens outside the lock.
+        """
+        batch = dict(items)
+        if not batch:
+            return
+        vectors = self.vectors(list(batch.values()))
+        with self._lock:
+            for row_id in batch:
+                if row_id in self._rows:
+                    self._drop(row_id)
+            self._append(list(batch), vectors)
+
+    def remove_many(self, row_ids: Iterable[str]) -> List[str]:
+        with self._lock:
+            removed = [row_id for row_id in row_ids if row_id in self._rows]
+            for row_id in removed:
+                self._drop(row_id)
+            if self._dead > max(1024, len(self._rows)):
+                self._compact()
+            return removed
+
+    def _append(self, row_ids: List[str], vectors: np.ndarray) -> None:
+        state = self._state
+        matrix, lists = state.matrix, state.lists
+        n, m = len(state.ids), len(row_ids)
+        if matrix.shape[1] != vectors.shape[1]:
+            if n:
+                raise ValueError(f"vector size {vectors.shape[1]} does not match the index ({matrix.shape[1]})")
+            matrix = np.zeros((0, vectors.shape[1]), np.float32)
+        if n + m > len(matrix):
+            capacity = max(1024, 2 * (n + m))
+            grown = np.zeros((capacity, vectors.shape[1]), np.float32)
+            grown[:n] = matrix[:n]
+            grown_lists = np.full(capacity, -1, np.int32)
+            grown_lists[:n] = lists[:n]
+            matrix, lists = grown, grown_lists
+            self._state = state._replace(matrix=matrix, lists=lists)
+        matrix[n:n + m] = vectors
+        if state.centroids is not None:
+            lists[n:n + m] = np.argmax(vectors @ state.centroids.T, axis=1)
+        for i, row_id in enumerate(row_ids):
+            self._rows[row_id] = n + i
+        state.ids.extend(row_ids)  # publishes the rows to searches
+
+    def _drop(self, row_id: str) -> None:
+        row = self._rows.pop(row_id)
+        state = self._state
+        state.ids[row] = None
+        state.matrix[row] = 0.0
+        state.lists[row] = -1
+        self._dead += 1
+
+    def _live_rows(self) -> np.ndarray:
+        ids = self._state.ids
+        return np.flatnonzero(np.fromiter((row_id is not None for row_id in ids), dtype=bool, count=len(ids)))
+
+    def _relayout(self, order: np.ndarray, centroids, bounds, lists: Optional[np.ndarray] = None) -> None:
+        """
+        Publish a new state holding rows `order` of the current one, in that
+        order. lists: list of each of those rows (default: unchanged).
+        """
+        state = self._state
+        matrix = np.zeros((max(1024, 2 * len(order)), state.matrix.shape[1]), np.float32)
+        matrix[:len(order)] = state.matrix[order]
+        new_lists = np.full(len(matrix), -1, np.int32)
+        new_lists[:len(order)] = state.lists[order] if lists is None else lists
+        ids = [state.ids[i] for i in order]
+        self._rows = {row_id: i for i, row_id in enumerate(ids)}
+        self._dead = 0
+        self._state = IndexState(matrix, ids, new_lists, centroids, bounds)
+
+    def _compact(self) -> None:
+        state = self._state
+        keep = self._live_rows()
+        # Order is preserved, so the list layout only needs its bounds shifted
+        bounds = None if state.bounds is None else np.searchsorted(keep, state.bounds)
+        self._relayout(keep, state.centroids, bounds)
+
+    # ---------------------- APPROXIMATE SEARCH ----------------------
+
+    def _train(self, iterations: int = 10, seed: int = 0) -> None:
+        """
+        Spherical k-means over a sample of the live rows, then lay every row
+        out grouped by its closest centroid.
+        """
+        with self._lock:
+            if not self._needs_training():
+                return  # trained by a concurrent search
+            matrix = self._state.matrix
+            live = self._live_rows()
+            k = min(self.ann_lists, len(live))
+            rng = np.random.default_rng(seed)
+            sample = matrix[np.sort(rng.choice(live, min(len(live), 64 * k), replace=False))]
+            centroids = sample[rng.choice(len(sample), k, replace=False)]
+            for _ in range(iterations):
+                assign = np.argmax(sample @ centroids.T, axis=1)
+                order = np.argsort(assign, kind="stable")
+                present, starts = np.unique(assign[order], return_index=True)
+                centroids = centroids.copy()
+                # Empty lists keep their old centroid
+                centroids[present] = normalize_rows(np.add.reduceat(sample[order], starts, axis=0))
+
+            assign = np.empty(len(live), np.int32)
+            for start in range(0, len(live), 65536):
+                assign[start:start + 65536] = np.argmax(matrix[live[start:start + 65536]] @ centroids.T, axis=1)
+            order = np.argsort(assign, kind="stable")
+            bounds = np.searchsorted(assign[order], np.arange(k + 1))
+            self._relayout(live[order], centroids, bounds, lists=assign[order])
+            self._trained_rows = len(live)
+
+    def _needs_training(self) -> bool:
+        state = self._state
+        if len(self._rows) < self.ann_min_rows:
+            return False
+        # Retrain once rows added since the last training (scanned
+        # separately by every search) reach half the laid-out ones
+        return state.centroids is None or len(state.ids) - state.bounds[-1] > self._trained_rows // 2
+
+    # ---------------------- QUERY ----------------------
+
+    def search(self, text: str, top_k: Optional[int] = 10, min_score: Optional[float] = None) -> List[Tuple[str, float]]:
+        """
+        (row_id, cosine score) pairs with score > min_score (default
+        self.min_score), best first, at most top_k of them.
+        """
+        if not self._rows or top_k == 0:
+            return []
+        return self.search_vector(self.embedder.embed([text])[0], top_k=top_k, min_score=min_score)
+
+    def search_vector(
+        self,
+        query: np.ndarray,
+        top_k: Optional[int] = 10,
+        min_score: Optional[float] = None,
+        exact: bool = False
+    ) -> List[Tuple[str, float]]:
+        """
+        search() for an already embedded (unit) query vector. exact skips
+        the ANN lists and scores every row.
+        """
+        if self.ann_lists and not exact and self._needs_training():
+            self._train()
+        state = self._state
+        n = len(state.ids)
+        if not n or top_k == 0:
+            return []
+        query = np.asarray(query, dtype=np.float32)
+        min_score = self.min_score if min_score is None else min_score
+
+        if state.centroids is not None and not exact:
+            bounds = state.bounds
+            probe = np.argpartition(-(state.centroids @ query), min(self.ann_probe, len(bounds) - 1) - 1)
+            probe = probe[:self.ann_probe]
+            laid_out = int(bounds[-1])
+            tail = laid_out + np.flatnonzero(np.isin(state.lists[laid_out:n], probe))
+            candidates = np.concatenate([np.arange(bounds[l], bounds[l + 1]) for l in probe] + [tail])
+            scores = np.concatenate(
+                [state.matrix[bounds[l]:bounds[l + 1]] @ query for l in probe] + [state.matrix[tail] @ query]
+            )
+        else:
+            scores = state.matrix[:n] @ query
+            candidates = np.arange(len(scores))
+
+        keep = scores > min_score
+        candidates, scores = candidates[keep], scores[keep]
+        if top_k is not None and top_k < len(scores):
+            part = np.argpartition(-scores, top_k - 1)[:top_k]
+            candidates, scores = candidates[part], scores[part]
+
+        order = np.lexsort((candidates, -scores))  # best first, ties in insertion order
+        results = []
+        for row, score in zip(candidates[order], scores[order]):
+            row_id = state.ids[row]
+            if row_id is not None:  # removed since the scores were taken
+                results.append((row_id, float(score)))
+        return results
+
+    def stats(self) -> Dict:
+        centroids = self._state.centroids
+        return {
+            "rows": len(self._rows),
+            "embedded": self.embedded,
+            "ann_lists": 0 if centroids is None else len(centroids),
+            "cache": self.cache.stats() if self.cache is not None else None,
+        }
+
+
+def semantic_index_from_env() -> Optional[SemanticIndex]:
+    """
+    Semantic section index configured from the environment, or None (TF-IDF
+    only) when no model is configured or torch/transformers are missing:
+      TECHVERSE_SEMANTIC_MODEL         local model directory (required)
+      TECHVERSE_SEMANTIC_BATCH         texts per batch (default 32)
+      TECHVERSE_SEMANTIC_INT8=1        int8 dynamic quantization
+      TECHVERSE_SEMANTIC_THREADS       torch CPU threads (default torch's)
+      TECHVERSE_SEMANTIC_MIN_SCORE     similarity floor (default 0.3)
+      TECHVERSE_SEMANTIC_ANN_LISTS     inverted-file lists (default 0 = exact)
+      TECHVERSE_SEMANTIC_ANN_PROBE     lists searched per query (default 8)
+      TECHVERSE_VECTOR_CACHE=0         do not persist vectors
+      TECHVERSE_VECTOR_DIR             vector cache directory (default app/cache/vectors)
+    """
+    model_path = os.getenv("TECHVERSE_SEMANTIC_MODEL")
+    if not model_path:
+        return None
+    if importlib.util.find_spec("torch") is None or importlib.util.find_spec("transformers") is None:
+        print("[Semantic Index] torch/transformers not installed; using TF-IDF only")
+        return None
+    if not Path(model_path).is_dir():
+        print(f"[Semantic Index] Model directory {model_path} not found; using TF-IDF only")
+        return None
+
+    embedder = Embedder(
+        model_path,
+        batch_size=max(1, int(os.getenv("TECHVERSE_SEMANTIC_BATCH", "32"))),
+        quantize=os.getenv("TECHVERSE_SEMANTIC_INT8", "0") == "1",
+        threads=int(os.getenv("TECHVERSE_SEMANTIC_THREADS", "0")),
+    )
+    cache = None
+    if os.getenv("TECHVERSE_VECTOR_CACHE", "1") != "0":
+        cache = VectorCache(os.getenv("TECHVERSE_VECTOR_DIR") or DEFAULT_VECTOR_DIR, embedder.model_id)
+    return SemanticIndex(
+        embedder,
+        cache=cache,
+        min_score=float(os.getenv("TECHVERSE_SEMANTIC_MIN_SCORE", "0.3")),
+        ann_lists=max(0, int(os.getenv("TECHVERSE_SEMANTIC_ANN_LISTS", "0"))),
+        ann_probe=max(1, int(os.getenv("TECHVERSE_SEMANTIC_ANN_PROBE", "8"))),
+    )
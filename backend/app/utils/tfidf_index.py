@@ -0,0 +1,406 @@
+# File: app/utils/tfidf_index.py
+
+import threading
+from collections import Counter, namedtuple
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+import numpy as np
+
+# Immutable view of the index at one point in time. matrix holds one
+# l2-normalized TF-IDF row per document; postings is the same data in CSC
+# form, i.e. an inverted index (term column -> documents containing it).
+IndexSnapshot = namedtuple("IndexSnapshot", ["doc_ids", "matrix", "weights", "postings"])
+
+
+class TfidfIndex:
+    def __init__(self, max_features: Optional[int] = 1000, stop_words: Optional[str] = "english"):
+        """
+        Incrementally maintained TF-IDF index, equivalent to refitting
+        TfidfVectorizer(max_features, stop_words) on all stored texts.
+
+        Each document keeps its raw term counts; the index keeps document
+        frequencies and corpus term totals. Adding or removing a document only
+        touches that document's terms. IDF weights, the max_features
+        vocabulary cut and row norms are recomputed lazily (vectorized) the
+        first time the index is queried after a change.
+        """
+        self.max_features = max_features
+        self.stop_words = stop_words
+        self.vocabulary: Dict[str, int] = {}  # term -> column id (ids are never reused)
+        self.terms: List[str] = []
+        self._df = np.zeros(0, dtype=np.int64)  # documents containing each term
+        self._tf = np.zeros(0, dtype=np.int64)  # corpus-wide count of each term
+        self._rows: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}  # doc_id -> (cols, counts)
+        self._analyzer = None
+        self._lock = threading.RLock()
+        self._snapshot = None  # IndexSnapshot, rebuilt when stale
+
+    # ---------------------- TOKENIZATION ----------------------
+
+    @property
+    def analyzer(self):
+        if self._analyzer is None:
+            from sklearn.feature_extraction.text import TfidfVectorizer
+
+            # Same preprocessing/tokenization/stop words as a full refit would use
+            self._analyzer = TfidfVectorizer(stop_words=self.stop_words).build_analyzer()
+        return self._analyzer
+
+    def _term_counts(self, text: str, grow: bool) -> Tuple[np.ndarray, np.ndarray]:
+        counts = Counter(self.analyzer(text))
+        cols, values = [], []
+        for term, count in counts.items():
+            col = self.vocabulary.get(term)
+            if col is None:
+                if not grow:
+                    continue
+                col = self._new_term(term)
+            cols.append(col)
+            values.append(count)
+        return np.asarray(cols, dtype=np.int64), np.asarray(values, dtype=np.int64)
+
+    def _new_term(self, term: str) -> int:
+        col = len(self.terms)
+        self.vocabulary[term] = col
+        self.terms.append(term)
+        if col >= len(self._df):
+            capacity = max(1024, 2 * len(self._df))
+            self._df = np.concatenate([self._df, np.zeros(capacity - len(self._df), np.int64)])
+            self._tf = np.concatenate([self._tf, np.zeros(capacity - len(self._tf), np.int64)])
+        return col
+
+    # ---------------------- MUTATION ----------------------
+
+    def add(self, doc_id: str, text: str) -> None:
+        """
+        Index (or re-index) one document's text.
+        """
+        with self._lock:
+            if doc_id in self._rows:
+                self._drop_counts(doc_id)
+            cols, counts = self._term_counts(text, grow=True)
+            self._df[cols] += 1
+            self._tf[cols] += counts
+            self._rows[doc_id] = (cols, counts)
+            self._snapshot = None
+
+    def add_many(self, items: Iterable[Tuple[str, str]]) -> None:
+        """
+        Index many (doc_id, text) pairs with one lock acquisition and one
+        vectorized frequency update. Later duplicates of a doc_id win.
+        """
+        batch = dict(items)
+        if not batch:
+            return
+        with self._lock:
+            for doc_id in batch:
+                if doc_id in self._rows:
+                    self._drop_counts(doc_id)  # keeps its row position, as add() does
+            rows = [self._term_counts(text, grow=True) for text in batch.values()]
+            all_cols = np.concatenate([cols for cols, _ in rows])
+            all_counts = np.concatenate([counts for _, counts in rows])
+            np.add.at(self._df, all_cols, 1)
+            np.add.at(self._tf, all_cols, all_counts)
+            self._rows.update(zip(batch, rows))
+            self._snapshot = None
+
+    def remove(self, doc_id: str) -> bool:
+        """
+        Drop one document; returns False if it was not indexed.
+        """
+        with self._lock:
+            if doc_id not in self._rows:
+                return False
+            self._drop_counts(doc_id)
+            del self._rows[doc_id]
+            self._snapshot = None
+            return True
+
+    def remove_many(self, doc_ids: Iterable[str]) -> List[str]:
+        """
+        Drop several documents with one lock acquisition and one vectorized
+        frequency update; returns the ids that were indexed.
+        """
+        with self._lock:
+            removed = [doc_id for doc_id in dict.fromkeys(doc_ids) if doc_id in self._rows]
+            if not removed:
+                return []
+            rows = [self._rows.pop(doc_id) for doc_id in removed]
+            all_cols = np.concatenate([cols for cols, _ in rows])
+            all_counts = np.concatenate([counts for _, counts in rows])
+            np.subtract.at(self._df, all_cols, 1)
+            np.subtract.at(self._tf, all_cols, all_counts)
+            self._snapshot = None
+            return removed
+
+    def _drop_counts(self, doc_id: str) -> None:
+        cols, counts = self._rows[doc_id]
+        self._df[cols] -= 1
+        self._tf[cols] -= counts
+
+    def rebuild(self, items: Iterable[Tuple[str, str]]) -> None:
+        """
+        Replace the whole index with (doc_id, text) pairs.
+        """
+        with self._lock:
+            self.clear()
+            for doc_id, text in items:
+                self.add(doc_id, text)
+
+    def clear(self) -> None:
+        with self._lock:
+            self.vocabulary = {}
+            self.terms = []
+            self._df = np.zeros(0, dtype=np.int64)
+            self._tf = np.zeros(0, dtype=np.int64)
+            self._rows = {}
+            self._snapshot = None
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def __contains__(self, doc_id) -> bool:
+        return doc_id in self._rows
+
+    # ---------------------- LAZY WEIGHTING ----------------------
+
+    def _feature_weights(self) -> np.ndarray:
+        """
+        Per-column weight: smoothed IDF for selected features, 0 otherwise.
+        Selection is the max_features terms with the highest corpus counts,
+        chosen exactly as CountVectorizer does (argsort over the
+        alphabetically sorted vocabulary) so ties resolve the same way.
+        """
+        n_terms = len(self.terms)
+        df = self._df[:n_terms]
+        tf = self._tf[:n_terms]
+        live = np.flatnonzero(df > 0)
+
+        if self.max_features is not None and len(live) > self.max_features:
+            live = live[np.argsort(np.array([self.terms[c] for c in live], dtype=object))]
+            live = live[(-tf[live]).argsort()[: self.max_features]]
+
+        n_docs = len(self._rows)
+        weights = np.zeros(n_terms)
+        weights[live] = np.log((1 + n_docs) / (1 + df[live])) + 1.0
+        return weights
+
+    def _refresh(self):
+        from scipy import sparse
+
+        doc_ids = list(self._rows)
+        weights = self._feature_weights()
+
+        lengths = np.fromiter((len(self._rows[d][0]) for d in doc_ids), np.int64, len(doc_ids))
+        cols = np.concatenate([self._rows[d][0] for d in doc_ids]) if doc_ids else np.zeros(0, np.int64)
+        counts = np.concatenate([self._rows[d][1] for d in doc_ids]) if doc_ids else np.zeros(0, np.int64)
+        row_of = np.repeat(np.arange(len(doc_ids)), lengths)
+
+        data = counts * weights[cols]
+        keep = data != 0
+        cols, data, row_of = cols[keep], data[keep], row_of[keep]
+
+        norms = np.sqrt(np.bincount(row_of, weights=data * data, minlength=len(doc_ids)))
+        data = data / norms[row_of]
+
+        indptr = np.zeros(len(doc_ids) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(row_of, minlength=len(doc_ids)), out=indptr[1:])
+        matrix = sparse.csr_matrix((data, cols, indptr), shape=(len(doc_ids), len(weights)))
+        matrix.sort_indices()
+        self._snapshot = IndexSnapshot(doc_ids, matrix, weights, matrix.tocsc())
+        return self._snapshot
+
+    def snapshot(self) -> IndexSnapshot:
+        """
+        Consistent view of the index: rows are l2-normalized TF-IDF vectors
+        in insertion order.
+        """
+        with self._lock:
+            return self._snapshot or self._refresh()
+
+    # ---------------------- QUERIES ----------------------
+
+    def transform(self, texts: List[str], weights: Optional[np.ndarray] = None):
+        """
+        Vectorize texts against the current index (unknown terms are ignored).
+        """
+        from scipy import sparse
+
+        with self._lock:
+            if weights is None:
+                weights = self.snapshot().weights
+            rows = [self._term_counts(text, grow=False) for text in texts]
+
+        indptr = [0]
+        all_cols, all_data = [], []
+        for cols, counts in rows:
+            # Terms added after the snapshot was taken have no weight yet
+            in_range = cols < len(weights)
+            cols, counts = cols[in_range], counts[in_range]
+            data = counts * weights[cols]
+            keep = data != 0
+            cols, data = cols[keep], data[keep]
+            norm = np.sqrt(np.dot(data, data))
+            if norm:
+                data = data / norm
+            all_cols.append(cols)
+            all_data.append(data)
+            indptr.append(indptr[-1] + len(cols))
+
+        cols = np.concatenate(all_cols) if all_cols else np.zeros(0, np.int64)
+        data = np.concatenate(all_data) if all_data else np.zeros(0)
+        return sparse.csr_matrix((data, cols, indptr), shape=(len(texts), len(weights)))
+
+    def similarities(self, text: str) -> Tuple[List[str], np.ndarray]:
+        """
+        Cosine similarity of text against every indexed document.
+        """
+        snap = self.snapshot()
+        if not snap.doc_ids:
+            return [], np.zeros(0)
+        query = self.transform([text], snap.weights)
+        return snap.doc_ids, (snap.matrix @ query.T).toarray().ravel()
+
+    def search(self, text: str, top_k: Optional[int] = None, min_score: float = 0.0) -> List[Tuple[str, float]]:
+        """
+        (doc_id, cosine score) pairs with score > min_score, best first, at
+        most top_k of them. Only documents sharing a term with the query are
+        scored (via the postings lists), and top_k uses partial selection.
+        """
+        snap = self.snapshot()
+        if not snap.doc_ids or top_k == 0:
+            return []
+        query = self.transform([text], snap.weights)
+        if not query.nnz:
+            return []
+
+        postings = snap.postings
+        starts = postings.indptr[query.indices]
+        ends = postings.indptr[query.indices + 1]
+        lengths = ends - starts
+        if not lengths.sum():
+            return []
+
+        # Gather every posting of every query term, weighted by the query value
+        offsets = np.repeat(starts - np.cumsum(lengths) + lengths, lengths) + np.arange(lengths.sum())
+        rows = postings.indices[offsets]
+        contrib = postings.data[offsets] * np.repeat(query.data, lengths)
+
+        candidates, inverse = np.unique(rows, return_inverse=True)
+        scores = np.bincount(inverse, weights=contrib)
+        return self._top(snap, candidates, scores, top_k, min_score)
+
+    def search_many(
+        self,
+        texts: List[str],
+        top_k: Union[Optional[int], List[Optional[int]]] = None,
+        min_score: float = 0.0
+    ) -> List[List[Tuple[str, float]]]:
+        """
+        search() for several texts against one snapshot: a single transform
+        and one sparse matrix product for the whole batch. top_k is shared
+        or given per text. Each result equals search() for that text (scores
+        are accumulated in the same order).
+        """
+        top_ks = list(top_k) if isinstance(top_k, (list, tuple)) else [top_k] * len(texts)
+        snap = self.snapshot()
+        if not snap.doc_ids or not texts:
+            return [[] for _ in texts]
+        queries = self.transform(texts, snap.weights)
+        scores = queries @ snap.postings.T  # (texts x documents), CSR
+        return [
+            self._top(
+                snap,
+                scores.indices[scores.indptr[i]:scores.indptr[i + 1]],
+                scores.data[scores.indptr[i]:scores.indptr[i + 1]],
+                k,
+                min_score
+            )
+            for i, k in enumerate(top_ks)
+        ]
+
+    @staticmethod
+    def _top(snap, candidates, scores, top_k, min_score) -> List[Tuple[str, float]]:
+        """
+        Best (doc_id, score) pairs among candidate rows, best first.
+        """
+        if top_k == 0:
+            return []
+        keep = scores > min_score
+        candidates, scores = candidates[keep], scores[keep]
+        if top_k is not None and top_k < len(scores):
+            part = np.argpartition(-scores, top_k - 1)[:top_k]
+            candidates, scores = candidates[part], scores[part]
+
+        order = np.lexsort((candidates, -scores))  # best first, ties in insertion order
+        return [(snap.doc_ids[i], float(scores[i_s])) for i, i_s in zip(candidates[order], order)]
+
+    # ---------------------- PERSISTENCE ----------------------
+
+    def export_state(self) -> Tuple[Dict[str, np.ndarray], Dict]:
+        """
+        Full index state as flat arrays (raw per-document counts plus the
+        weighted matrix and postings) and JSON-able metadata.
+        """
+        with self._lock:
+            snap = self.snapshot()
+            rows = [self._rows[doc_id] for doc_id in snap.doc_ids]
+            row_ptr = np.zeros(len(rows) + 1, dtype=np.int64)
+            np.cumsum([len(cols) for cols, _ in rows], out=row_ptr[1:])
+            n_terms = len(self.terms)
+            arrays = {
+                "df": self._df[:n_terms],
+                "tf": self._tf[:n_terms],
+                "row_ptr": row_ptr,
+                "row_cols": np.concatenate([cols for cols, _ in rows]) if rows else np.zeros(0, np.int64),
+                "row_counts": np.concatenate([counts for _, counts in rows]) if rows else np.zeros(0, np.int64),
+                "weights": snap.weights,
+                "matrix_data": snap.matrix.data,
+                "matrix_indices": snap.matrix.indices,
+                "matrix_indptr": snap.matrix.indptr,
+                "postings_data": snap.postings.data,
+                "postings_indices": snap.postings.indices,
+                "postings_indptr": snap.postings.indptr,
+            }
+            meta = {
+                "doc_ids": list(snap.doc_ids),
+                "terms": list(self.terms),
+                "max_features": self.max_features,
+                "stop_words": self.stop_words,
+            }
+            return arrays, meta
+
+    def load_state(self, arrays: Dict[str, np.ndarray], meta: Dict) -> None:
+        """
+        Restore from export_state output. Arrays may be read-only memory
+        maps: per-document rows and the matrix are used in place, only the
+        (small) frequency counters are copied so the index stays mutable.
+        """
+        from scipy import sparse
+
+        with self._lock:
+            self.max_features = meta["max_features"]
+            self.stop_words = meta["stop_words"]
+            self.terms = list(meta["terms"])
+            self.vocabulary = {term: col for col, term in enumerate(self.terms)}
+            self._df = np.array(arrays["df"], dtype=np.int64)
+            self._tf = np.array(arrays["tf"], dtype=np.int64)
+
+            doc_ids = list(meta["doc_ids"])
+            row_ptr = np.asarray(arrays["row_ptr"]).tolist()
+            # Plain ndarray views of the same buffers: slicing np.memmap is far slower
+            cols = np.asarray(arrays["row_cols"]).view(np.ndarray)
+            counts = np.asarray(arrays["row_counts"]).view(np.ndarray)
+            self._rows = {
+                doc_id: (cols[row_ptr[i]:row_ptr[i + 1]], counts[row_ptr[i]:row_ptr[i + 1]])
+                for i, doc_id in enumerate(doc_ids)
+            }
+
+            shape = (len(doc_ids), len(self.terms))
+            matrix = sparse.csr_matrix(
+                (arrays["matrix_data"], arrays["matrix_indices"], arrays["matrix_indptr"]), shape=shape
+            )
+            postings = sparse.csc_matrix(
+                (arrays["postings_data"], arrays["postings_indices"], arrays["postings_indptr"]), shape=shape
+            )
+            self._snapshot = IndexSnapshot(doc_ids, matrix, arrays["weights"], postings)
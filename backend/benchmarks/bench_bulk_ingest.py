@@ -0,0 +1,88 @@
+"""
+RecommendationEngine ingest time: add_document per file vs add_documents batch.
+
+The "refit" column replays the old behaviour (TfidfVectorizer refit over the
+whole library after every document) and is skipped above --refit-max.
+
+Usage (from backend/):
+    python benchmarks/bench_bulk_ingest.py [--sizes 1 10 100 1000] [--refit-max 100]
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+
+def make_items(n, seed=0):
+    rng = random.Random(seed)
+    vocab = [f"term{i}" for i in range(3000)]
+    weights = [1.0 / (i + 1) for i in range(len(vocab))]
+    items = []
+    for i in range(n):
+        outline = [
+            {"level": "H1", "text": " ".join(rng.choices(vocab, weights, k=6)), "page": p}
+            for p in range(1, 21)
+        ]
+        headings = {"title": f"Document {i}", "outline": outline}
+        items.append((f"/tmp/session/doc{i}.pdf", headings, "Analyst", "Review", "session"))
+    return items
+
+
+def timed(fn):
+    t0 = time.perf_counter()
+    fn()
+    return time.perf_counter() - t0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark bulk document ingest")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 10, 100, 1000])
+    parser.add_argument("--refit-max", type=int, default=100)
+    args = parser.parse_args()
+
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    from app.utils.recommendation_engine import RecommendationEngine
+
+    query = "term1 term7 term42"
+    print(f"{'docs':>6} {'refit/add':>12} {'add_document':>14} {'add_documents':>15}")
+    for n in args.sizes:
+        items = make_items(n)
+
+        refit = 0.0
+        if n <= args.refit_max:
+            def legacy():
+                texts = []
+                for item in items:
+                    texts.append(RecommendationEngine()._extract_text_content(item[1]))
+                    TfidfVectorizer(max_features=1000, stop_words="english").fit_transform(texts)
+            refit = timed(legacy)
+
+        single = RecommendationEngine()
+        def one_by_one():
+            for filepath, headings, persona, job, session_id in items:
+                single.add_document(filepath, headings, persona, job, session_id=session_id)
+            single.index.similarities(query)
+        t_single = timed(one_by_one)
+
+        bulk = RecommendationEngine()
+        def batched():
+            bulk.add_documents(items)
+            bulk.index.similarities(query)
+        t_bulk = timed(batched)
+
+        ids_a, sims_a = single.index.similarities(query)
+        ids_b, sims_b = bulk.index.similarities(query)
+        assert ids_a == ids_b and np.allclose(sims_a, sims_b)
+
+        refit_col = f"{refit * 1000:>10.1f}ms" if n <= args.refit_max else f"{'-':>12}"
+        print(f"{n:>6} {refit_col} {t_single * 1000:>12.1f}ms {t_bulk * 1000:>13.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+1B section scoring: per-section transform + cosine_similarity + keyword
+loop vs score_sections (one transform, one sparse product, keyword and
+length scores as arrays) over a synthetic collection.
+
+Scores must be identical; reports time per section.
+
+Usage (from backend/):
+    python benchmarks/bench_collection_scoring.py [--sections 5000] [--words 200]
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+PERSONA = "Travel Planner"
+JOB = "Plan a trip of 4 days for a group of 10 college friends"
+
+
+def legacy_score_section(sec_text, kw_cache, tfidf_vectorizer, query_vec):
+    from sklearn.metrics.pairwise import cosine_similarity
+    from app.utils.analyze_collections import preprocess
+
+    kw_set = set(kw_cache)
+    sec_vec = tfidf_vectorizer.transform([preprocess(sec_text)])
+    sim = float(cosine_similarity(sec_vec, query_vec)[0][0])
+    lower = sec_text.lower()
+    hits = sum(1 for k in kw_set if k in lower)
+    kw_score = hits / max(len(kw_set), 1)
+    length_score = min(len(sec_text) / 1500.0, 1.0)
+    return 0.6 * sim + 0.3 * kw_score + 0.1 * length_score
+
+
+def make_sections(n, words, seed=0):
+    rng = random.Random(seed)
+    vocab = [f"word{i}" for i in range(3000)] + [
+        "trip", "itinerary", "hotel", "beach", "nightlife", "restaurants", "budget", "friends",
+        "group", "activities", "travel", "museum", "tips", "packing", "city", "coast",
+    ]
+    return [" ".join(rng.choices(vocab, k=rng.randrange(words // 4, words * 2))) for _ in range(n)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark batched 1B section scoring")
+    parser.add_argument("--sections", type=int, default=5000)
+    parser.add_argument("--words", type=int, default=200, help="Mean words per section")
+    args = parser.parse_args()
+
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    from app.utils.analyze_collections import persona_job_keywords, preprocess, score_sections
+
+    texts = make_sections(args.sections, args.words)
+    tfidf = TfidfVectorizer(max_features=2000, ngram_range=(1, 2))
+    matrix = tfidf.fit_transform([preprocess(t) for t in texts] + [preprocess(f"{PERSONA} {JOB}")])
+    query_vec = matrix[-1:]
+    kw_cache = persona_job_keywords(PERSONA, JOB)
+
+    t0 = time.perf_counter()
+    expected = [legacy_score_section(t, kw_cache, tfidf, query_vec) for t in texts]
+    legacy = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    scores = score_sections(texts, PERSONA, JOB, kw_cache, tfidf, query_vec)
+    batched = time.perf_counter() - t0
+
+    assert [float(s) for s in scores] == expected, "scores differ"
+    per = 1e6 / len(texts)
+    print(f"{len(texts)} sections, {len(set(kw_cache))} keywords (scores identical)")
+    print(f"per-section: {legacy * per:8.1f} us/section   total {legacy:6.2f} s")
+    print(f"batched:     {batched * per:8.1f} us/section   total {batched:6.2f} s   ({legacy / batched:4.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
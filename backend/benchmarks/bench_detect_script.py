@@ -0,0 +1,75 @@
+"""
+detect_script: legacy nested range loop vs codepoint table + LRU cache.
+
+Usage (from backend/):
+    python benchmarks/bench_detect_script.py [--n 20000]
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+
+def legacy_detect_script(text, ranges, priority):
+    seen_langs = set()
+    for ch in text:
+        code = ord(ch)
+        for lang, lang_ranges in ranges.items():
+            for r_start, r_end in lang_ranges:
+                if r_start <= code <= r_end:
+                    seen_langs.add(lang)
+                    break
+    for lang in priority:
+        if lang in seen_langs:
+            return lang
+    return "en"
+
+
+SAMPLES = {
+    "latin": ["Introduction to Data Pipelines", "3.2 Results and Discussion", "Café Menu Précis"],
+    "cjk": ["第一章 数据处理概述", "システム設計の基本", "目录与索引说明"],
+    "devanagari": ["परिचय और पृष्ठभूमि", "अध्याय 2 परिणाम", "निष्कर्ष एवं सुझाव"],
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark detect_script")
+    parser.add_argument("--n", type=int, default=20000, help="Headings per script")
+    args = parser.parse_args()
+
+    from app.utils import process_pdfs as pp
+
+    rng = random.Random(0)
+    for name, base in SAMPLES.items():
+        # Mostly distinct strings (cold cache) plus a repeated tail (warm cache).
+        texts = [f"{rng.choice(base)} {i}" for i in range(args.n)]
+        texts += [rng.choice(base) for _ in range(args.n)]
+        for t in texts[:200]:
+            assert pp.detect_script(t) == legacy_detect_script(
+                t, pp._SCRIPT_RANGES, pp._SCRIPT_PRIORITY
+            ), t
+
+        pp.detect_script.cache_clear()
+        t0 = time.perf_counter()
+        for t in texts:
+            legacy_detect_script(t, pp._SCRIPT_RANGES, pp._SCRIPT_PRIORITY)
+        legacy = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        for t in texts:
+            pp.detect_script(t)
+        table = time.perf_counter() - t0
+
+        per = 1e6 / len(texts)
+        print(
+            f"{name:>10}: legacy {legacy * per:7.2f} us/heading  "
+            f"table {table * per:6.2f} us/heading  ({legacy / table:5.1f}x)"
+        )
+
+
+if __name__ == "__main__":
+    main()
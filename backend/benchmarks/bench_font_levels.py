@@ -0,0 +1,108 @@
+"""
+Font-size histogram for the H1-H3 level map: per-line Counter (baseline)
+vs font_size_counts on the LineTable columns.
+
+The counts must equal the streaming path's per-line round(size, 1)
+buckets, including sizes on a 0.05 boundary (16.05, 9.95, 12.35) where
+np.round would disagree; both extraction paths must then build the same
+level map. Also checks the two paths end to end on a generated PDF.
+
+Usage (from backend/):
+    python benchmarks/bench_font_levels.py [--lines 200000]
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+from collections import Counter
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import numpy as np
+
+TIE_SIZES = [16.05, 16.1, 9.95, 12.35, 12.3, 10.0, 14.45, 18.05]
+HEADINGS = ["Overview of the Results", "Methods and Materials", "Related Work Summary"]
+BODY = "the results of the survey are shown in the following table for each region"
+
+
+def make_lines(n, rng):
+    from app.utils.process_pdfs import LineInfo
+
+    lines = []
+    for i in range(n):
+        if rng.random() < 0.2:
+            size = rng.choice(TIE_SIZES)
+            if rng.random() < 0.5:
+                size = float(np.float32(size))  # PyMuPDF reports float32 sizes
+            text = f"{rng.choice(HEADINGS)} {i % 50}"
+        else:
+            size, text = 9.0, f"{BODY} {i}"
+        lines.append(LineInfo(text, i // 40, size, False, False, (i % 40) / 40))
+    return lines
+
+
+def streaming_counts(lines):
+    from app.utils.process_pdfs import is_heading_candidate
+
+    size_counts = Counter()
+    for ln in lines:
+        if is_heading_candidate(ln.text):
+            size_counts[round(ln.font_size, 1)] += 1
+    return size_counts
+
+
+def make_pdf(path):
+    import fitz
+
+    doc = fitz.open()
+    for p in range(6):
+        page = doc.new_page()
+        y = 60
+        for i, size in enumerate(TIE_SIZES):
+            page.insert_text((72, y), f"{HEADINGS[i % len(HEADINGS)]} Part {p}{i}", fontsize=size)
+            y += 40
+        page.insert_text((72, y), BODY, fontsize=9)
+    doc.save(path)
+    doc.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the font-size histogram")
+    parser.add_argument("--lines", type=int, default=200000, help="Synthetic lines")
+    args = parser.parse_args()
+
+    from app.utils import process_pdfs as pp
+
+    lines = make_lines(args.lines, random.Random(0))
+    table = pp.LineTable(lines)
+
+    expected = streaming_counts(lines)
+    counts = pp.font_size_counts(table)
+    assert counts == expected, f"histograms differ: {counts} vs {expected}"
+    assert pp.build_font_level_map(table) == pp.font_level_map_from_counts(expected)
+    rounded = np.round(table.font_size, 1)
+    ties = int(np.count_nonzero(rounded != np.array([round(s, 1) for s in table.font_size.tolist()])))
+
+    t0 = time.perf_counter()
+    streaming_counts(lines)
+    legacy = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    pp.font_size_counts(table)
+    columnar = time.perf_counter() - t0
+
+    with tempfile.TemporaryDirectory() as tmp:
+        pdf = os.path.join(tmp, "sizes.pdf")
+        make_pdf(pdf)
+        assert pp.extract_outline_streaming(pdf) == pp.extract_outline_materialized(pdf), "outlines differ"
+
+    print(f"{len(lines)} lines, {len(expected)} sizes, {ties} where np.round differs (counts identical)")
+    print(f"per-line Counter {legacy * 1000:8.2f} ms")
+    print(f"font_size_counts {columnar * 1000:8.2f} ms  ({legacy / columnar:5.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+RecommendationEngine indexing: refit-per-document vs incremental TfidfIndex.
+
+Also checks that the incremental index matches a full TfidfVectorizer refit
+(same similarities within --tol) after adds and removals.
+
+Usage (from backend/):
+    python benchmarks/bench_incremental_index.py [--docs 300] [--tol 1e-9]
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+
+def make_corpus(n_docs, vocab_size=4000, words_per_doc=60, seed=0):
+    rng = random.Random(seed)
+    vocab = [f"term{i}" for i in range(vocab_size)]
+    # Zipf-like weights so some terms are common and max_features matters
+    weights = [1.0 / (i + 1) for i in range(vocab_size)]
+    return [" ".join(rng.choices(vocab, weights, k=words_per_doc)) for _ in range(n_docs)]
+
+
+def refit_similarities(texts, query, max_features):
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    from sklearn.metrics.pairwise import cosine_similarity
+
+    vectorizer = TfidfVectorizer(max_features=max_features, stop_words="english")
+    matrix = vectorizer.fit_transform(texts)
+    return cosine_similarity(vectorizer.transform([query]), matrix)[0]
+
+
+def check_equivalence(texts, queries, max_features, tol):
+    from app.utils.tfidf_index import TfidfIndex
+
+    index = TfidfIndex(max_features=max_features, stop_words="english")
+    live = {}
+    for i, text in enumerate(texts):
+        index.add(f"d{i}", text)
+        live[f"d{i}"] = text
+    # Remove every third document, then re-add a few with new text
+    for i in range(0, len(texts), 3):
+        index.remove(f"d{i}")
+        del live[f"d{i}"]
+    for i in range(0, len(texts), 9):
+        index.add(f"d{i}", texts[-1 - i])
+        live[f"d{i}"] = texts[-1 - i]
+
+    worst = 0.0
+    for query in queries:
+        doc_ids, sims = index.similarities(query)
+        assert doc_ids == list(live), "row order differs from insertion order"
+        expected = refit_similarities(list(live.values()), query, max_features)
+        worst = max(worst, float(np.max(np.abs(sims - expected))))
+    assert worst <= tol, f"max |incremental - refit| = {worst:.3g} > {tol}"
+    return worst
+
+
+def bench_ingest(texts, query):
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    from app.utils.tfidf_index import TfidfIndex
+
+    t0 = time.perf_counter()
+    stored = []
+    for text in texts:
+        stored.append(text)
+        TfidfVectorizer(max_features=1000, stop_words="english").fit_transform(stored)
+    refit = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    index = TfidfIndex(max_features=1000, stop_words="english")
+    for i, text in enumerate(texts):
+        index.add(f"d{i}", text)
+    index.similarities(query)  # pay the lazy reweighting once
+    incremental = time.perf_counter() - t0
+    return refit, incremental
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark incremental TF-IDF indexing")
+    parser.add_argument("--docs", type=int, default=300)
+    parser.add_argument("--tol", type=float, default=1e-9)
+    args = parser.parse_args()
+
+    texts = make_corpus(args.docs)
+    queries = ["term1 term2 term3", "term10 term500 term3999", "term42", "unknown words only"]
+
+    # Small vocabulary (no max_features cut) and large vocabulary (cut at 1000)
+    for vocab_size, max_features in ((300, 1000), (4000, 1000), (4000, None)):
+        corpus = make_corpus(min(args.docs, 200), vocab_size=vocab_size, seed=vocab_size)
+        worst = check_equivalence(corpus, queries, max_features, args.tol)
+        print(f"equivalence vocab={vocab_size:<5} max_features={max_features}: max diff {worst:.2e}")
+
+    refit, incremental = bench_ingest(texts, queries[0])
+    print(
+        f"ingest {args.docs} docs one by one: refit-per-add {refit * 1000:8.1f} ms  "
+        f"incremental {incremental * 1000:8.1f} ms  ({refit / incremental:5.1f}x)"
+    )
+
+
+if __name__ == "__main__":
+    main()
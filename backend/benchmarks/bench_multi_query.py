@@ -0,0 +1,94 @@
+"""
+1B multi-query mode: N persona/job queries over one collection, as N
+process_collection runs (extract, segment and fit per query) vs one
+prepare_collection plus N score_collection passes.
+
+Builds a synthetic collection of PDFs (or uses --collection), checks every
+query's ranked sections and subsections are identical both ways, and
+reports time per query.
+
+Usage (from backend/):
+    python benchmarks/bench_multi_query.py [--collection DIR] [--docs 8] [--pages 12] [--queries 10]
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+from pathlib import Path
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+PERSONAS = ["Travel Planner", "HR professional", "Food Contractor", "Investment Analyst", "PhD Researcher"]
+JOBS = [
+    "Plan a trip of 4 days for a group of 10 college friends",
+    "Create and manage fillable forms for onboarding and compliance",
+    "Prepare a vegetarian buffet-style dinner menu for a corporate gathering",
+    "Analyze revenue trends, R&D investments and market positioning",
+    "Prepare a literature review on methodologies, datasets and benchmarks",
+]
+
+
+def make_collection(root, docs, pages, seed=0):
+    import fitz
+
+    rng = random.Random(seed)
+    vocab = [f"word{i}" for i in range(2500)] + " ".join(PERSONAS + JOBS).lower().split()
+    pdf_dir = Path(root) / "PDFs"
+    pdf_dir.mkdir(parents=True)
+    for d in range(docs):
+        pdf = fitz.open()
+        for p in range(pages):
+            page = pdf.new_page()
+            lines = [f"Section {d}.{p} {' '.join(rng.choices(vocab, k=3)).title()}"]
+            for _ in range(30):
+                lines.append(" ".join(rng.choices(vocab, k=rng.randrange(8, 14))) + ".")
+            page.insert_textbox(fitz.Rect(40, 40, 560, 800), "\n".join(lines), fontsize=8)
+        pdf.save(str(pdf_dir / f"doc{d}.pdf"))
+    return Path(root)
+
+
+def ranked(result):
+    return result["extracted_sections"], result["subsection_analysis"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark 1B multi-query mode")
+    parser.add_argument("--collection", help="Existing collection directory (with PDFs/)")
+    parser.add_argument("--docs", type=int, default=8)
+    parser.add_argument("--pages", type=int, default=12)
+    parser.add_argument("--queries", type=int, default=10)
+    args = parser.parse_args()
+
+    from app.utils.analyze_collections import prepare_collection, process_collection, score_collection
+
+    rng = random.Random(1)
+    queries = [(rng.choice(PERSONAS), rng.choice(JOBS)) for _ in range(args.queries)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        collection = Path(args.collection) if args.collection else make_collection(tmp, args.docs, args.pages)
+
+        t0 = time.perf_counter()
+        expected = [ranked(process_collection(collection, persona, job)) for persona, job in queries]
+        separate = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        prepared = prepare_collection(collection)
+        prepare = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        results = [ranked(score_collection(prepared, persona, job)) for persona, job in queries]
+        scoring = time.perf_counter() - t0
+
+    assert results == expected, "multi-query results differ"
+    shared = prepare + scoring
+    print(f"{len(prepared.documents)} PDFs, {len(prepared.sections)} sections, "
+          f"{len(prepared.page_terms)} corpus terms, {len(queries)} queries (results identical)")
+    print(f"per-query runs:  {separate / len(queries) * 1000:8.1f} ms/query   total {separate:6.2f} s")
+    print(f"shared extract:  {shared / len(queries) * 1000:8.1f} ms/query   total {shared:6.2f} s   "
+          f"(prepare {prepare:.2f} s + {scoring / len(queries) * 1000:.1f} ms/query)   ({separate / shared:4.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
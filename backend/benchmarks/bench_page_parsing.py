@@ -0,0 +1,80 @@
+"""
+Per-page parsing cost: old double decode vs single TextPage pass.
+
+Usage (from backend/):
+    python benchmarks/bench_page_parsing.py [some.pdf] [--pages 300]
+
+Without a PDF argument a text-heavy synthetic document is generated.
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+
+def make_text_heavy_pdf(path, pages):
+    import fitz
+
+    doc = fitz.open()
+    para = "Lorem ipsum dolor sit amet, consectetur adipiscing elit sed do eiusmod. " * 2
+    for i in range(pages):
+        page = doc.new_page()
+        page.insert_text((72, 60), f"{i + 1}. Section heading {i + 1}", fontsize=16)
+        y = 90
+        while y < 780:
+            page.insert_text((72, y), para[:95], fontsize=9)
+            y += 11
+    doc.save(path)
+    doc.close()
+
+
+def bench(pdf_path, repeat):
+    import fitz
+    from app.utils.process_pdfs import PAGE_TEXT_FLAGS, is_toc_page, page_text_from_blocks
+
+    doc = fitz.open(pdf_path)
+    n = doc.page_count
+
+    def before():
+        for page in doc:
+            is_toc_page(page.get_text("text"))
+            page.get_text("dict").get("blocks", [])
+        str(doc[0].get_text("dict")).lower()
+
+    def after():
+        for page in doc:
+            tp = page.get_textpage(flags=PAGE_TEXT_FLAGS)
+            blocks = page.get_text("dict", textpage=tp).get("blocks", [])
+            is_toc_page(page_text_from_blocks(blocks))
+
+    for name, fn in (("before", before), ("after", after)):
+        best = float("inf")
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            fn()
+            best = min(best, time.perf_counter() - t0)
+        print(f"{name:>6}: {best * 1000:9.1f} ms total  {best / n * 1000:7.3f} ms/page  ({n} pages)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark per-page PDF parsing")
+    parser.add_argument("pdf", nargs="?", help="PDF to benchmark (default: synthetic)")
+    parser.add_argument("--pages", type=int, default=300, help="Synthetic page count")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    if args.pdf:
+        bench(args.pdf, args.repeat)
+        return
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "text_heavy.pdf")
+        make_text_heavy_pdf(path, args.pages)
+        bench(path, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
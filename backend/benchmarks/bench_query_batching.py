@@ -0,0 +1,114 @@
+"""
+Concurrent get_recommendations calls, one search each vs coalesced into
+batches (one transform + one sparse product per batch).
+
+Part 1 times TfidfIndex.search per query against search_many for growing
+batch sizes. Part 2 runs --clients threads issuing requests against the
+engine with batching off and on (several wait times), checks every answer
+equals the unbatched one, and reports throughput and latency percentiles.
+
+Usage (from backend/):
+    python benchmarks/bench_query_batching.py [--docs 20000] [--clients 16] [--requests 200]
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+import threading
+
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from bench_index_snapshot import make_items  # noqa: E402
+
+
+def make_queries(n, seed=1):
+    rng = random.Random(seed)
+    return [" ".join(f"term{rng.randrange(300)}" for _ in range(4)) for _ in range(n)]
+
+
+def run_clients(engine, queries, clients, per_client, top_k):
+    latencies = [[] for _ in range(clients)]
+    answers = [[] for _ in range(clients)]
+    start = threading.Barrier(clients + 1)
+
+    def client(c):
+        start.wait()
+        for r in range(per_client):
+            query = queries[(c * per_client + r) % len(queries)]
+            t0 = time.perf_counter()
+            result = engine.get_recommendations("", "Analyst", "Review", {"title": query}, top_k=top_k)
+            latencies[c].append(time.perf_counter() - t0)
+            answers[c].append([(rec["document_id"], rec["similarity_score"]) for rec in result])
+
+    threads = [threading.Thread(target=client, args=(c,)) for c in range(clients)]
+    for thread in threads:
+        thread.start()
+    start.wait()
+    t0 = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - t0, np.concatenate(latencies), answers
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark query micro-batching")
+    parser.add_argument("--docs", type=int, default=20000)
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=200, help="Requests per client")
+    parser.add_argument("--top-k", type=int, default=10)
+    args = parser.parse_args()
+
+    from app.utils.recommendation_engine import RecommendationEngine
+
+    items = make_items(args.docs)
+    queries = make_queries(1000)
+
+    plain = RecommendationEngine()
+    plain.add_documents(items)
+    index = plain.index
+    index.snapshot()
+
+    print(f"library: {len(plain.documents)} docs")
+    print("search vs search_many (per query):")
+    texts = [f"Analyst Review {q}" for q in queries]
+    for size in (1, 8, 32, 128):
+        batches = [texts[i:i + size] for i in range(0, len(texts), size)]
+        t0 = time.perf_counter()
+        for batch in batches:
+            for text in batch:
+                index.search(text, top_k=args.top_k, min_score=0.1)
+        single = (time.perf_counter() - t0) / len(texts)
+        t0 = time.perf_counter()
+        for batch in batches:
+            index.search_many(batch, top_k=args.top_k, min_score=0.1)
+        many = (time.perf_counter() - t0) / len(texts)
+        print(f"  batch {size:>4}: search {single * 1e6:7.1f} us   search_many {many * 1e6:7.1f} us")
+
+    print(f"{args.clients} clients x {args.requests} requests:")
+    _, _, expected = run_clients(plain, queries, args.clients, args.requests, args.top_k)
+    for label, batch_size, wait in (
+        ("off", 0, 0.0),
+        ("batch 32, wait 0 ms", 32, 0.0),
+        ("batch 32, wait 2 ms", 32, 0.002),
+        ("batch 64, wait 5 ms", 64, 0.005),
+    ):
+        engine = plain
+        if batch_size:
+            engine = RecommendationEngine(query_batch_size=batch_size, query_batch_wait=wait)
+            engine.documents, engine.index = plain.documents, plain.index
+        elapsed, latencies, answers = run_clients(engine, queries, args.clients, args.requests, args.top_k)
+        assert answers == expected, "batched results differ"
+        total = len(latencies)
+        stats = engine.query_batcher.stats() if engine.query_batcher else {"mean_batch": 1.0}
+        print(
+            f"  {label:>20}: {total / elapsed:8.0f} req/s   p50 {np.percentile(latencies, 50) * 1000:6.2f} ms   "
+            f"p99 {np.percentile(latencies, 99) * 1000:6.2f} ms   mean batch {stats['mean_batch']}"
+        )
+
+
+if __name__ == "__main__":
+    main()
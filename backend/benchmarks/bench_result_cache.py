@@ -0,0 +1,83 @@
+"""
+/api/analyze recommendations with and without the result cache.
+
+Replays a viewer-like request stream (users scrolling back and forth over a
+few documents, so the same normalized requests repeat) against a synthetic
+library, checks every cached answer equals the uncached one, and reports
+latency and cache stats. An add halfway through invalidates old entries.
+
+Usage (from backend/):
+    python benchmarks/bench_result_cache.py [--docs 20000] [--requests 3000]
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from bench_index_snapshot import make_items  # noqa: E402
+
+# Persona/job wording drawn from the synthetic vocabulary so queries match
+PERSONAS = [("term1 analyst", "review term5 term40"), ("term3 planner", "compare term7 term12")]
+
+
+def make_requests(n, docs, seed=0):
+    rng = random.Random(seed)
+    hot = rng.sample(docs, 20)
+    requests = []
+    for _ in range(n):
+        persona, job = rng.choice(PERSONAS)
+        doc_id = rng.choice(hot)
+        selection = rng.choice(["intro", "Section 2", "  results  ", "Results"])
+        requests.append((selection, persona, job, doc_id, rng.choice([None, 1, 2])))
+    return requests
+
+
+def run(engine, requests):
+    t0 = time.perf_counter()
+    out = [
+        engine.get_section_recommendations(sel, persona, job, document_id=doc_id, page_number=page, top_k=10)
+        for sel, persona, job, doc_id, page in requests
+    ]
+    return out, time.perf_counter() - t0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the analyze result cache")
+    parser.add_argument("--docs", type=int, default=20000)
+    parser.add_argument("--requests", type=int, default=3000)
+    args = parser.parse_args()
+
+    from app.utils.recommendation_engine import RecommendationEngine
+    from app.utils.result_cache import ResultCache
+
+    items = make_items(args.docs)
+    plain = RecommendationEngine()
+    cached = RecommendationEngine(result_cache=ResultCache())
+    for engine in (plain, cached):
+        engine.add_documents(items)
+
+    requests = make_requests(args.requests, list(plain.documents))
+    half = len(requests) // 2
+    extra = make_items(10, offset=args.docs)
+
+    expected, t_plain = run(plain, requests[:half])
+    got, t_cached = run(cached, requests[:half])
+    for engine in (plain, cached):
+        engine.add_documents(extra)  # bumps index_version
+    expected2, t_plain2 = run(plain, requests[half:])
+    got2, t_cached2 = run(cached, requests[half:])
+    assert got + got2 == expected + expected2, "cached results differ"
+
+    n = len(requests)
+    print(f"library: {len(plain.documents)} docs, {n} requests (results identical)")
+    print(f"uncached: {(t_plain + t_plain2) / n * 1000:7.3f} ms/request")
+    print(f"cached:   {(t_cached + t_cached2) / n * 1000:7.3f} ms/request")
+    print(f"stats:    {cached.result_cache.stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Library-wide best sections: document search + per-document section
+matching (the old route to "which section?") vs one query against the
+section-level index.
+
+Usage (from backend/):
+    python benchmarks/bench_section_index.py [--docs 20000] [--queries 200]
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from bench_index_snapshot import make_items  # noqa: E402
+
+
+def sections_via_documents(engine, query, top_k):
+    # Top documents first, then token overlap inside each of them
+    found = []
+    for rec in engine.get_recommendations("", "", "", {"title": query}, top_k=top_k):
+        for section in rec["relevant_sections"]:
+            found.append((rec["document_id"], section["page"], section["relevance_score"]))
+    return found[:top_k]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the section-level index")
+    parser.add_argument("--docs", type=int, default=20000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=10)
+    args = parser.parse_args()
+
+    from app.utils.recommendation_engine import RecommendationEngine
+
+    engine = RecommendationEngine()
+    t0 = time.perf_counter()
+    engine.add_documents(make_items(args.docs))
+    engine.index.snapshot()
+    docs_only = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    engine.section_index.snapshot()
+    section_refresh = time.perf_counter() - t0
+
+    rng = random.Random(1)
+    queries = [" ".join(f"term{rng.randrange(300)}" for _ in range(4)) for _ in range(args.queries)]
+
+    timings = {}
+    for name, fn in (
+        ("documents + per-doc overlap", lambda q: sections_via_documents(engine, q, args.top_k)),
+        ("section index", lambda q: engine.search_sections(q, top_k=args.top_k)),
+    ):
+        fn(queries[0])
+        t0 = time.perf_counter()
+        for q in queries:
+            fn(q)
+        timings[name] = (time.perf_counter() - t0) / len(queries)
+
+    snap = engine.section_index.snapshot()
+    print(f"library: {len(engine.documents)} docs, {len(snap.doc_ids)} section rows, nnz {snap.matrix.nnz}")
+    print(f"ingest (both indexes): {docs_only * 1000:8.1f} ms   section matrix refresh: {section_refresh * 1000:7.1f} ms")
+    for name, seconds in timings.items():
+        print(f"{name:>28}: {seconds * 1000:7.3f} ms/query")
+
+
+if __name__ == "__main__":
+    main()
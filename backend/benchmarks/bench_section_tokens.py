@@ -0,0 +1,93 @@
+"""
+_find_relevant_sections: per-query heading tokenization vs the token ->
+section bitmasks precomputed when documents are added.
+
+Runs both over synthetic outlines with short and long headings (results
+must match) and reports the per-document cost; the precomputed path should
+not grow with heading length.
+
+Usage (from backend/):
+    python benchmarks/bench_section_tokens.py [--docs 2000] [--sections 10]
+"""
+
+import os
+import re
+import sys
+import time
+import random
+import argparse
+import tracemalloc
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+
+def legacy_find_relevant_sections(engine, outline, query):
+    relevant = []
+    query_words = set(re.findall(r'\b\w+\b', query.lower()))
+    for item in outline:
+        section = engine._section(item)
+        section_words = set(re.findall(r'\b\w+\b', section["text"].lower()))
+        overlap = len(query_words & section_words)
+        if overlap > 0:
+            relevant.append({
+                **section,
+                "relevance_score": overlap / len(query_words) if query_words else 0
+            })
+    relevant.sort(key=lambda x: x["relevance_score"], reverse=True)
+    return relevant
+
+
+def make_outlines(n, sections, words, seed=0):
+    rng = random.Random(seed)
+    vocab = [f"term{i}" for i in range(5000)]
+    return [
+        [
+            {"level": "H2", "text": " ".join(rng.choices(vocab[:500] + vocab, k=words)), "page": p}
+            for p in range(1, sections + 1)
+        ]
+        for _ in range(n)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark section token matching")
+    parser.add_argument("--docs", type=int, default=2000)
+    parser.add_argument("--sections", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    from app.utils.recommendation_engine import RecommendationEngine
+
+    engine = RecommendationEngine()
+    query = "Analyst review term3 term40 term7 term120 term250"
+    for words in (5, 20, 80):
+        outlines = make_outlines(args.docs, args.sections, words)
+        tracemalloc.start()
+        tokens = [engine._section_term_masks(outline) for outline in outlines]
+        stored = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        for outline, toks in zip(outlines[:200], tokens):
+            assert engine._find_relevant_sections(outline, query, toks) == \
+                legacy_find_relevant_sections(engine, outline, query)
+
+        best = {}
+        for name, fn in (
+            ("legacy", lambda: [legacy_find_relevant_sections(engine, o, query) for o in outlines]),
+            ("tokens", lambda: [engine._find_relevant_sections(o, query, t) for o, t in zip(outlines, tokens)]),
+        ):
+            best[name] = float("inf")
+            for _ in range(args.repeat):
+                t0 = time.perf_counter()
+                fn()
+                best[name] = min(best[name], time.perf_counter() - t0)
+
+        per = 1e6 / args.docs
+        print(
+            f"{words:>3} words/heading: legacy {best['legacy'] * per:7.1f} us/doc  "
+            f"precomputed {best['tokens'] * per:6.1f} us/doc  ({best['legacy'] / best['tokens']:4.1f}x)  "
+            f"stored {stored / args.docs / 1024:5.1f} KiB/doc"
+        )
+
+
+if __name__ == "__main__":
+    main()
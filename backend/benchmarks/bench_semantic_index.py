@@ -0,0 +1,139 @@
+"""
+Semantic section index: embedding throughput and query latency against the
+TF-IDF section index.
+
+With --model (a local transformer directory; needs torch + transformers):
+  - sections/sec embedding a synthetic library cold, fp32 and --int8
+  - sections/sec re-indexing the same library from the vector cache
+  - query latency (embed query + search) vs TF-IDF search_sections
+Always:
+  - NumPy search latency over --rows random unit vectors, exact vs the
+    inverted-file ANN, with recall@10 of the ANN against exact search
+
+Usage (from backend/):
+    python benchmarks/bench_semantic_index.py [--model PATH] [--docs 2000] [--int8]
+                                              [--rows 200000] [--ann-lists 256]
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+import importlib.util
+
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from bench_index_snapshot import make_items  # noqa: E402
+
+
+def time_queries(fn, queries):
+    fn(queries[0])
+    t0 = time.perf_counter()
+    for q in queries:
+        fn(q)
+    return (time.perf_counter() - t0) / len(queries)
+
+
+def bench_model(args, queries):
+    from app.utils.recommendation_engine import RecommendationEngine
+    from app.utils.semantic_index import Embedder, SemanticIndex, VectorCache
+
+    items = make_items(args.docs)
+    tfidf = RecommendationEngine()
+    tfidf.add_documents(items)
+    tfidf_query = time_queries(lambda q: tfidf.search_sections(q, top_k=10, semantic=False), queries)
+    print(f"  TF-IDF section search: {tfidf_query * 1000:8.3f} ms/query")
+
+    for quantize in ([False, True] if args.int8 else [False]):
+        embedder = Embedder(args.model, batch_size=args.batch, quantize=quantize, threads=args.threads)
+        with tempfile.TemporaryDirectory() as root:
+            semantic = SemanticIndex(embedder, cache=VectorCache(root, embedder.model_id))
+            engine = RecommendationEngine(semantic=semantic)
+            embedder.embed(["warm up"])
+            t0 = time.perf_counter()
+            engine.add_documents(items)
+            cold = time.perf_counter() - t0
+            rows = len(engine.section_index)
+
+            warm_engine = RecommendationEngine(
+                semantic=SemanticIndex(embedder, cache=VectorCache(root, embedder.model_id))
+            )
+            t0 = time.perf_counter()
+            warm_engine.add_documents(items)
+            warm = time.perf_counter() - t0
+
+            query = time_queries(lambda q: engine.search_sections(q, top_k=10), queries)
+            label = "int8" if quantize else "fp32"
+            print(f"  {label}: {rows} sections  cold {rows / cold:8.1f} sections/s  "
+                  f"cached {rows / warm:9.1f} sections/s (model calls {warm_engine.semantic.embedded})  "
+                  f"query {query * 1000:7.3f} ms")
+
+
+def bench_search(args):
+    from app.utils.semantic_index import SemanticIndex, normalize_rows
+
+    rng = np.random.default_rng(0)
+    # Clustered unit vectors, roughly like embeddings of a topical library
+    centers = normalize_rows(rng.standard_normal((args.ann_lists, args.dim)).astype(np.float32))
+    noise = rng.standard_normal((args.rows, args.dim)).astype(np.float32) / np.sqrt(args.dim)
+    vectors = normalize_rows(centers[rng.integers(0, len(centers), args.rows)] + args.spread * noise)
+
+    class Precomputed:
+        def embed(self, texts):
+            return vectors[[int(text) for text in texts]]
+
+    index = SemanticIndex(Precomputed(), ann_lists=args.ann_lists, ann_probe=args.ann_probe, min_score=-1.0)
+    index.add_many((f"row{i}", str(i)) for i in range(args.rows))
+    t0 = time.perf_counter()
+    index.search_vector(vectors[0], top_k=10)  # trains the lists
+    train = time.perf_counter() - t0
+
+    query_rows = random.Random(1).sample(range(args.rows), 200)
+    exact = time_queries(lambda i: index.search_vector(vectors[i], top_k=10, exact=True), query_rows)
+    ann = time_queries(lambda i: index.search_vector(vectors[i], top_k=10), query_rows)
+    recall = np.mean([
+        len({r for r, _ in index.search_vector(vectors[i], top_k=10, exact=True)}
+            & {r for r, _ in index.search_vector(vectors[i], top_k=10)}) / 10
+        for i in query_rows
+    ])
+    print(f"  {args.rows} x {args.dim} vectors: exact {exact * 1000:7.3f} ms/query   "
+          f"ANN {args.ann_lists} lists / {args.ann_probe} probed {ann * 1000:7.3f} ms/query   "
+          f"recall@10 {recall:.3f}   (training {train:.1f} s)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the semantic section index")
+    parser.add_argument("--model", help="Local embedding model directory")
+    parser.add_argument("--docs", type=int, default=2000)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--batch", type=int, default=32)
+    parser.add_argument("--threads", type=int, default=0)
+    parser.add_argument("--int8", action="store_true", help="Also run with int8 dynamic quantization")
+    parser.add_argument("--rows", type=int, default=200000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--ann-lists", type=int, default=256)
+    parser.add_argument("--ann-probe", type=int, default=16)
+    parser.add_argument("--spread", type=float, default=2.5, help="Noise around cluster centers")
+    args = parser.parse_args()
+
+    rng = random.Random(1)
+    queries = [" ".join(f"term{rng.randrange(300)}" for _ in range(4)) for _ in range(args.queries)]
+
+    print("model:")
+    if not args.model:
+        print("  skipped (no --model)")
+    elif importlib.util.find_spec("torch") is None or importlib.util.find_spec("transformers") is None:
+        print("  skipped (torch/transformers not installed)")
+    else:
+        bench_model(args, queries)
+
+    print("vector search:")
+    bench_search(args)
+
+
+if __name__ == "__main__":
+    main()
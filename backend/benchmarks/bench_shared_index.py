@@ -0,0 +1,127 @@
+"""
+Shared index across worker processes: publish and pickup cost.
+
+One writer process adds documents under IndexStore.exclusive(), which
+publishes each batch by appending it to the change log (plus a snapshot
+every --snapshot-every changes); reader processes call refresh(), which
+applies only the new log entries, and are checked to return the same
+search results as the writer. Pickup, and the first search after it (which
+re-weights the index), are timed against a full snapshot load.
+
+Usage (from backend/):
+    python benchmarks/bench_shared_index.py [--docs 20000] [--batch 50] [--readers 3] [--snapshot-every 100]
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+import multiprocessing as mp
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from bench_index_snapshot import make_items  # noqa: E402
+
+QUERY = "term3 term40 term7"
+
+
+def attach(root, snapshot_every=500):
+    from app.utils.index_store import IndexStore
+    from app.utils.recommendation_engine import RecommendationEngine
+
+    engine = RecommendationEngine()
+    store = IndexStore(root, shared=True, snapshot_every=snapshot_every)
+    store.attach(engine)
+    return engine, store
+
+
+def results(engine):
+    return [(doc_id, round(score, 9)) for doc_id, score in engine.index.search(QUERY, top_k=20)]
+
+
+def reader(root, commands, replies):
+    engine, store = attach(root)
+    while True:
+        command = commands.get()
+        if command is None:
+            return
+        t0 = time.perf_counter()
+        store.refresh(engine)
+        pickup = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        got = results(engine)
+        first_search = time.perf_counter() - t0
+        replies.put((store.version, pickup, first_search, got))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark shared index publishing")
+    parser.add_argument("--docs", type=int, default=20000, help="Library size before the batches")
+    parser.add_argument("--batch", type=int, default=50, help="Documents per published batch")
+    parser.add_argument("--batches", type=int, default=5)
+    parser.add_argument("--readers", type=int, default=3)
+    parser.add_argument("--snapshot-every", type=int, default=100, help="Logged changes between snapshots")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as root:
+        writer, store = attach(root, args.snapshot_every)
+        with store.exclusive(writer):
+            writer.add_documents(make_items(args.docs))
+        store.save(writer)  # readers start from a snapshot of the library
+
+        ctx = mp.get_context("spawn")
+        workers = []
+        for _ in range(args.readers):
+            commands, replies = ctx.Queue(), ctx.Queue()
+            proc = ctx.Process(target=reader, args=(root, commands, replies))
+            proc.start()
+            workers.append((proc, commands, replies))
+
+        publish, snapshot_publish, pickups, first_searches = [], [], [], []
+        for b in range(args.batches):
+            items = make_items(args.batch, offset=args.docs + b * args.batch)
+            version = store.version
+            t0 = time.perf_counter()
+            with store.exclusive(writer):
+                writer.add_documents(items)
+                if b % 2:
+                    writer.remove_session(f"s{b}")
+            (snapshot_publish if store.version != version else publish).append(time.perf_counter() - t0)
+
+            expected = results(writer)
+            for _, commands, replies in workers:
+                commands.put("refresh")
+            for _, _, replies in workers:
+                version, pickup, first_search, got = replies.get()
+                assert version == store.version, (version, store.version)
+                assert got == expected, "reader results differ from the writer"
+                pickups.append(pickup)
+                first_searches.append(first_search)
+
+        for proc, commands, _ in workers:
+            commands.put(None)
+            proc.join()
+
+        from app.utils.recommendation_engine import RecommendationEngine
+
+        store.save(writer)
+        t0 = time.perf_counter()
+        cold = RecommendationEngine()
+        type(store)(root).load(cold)
+        full = time.perf_counter() - t0
+
+    def ms(values):
+        return f"{sum(values) / len(values) * 1000:8.1f} ms" if values else "     n/a"
+
+    n = len(writer.documents)
+    print(f"library: {n} docs, {args.batches} batches of {args.batch}, {args.readers} readers (results identical)")
+    print(f"publish (writer, per batch, log append):         {ms(publish)}")
+    print(f"publish (writer, per batch, snapshot due):       {ms(snapshot_publish)}  ({len(snapshot_publish)} batches)")
+    print(f"pickup  (reader, new log entries only):          {ms(pickups)}")
+    print(f"first search after pickup (re-weights index):    {ms(first_searches)}")
+    print(f"full snapshot load (for comparison):             {full * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+App startup cost: wall time to import and build the Flask app, plus peak RSS.
+
+Each run is a fresh interpreter so module caches do not leak between runs.
+
+Usage (from backend/):
+    python benchmarks/bench_startup.py [--repeat 5]
+"""
+
+import os
+import sys
+import json
+import argparse
+import subprocess
+
+BACKEND = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+PROBE = r"""
+import json, resource, sys, time
+t0 = time.perf_counter()
+from app import create_app
+t1 = time.perf_counter()
+create_app()
+t2 = time.perf_counter()
+heavy = [m for m in ("sklearn", "nltk", "PyPDF2", "scipy") if m in sys.modules]
+print(json.dumps({
+    "import_ms": (t1 - t0) * 1000,
+    "create_ms": (t2 - t1) * 1000,
+    "maxrss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    "heavy": heavy,
+}))
+"""
+
+
+def run_once():
+    out = subprocess.run(
+        [sys.executable, "-c", PROBE],
+        cwd=BACKEND,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark app startup")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    runs = [run_once() for _ in range(args.repeat)]
+    best = min(runs, key=lambda r: r["import_ms"] + r["create_ms"])
+    print(f"import create_app: {best['import_ms']:8.1f} ms")
+    print(f"      create_app(): {best['create_ms']:8.1f} ms")
+    print(f"          peak RSS: {best['maxrss_mb']:8.1f} MB")
+    print(f"   heavy deps live: {', '.join(best['heavy']) or 'none'}")
+
+
+if __name__ == "__main__":
+    main()
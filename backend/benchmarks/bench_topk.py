@@ -0,0 +1,77 @@
+"""
+get_recommendations retrieval: full cosine + argsort vs postings + top-k.
+
+Builds synthetic libraries, then times single queries (p50/p99) with the old
+path (score every document, sort all scores, keep > 0.1) and with
+TfidfIndex.search (score only documents sharing a query term, argpartition).
+The top-k of both must agree.
+
+Usage (from backend/):
+    python benchmarks/bench_topk.py [--sizes 1000 10000 100000] [--top-k 10]
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+
+def make_texts(n, seed=0):
+    rng = random.Random(seed)
+    vocab = [f"term{i}" for i in range(20000)]
+    weights = [1.0 / (i + 1) for i in range(len(vocab))]
+    return [" ".join(rng.choices(vocab, weights, k=40)) for _ in range(n)]
+
+
+def percentile_ms(samples, q):
+    return float(np.percentile(samples, q)) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark top-k retrieval")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+
+    from app.utils.tfidf_index import TfidfIndex
+
+    rng = random.Random(1)
+    queries = [
+        "analyst review " + " ".join(f"term{rng.randint(50, 5000)}" for _ in range(3))
+        for _ in range(args.queries)
+    ]
+
+    print(f"{'docs':>7} {'full p50':>10} {'full p99':>10} {'top-k p50':>10} {'top-k p99':>10}")
+    for n in args.sizes:
+        index = TfidfIndex(max_features=1000, stop_words="english")
+        index.add_many((f"d{i}", text) for i, text in enumerate(make_texts(n)))
+        index.snapshot()
+
+        full, fast = [], []
+        for query in queries:
+            t0 = time.perf_counter()
+            doc_ids, sims = index.similarities(query)
+            ranked = [(doc_ids[i], float(sims[i])) for i in np.argsort(sims)[::-1] if sims[i] > 0.1]
+            full.append(time.perf_counter() - t0)
+
+            t0 = time.perf_counter()
+            top = index.search(query, top_k=args.top_k, min_score=0.1)
+            fast.append(time.perf_counter() - t0)
+
+            expected = [score for _, score in ranked[: args.top_k]]
+            assert np.allclose([score for _, score in top], expected), query
+
+        print(
+            f"{n:>7} {percentile_ms(full, 50):>8.2f}ms {percentile_ms(full, 99):>8.2f}ms "
+            f"{percentile_ms(fast, 50):>8.2f}ms {percentile_ms(fast, 99):>8.2f}ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
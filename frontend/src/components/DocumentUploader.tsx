@@ -6,7 +6,7 @@ import React, { useCallback, useState } from 'react';
 import { Upload, FileText, X, CheckCircle, BookOpen, FolderOpen } from 'lucide-react';
 import { Button } from '@/components/ui/button';
 import { Tabs, TabsContent, TabsList, TabsTrigger } from '@/components/ui/tabs';
-import { APIService } from '@/services/api';
+import { APIService, OutlineHeading, OutlineStreamEvent } from '@/services/api';
 import { OfflineRecommendationEngine } from '@/services/offlineEngine';
 
 interface DocumentUploaderProps {
@@ -33,6 +33,8 @@ export default function DocumentUploader({ onDocumentReady, onUploadComplete }:
   const [uploadedFiles, setUploadedFiles] = useState<string[]>([]);
   const [persona, setPersona] = useState('');
   const [job, setJob] = useState('');
+  // 1A outline of the fresh PDF, filled in page by page while it is processed
+  const [outline, setOutline] = useState<{ title: string; headings: OutlineHeading[] } | null>(null);
   
   /** Handle drag events */
   const handleDrag = useCallback((e: React.DragEvent) => {
@@ -79,14 +81,34 @@ export default function DocumentUploader({ onDocumentReady, onUploadComplete }:
     setLibraryFiles(prev => prev.filter((_, i) => i !== index));
   }, []);
 
+  /** Apply one /upload-stream event: provisional title/headings, then the final outline */
+  const handleOutlineEvent = useCallback((event: OutlineStreamEvent) => {
+    if (event.event === 'title') {
+      const { title } = event.data;
+      setOutline(prev => ({ title, headings: prev?.headings || [] }));
+    } else if (event.event === 'headings') {
+      const { headings } = event.data;
+      setOutline(prev => ({ title: prev?.title || '', headings: [...(prev?.headings || []), ...headings] }));
+    } else if (event.event === 'outline') {
+      setOutline({ title: event.data.title, headings: event.data.headings });
+    }
+  }, []);
+
   /** Open fresh PDF for immediate reading and send to backend with persona & job */
   const openFreshPDF = useCallback(async () => {
     if (!freshFile) return;
 
     setProcessing(true);
+    setOutline(null);
     try {
-      // Upload to backend with persona & job for context
-      await APIService.uploadPDFs([freshFile], persona, job);
+      // Upload to backend with persona & job for context, showing the
+      // outline as it streams in (a failed preview does not block reading)
+      await Promise.all([
+        APIService.uploadPDFs([freshFile], persona, job),
+        APIService.streamOutline(freshFile, handleOutlineEvent).catch(error =>
+          console.error('Outline preview failed:', error)
+        ),
+      ]);
 
       // Process PDF locally for offline recommendations
       const text = await extractPDFTextLocally(freshFile);
@@ -109,7 +131,7 @@ export default function DocumentUploader({ onDocumentReady, onUploadComplete }:
     } finally {
       setProcessing(false);
     }
-  }, [freshFile, persona, job, onDocumentReady]);
+  }, [freshFile, persona, job, onDocumentReady, handleOutlineEvent]);
 
   /** Upload library PDFs */
   const uploadLibraryPDFs = useCallback(async () => {
@@ -228,6 +250,22 @@ export default function DocumentUploader({ onDocumentReady, onUploadComplete }:
                     {processing ? 'Processing...' : 'Start Reading'}
                   </Button>
                 )}
+
+                {/* Outline preview (from /upload-stream) */}
+                {processing && outline && (
+                  <div className="mt-4 p-4 bg-gray-50 rounded-md text-left max-h-64 overflow-y-auto">
+                    <div className="font-medium mb-2">{outline.title || freshFile?.name}</div>
+                    {outline.headings.map((heading, index) => (
+                      <div
+                        key={index}
+                        className="text-sm text-gray-700"
+                        style={{ paddingLeft: `${(parseInt(heading.level.replace('H', ''), 10) - 1 || 0) * 12}px` }}
+                      >
+                        {heading.text} <span className="text-gray-400">p. {heading.page}</span>
+                      </div>
+                    ))}
+                  </div>
+                )}
               </div>
             </div>
           </div>
@@ -3,17 +3,64 @@
  * Handles file uploads, document analysis, and insights
  */
 
+import { RelatedSection } from "@/types";
+
 export interface UploadResponse {
   uploaded_files: string[];
   message?: string;
 }
 
+export interface UploadJobAccepted {
+  job_id: string;
+  session_id: string;
+  status_url: string;
+  results_url: string;
+}
+
+export interface JobStatus {
+  job_id: string;
+  status: "queued" | "running" | "done" | "failed";
+  error: string | null;
+  progress: { total: number; done: number; failed: number; pending: number };
+  files: { filename: string; status: string; error: string | null; elapsed_seconds: number | null }[];
+  elapsed_seconds: number;
+}
+
+export interface OutlineHeading {
+  level: string;
+  text: string;
+  page: number;
+  confidence?: number;
+}
+
+export type OutlineStreamEvent =
+  | { event: "session"; data: { session_id: string; pdf_url: string; filename: string } }
+  | { event: "title"; data: { title: string } }
+  | { event: "headings"; data: { page: number; headings: OutlineHeading[] } }
+  | { event: "outline"; data: { title: string; headings: OutlineHeading[] } }
+  | { event: "done"; data: { status: string; session_id: string } }
+  | { event: "error"; data: { status: string; message: string } };
+
 export interface DocumentListResponse {
   documents: { id: string; name: string; pages: number }[];
 }
 
+// One library-wide section match from /api/analyze
+export interface SectionHit {
+  id: string;
+  document_id: string;
+  document: string;
+  title: string;
+  page: number;
+  level: string;
+  text: string;
+  score: number;
+  pdf_url: string;
+}
+
 export interface AnalysisResponse {
   recommendations: string[];
+  related_sections: RelatedSection[];
   context?: string;
 }
 
@@ -33,6 +80,9 @@ const API_BASE =
 // Keep the upload field name in one place
 const PDF_UPLOAD_FIELD = "pdfs";
 
+// How often to poll a background upload job
+const JOB_POLL_INTERVAL_MS = 1000;
+
 async function apiFetch<T>(
   endpoint: string,
   options: RequestInit = {}
@@ -49,22 +99,92 @@ async function apiFetch<T>(
 
 export class APIService {
   /**
-   * Upload multiple PDF files with persona & job context
+   * Upload multiple PDF files with persona & job context.
+   * The backend processes them as a background job; this polls until it
+   * finishes and resolves with the job's results.
    */
   static async uploadPDFs(
     files: File[],
     persona: string,
-    job: string
+    job: string,
+    onProgress?: (status: JobStatus) => void
   ): Promise<UploadResponse> {
     const formData = new FormData();
     files.forEach(file => formData.append(PDF_UPLOAD_FIELD, file));
     formData.append("persona", persona);
     formData.append("job", job);
 
-    return apiFetch<UploadResponse>("/upload-pdfs", {
+    const accepted = await apiFetch<UploadJobAccepted>("/upload-pdfs", {
       method: "POST",
       body: formData,
     });
+
+    for (;;) {
+      const { job: status } = await APIService.getJobStatus(accepted.job_id);
+      onProgress?.(status);
+      if (status.status === "failed") {
+        throw new Error(`Upload job failed: ${status.error}`);
+      }
+      if (status.status === "done") break;
+      await new Promise(resolve => setTimeout(resolve, JOB_POLL_INTERVAL_MS));
+    }
+
+    return apiFetch<UploadResponse>(`/jobs/${accepted.job_id}/results`);
+  }
+
+  /**
+   * Get status and per-file progress of a background job
+   */
+  static async getJobStatus(jobId: string): Promise<{ job: JobStatus }> {
+    return apiFetch<{ job: JobStatus }>(`/jobs/${jobId}`);
+  }
+
+  /**
+   * Upload a single PDF and receive its outline progressively (SSE over POST).
+   * "title" and per-page "headings" events are provisional; the final
+   * "outline" event is authoritative. Headings come from the 1A extractor
+   * (level/text/page, title from the PDF), not /upload's plain strings.
+   * Used by DocumentUploader for the fresh-PDF outline preview.
+   */
+  static async streamOutline(
+    file: File,
+    onEvent: (event: OutlineStreamEvent) => void
+  ): Promise<void> {
+    const formData = new FormData();
+    formData.append("file", file);
+
+    const res = await fetch(`${API_BASE}/upload-stream`, {
+      method: "POST",
+      body: formData,
+    });
+    if (!res.ok || !res.body) {
+      const text = await res.text();
+      throw new Error(
+        `API request failed (${res.status} ${res.statusText}): ${text}`
+      );
+    }
+
+    const reader = res.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = "";
+    for (;;) {
+      const { value, done } = await reader.read();
+      if (done) break;
+      buffer += decoder.decode(value, { stream: true });
+
+      let sep;
+      while ((sep = buffer.indexOf("\n\n")) !== -1) {
+        const message = buffer.slice(0, sep);
+        buffer = buffer.slice(sep + 2);
+        let event = "message";
+        let data = "";
+        for (const line of message.split("\n")) {
+          if (line.startsWith("event: ")) event = line.slice(7);
+          else if (line.startsWith("data: ")) data += line.slice(6);
+        }
+        onEvent({ event, data: JSON.parse(data) } as OutlineStreamEvent);
+      }
+    }
   }
 
   /**
@@ -85,11 +205,27 @@ export class APIService {
     job: string = "Analyze document"
   ): Promise<AnalysisResponse> {
     const payload = { document_id: documentId, page_number: pageNumber, selection, persona, job };
-    return apiFetch<AnalysisResponse>("/analyze", {
-      method: "POST",
-      headers: { "Content-Type": "application/json" },
-      body: JSON.stringify(payload),
-    });
+    const result = await apiFetch<Omit<AnalysisResponse, "related_sections"> & { related_sections?: SectionHit[] }>(
+      "/analyze",
+      {
+        method: "POST",
+        headers: { "Content-Type": "application/json" },
+        body: JSON.stringify(payload),
+      }
+    );
+    return {
+      ...result,
+      related_sections: (result.related_sections || []).map(hit => ({
+        id: hit.id,
+        documentId: hit.document_id,
+        documentName: hit.document,
+        pageNumber: hit.page,
+        content: hit.text,
+        snippet: hit.text,
+        relevanceScore: hit.score,
+        position: { x: 0, y: 0, width: 100, height: 20 },
+      })),
+    };
   }
 
   /**